@@ -30,13 +30,617 @@ output: none
 import time
 import datetime
 import threading
-from queue import Queue
+import math
+import weakref
+from collections import deque
+from queue import Queue, LifoQueue, Empty, Full
+
+# Downloaded Libraries
+import numpy
 
 
 ########## Definitions ##########
 
 # Classes #
 
+class FrameBuffer:
+    def __init__(self, pool=None, size=0):
+        """
+        FrameBuffer: A reusable file-like object that the camera encoder writes a frame into. The memory is allocated
+                     once and only grows when a frame is larger than any frame before it.
+
+        Required Modules: None
+        Required Classes: None
+        Methods: write, flush, getbuffer, reset, release
+
+        Class Attributes
+        none
+
+        Object Parameters & Attributes
+        Parameters:
+        :param pool: The FrameBufferPool that this buffer returns to when released.
+        :param size: The number of bytes to preallocate.
+
+        Attributes:
+        data: The preallocated memory that holds the frame.
+        length: The number of bytes of the current frame in data.
+        limit: The most bytes of a frame to keep, the rest is thrown away. None keeps the whole frame.
+        """
+        # Parameters
+        self.pool = pool
+
+        # Attributes
+        self.data = bytearray(size)
+        self.length = 0
+        self.limit = None
+
+    # Methods #
+    def write(self, data):
+        """
+        write: Appends bytes from the encoder to the frame.
+
+        Parameters:
+        :param data: A bytes-like object to add to the frame.
+        :return: The number of bytes written.
+        """
+        size = len(data)
+        if self.limit is not None and self.length + size > self.limit:  # Only keep the start of the frame.
+            data = memoryview(data)[:max(self.limit - self.length, 0)]
+        end = self.length + len(data)
+        if end > len(self.data):                        # Grow the buffer only when the frame does not fit.
+            try:
+                self.data.extend(bytes(end - len(self.data)))
+            except BufferError:                         # A consumer still holds a view so use new memory instead.
+                self.data = self.data[:self.length] + bytearray(end - self.length)
+        self.data[self.length:end] = data               # Copy into the existing memory without reallocating.
+        self.length = end
+        return size
+
+    def flush(self):
+        """ flush: Does nothing since the frame is kept in memory, but the encoder expects it to exist."""
+        pass
+
+    def getbuffer(self):
+        """ getbuffer: Returns a memoryview of the frame without copying it."""
+        return memoryview(self.data)[:self.length]
+
+    def reset(self):
+        """ reset: Empties the buffer so it can hold a new frame while keeping its memory."""
+        self.length = 0
+
+    def release(self):
+        """ release: Gives the buffer back to its pool once the frame has been converted."""
+        if self.pool:
+            self.pool.release(self)
+
+
+class FrameBufferPool:
+    def __init__(self, depth=30, bufferSize=0):
+        """
+        FrameBufferPool: A fixed size pool of preallocated FrameBuffers that are reused for every frame instead of
+                         creating a new buffer per frame.
+
+        Required Modules: queue, threading
+        Required Classes: FrameBuffer
+        Methods: acquire, release, stats
+
+        Class Attributes
+        none
+
+        Object Parameters & Attributes
+        Parameters:
+        :param depth: The number of buffers kept in the pool.
+        :param bufferSize: The number of bytes preallocated in each buffer.
+
+        Attributes:
+        freeBuffers: A stack of the buffers ready to be used. The most recently used buffer is reused first.
+        statsLock: A lock to safely change the counters.
+        reused: The number of frames that were given a buffer from the pool.
+        exhausted: The number of frames that had to be given a new buffer because the pool was empty.
+        frameLimit: The most bytes of each frame the buffers keep. None keeps the whole frame.
+        """
+        # Parameters
+        self.depth = depth
+        self.bufferSize = bufferSize
+        self.frameLimit = None
+
+        # Attributes
+        self.freeBuffers = LifoQueue(maxsize=depth)
+        self.statsLock = threading.Lock()
+        self.reused = 0
+        self.exhausted = 0
+        for buffer in range(depth):                     # Preallocate all the buffers.
+            self.freeBuffers.put(FrameBuffer(self, bufferSize))
+
+    # Methods #
+    def acquire(self):
+        """
+        acquire: Gets an empty buffer from the pool or creates a new one when the pool is exhausted.
+
+        :return: An empty FrameBuffer.
+        """
+        try:
+            buffer = self.freeBuffers.get_nowait()      # Take a buffer that was released.
+            with self.statsLock:
+                self.reused += 1
+        except Empty:                                   # When the converters are behind the pool is exhausted.
+            buffer = FrameBuffer(self, self.bufferSize)
+            with self.statsLock:
+                self.exhausted += 1
+        buffer.reset()
+        buffer.limit = self.frameLimit
+        return buffer
+
+    def release(self, buffer):
+        """
+        release: Puts a buffer back in the pool. Extra buffers created while exhausted are thrown away.
+
+        Parameters:
+        :param buffer: The FrameBuffer to put back.
+        """
+        try:
+            self.freeBuffers.put_nowait(buffer)
+        except Full:
+            pass
+
+    def stats(self):
+        """ stats: Returns the counters of the pool to be put in the returned data."""
+        with self.statsLock:
+            return {'Buffer Reuses': self.reused, 'Buffer Exhaustions': self.exhausted}
+
+
+class FrameArrayPool:
+    def __init__(self, depth=30, name='Buffer'):
+        """
+        FrameArrayPool: A pool of reusable memory that frame arrays are read and converted into, so cameras and
+                        converters fill existing memory instead of making a new array per frame. An acquired array
+                        belongs to the frame it holds and is passed along without copying. Its memory goes back to the
+                        pool when the last array or view of that frame is dropped, since a frame can be held by the
+                        processors, the savers, and the pre-trigger ring all at once.
+
+        Required Modules: queue, threading, weakref, numpy
+        Required Classes: None
+        Methods: acquire, release, stats
+
+        Class Attributes
+        none
+
+        Object Parameters & Attributes
+        Parameters:
+        :param depth: The number of blocks of memory kept in the pool.
+        :param name: The name the statistics of the pool are reported under.
+
+        Attributes:
+        freeMemory: A stack of the memory ready to be used. The most recently used memory is reused first.
+        statsLock: A lock to safely change the counters.
+        reused: The number of frames that were given memory from the pool.
+        exhausted: The number of frames that needed new memory because the pool was empty or its memory was a
+                   different size, such as after the resolution changed.
+        """
+        # Parameters
+        self.depth = depth
+        self.name = name
+
+        # Attributes
+        self.freeMemory = LifoQueue(maxsize=depth)
+        self.statsLock = threading.Lock()
+        self.reused = 0
+        self.exhausted = 0
+
+    # Methods #
+    def acquire(self, shape, dtype=numpy.uint8):
+        """
+        acquire: Gets an array for a frame from the pool. The memory is allocated once the first time a frame of its size
+                 is needed and reused after that. The array's contents are whatever the last frame left.
+
+        Parameters:
+        :param shape: The shape of the frame array.
+        :param dtype: The numpy type of the pixels.
+        :return: A writable numpy array that owns its memory until it is dropped.
+        """
+        dtype = numpy.dtype(dtype)
+        size = math.prod(shape) * dtype.itemsize
+        try:
+            memory = self.freeMemory.get_nowait()       # Take memory that was released.
+            if len(memory) != size:                     # The frames changed size so the old memory is thrown away.
+                raise Empty
+            with self.statsLock:
+                self.reused += 1
+        except Empty:                                   # When the consumers are behind the pool is exhausted.
+            memory = bytearray(size)
+            with self.statsLock:
+                self.exhausted += 1
+        # Views of the flat array keep it alive, so it is only finalized after every view of the frame is dropped.
+        flat = numpy.frombuffer(memory, dtype=dtype)
+        finalizer = weakref.finalize(flat, self.release, memory)
+        finalizer.atexit = False                        # Nothing needs to be given back when the program ends.
+        return flat.reshape(shape)
+
+    def release(self, memory):
+        """
+        release: Puts memory back in the pool. Extra memory created while exhausted is thrown away.
+
+        Parameters:
+        :param memory: The bytearray that held the frame.
+        """
+        try:
+            self.freeMemory.put_nowait(memory)
+        except Full:
+            pass
+
+    def stats(self):
+        """ stats: Returns the counters of the pool to be put in the returned data."""
+        with self.statsLock:
+            return {self.name + ' Reuses': self.reused, self.name + ' Exhaustions': self.exhausted}
+
+
+class FrameRecord:
+    # Class Attributes
+    __slots__ = ('frame', 'width', 'height', 'fps', 'frameNumber', 'timestamp', 'file', 'save', 'startError',
+                 'saveFrame', 'processed', 'information', 'times')
+
+    def __init__(self, frame, width, height, fps, frameNumber, timestamp, file, save, startError=None):
+        """
+        FrameRecord: A frame and its information. One record is made when the frame is captured and the same record is
+                     passed by reference through every queue, so no stage has to unpack and repack the information.
+
+        Required Modules: time
+        Required Classes: None
+        Methods: stamp
+
+        Class Attributes
+        __slots__: The only attributes a record has, which keeps records small and quick to make.
+
+        Object Parameters & Attributes
+        Parameters:
+        :param frame: The raw frame, replaced by the converted frame once it has been converted.
+        :param width: Frame width in pixels.
+        :param height: Frame height in pixels.
+        :param fps: The capture speed of the camera.
+        :param frameNumber: The number of the frame since the capture started.
+        :param timestamp: The time the frame was captured.
+        :param file: The filename to save the frame as.
+        :param save: Whether the frame is being recorded.
+        :param startError: For the first frame of a synchronized recording, how many seconds after the scheduled start
+                           it was captured.
+
+        Attributes:
+        saveFrame: The full resolution converted frame for saving. It is the same as frame unless frames are processed
+                   at a smaller scale, and it is None for frames that cannot be saved.
+        processed: The frame after it has been processed.
+        information: Bit encoded information that was obtained from the processing.
+        times: A dictionary of when the frame finished each stage.
+        """
+        # Parameters
+        self.frame = frame
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.frameNumber = frameNumber
+        self.timestamp = timestamp
+        self.file = file
+        self.save = save
+        self.startError = startError
+
+        # Attributes
+        self.saveFrame = None
+        self.processed = None
+        self.information = None
+        self.times = {'captured': timestamp}
+
+    # Methods #
+    def stamp(self, stage, when=None):
+        """
+        stamp: Notes when the frame finished a stage.
+
+        Parameters:
+        :param stage: The name of the stage.
+        :param when: The time the stage finished, now by default.
+        """
+        self.times[stage] = when or time.time()
+
+
+class ControlSignal:
+    def __init__(self, name):
+        """
+        ControlSignal: An item put on a FrameQueue with putControl to tell the threads taking from it what to do, such
+                       as to stop. A FrameQueue never drops or inspects a control signal, and each kind of signal is
+                       one object so the threads tell it apart from frames by identity.
+
+        Required Modules: None
+        Required Classes: None
+        Methods: __repr__
+
+        Class Attributes
+        none
+
+        Object Parameters & Attributes
+        Parameters:
+        :param name: The name of the signal, used when it is printed.
+        """
+        # Parameters
+        self.name = name
+
+    # Methods #
+    def __repr__(self):
+        return 'ControlSignal(' + repr(self.name) + ')'
+
+
+class FrameQueue(Queue):
+    # Class Attributes
+    policies = ('block', 'drop oldest', 'drop newest', 'drop unsaved')
+    stopSignal = ControlSignal('Stop')                 # Tells the threads taking from a queue to stop.
+
+    def __init__(self, maxsize=0, policy='block', isRecorded=None, dropCallback=None):
+        """
+        FrameQueue: A queue of frames that can be bounded with a policy that decides what happens when it is full. The
+                    policies are:
+                    block: The producer waits until there is room.
+                    drop oldest: The oldest frame in the queue is thrown away to make room.
+                    drop newest: The frame being put on the queue is thrown away.
+                    drop unsaved: The oldest frame that is not being recorded is thrown away, or the new frame if it is
+                                  not being recorded. When every frame is being recorded the producer waits.
+
+        Required Modules: queue
+        Required Classes: ControlSignal
+        Methods: setLimit, put, putControl, __dropCandidate
+
+        Class Attributes
+        policies: The names of the policies that can be chosen.
+        stopSignal: The ControlSignal that tells the threads taking from a queue to stop.
+
+        Object Parameters & Attributes
+        Parameters:
+        :param maxsize: The most frames the queue holds, 0 is unbounded.
+        :param policy: What to do when the queue is full.
+        :param isRecorded: A function that returns whether a queued item is being recorded. By default it is the save
+                           flag of the FrameRecord.
+        :param dropCallback: A function that is given every item that is thrown away so it can be cleaned up.
+
+        Attributes:
+        dropped: The number of items that have been thrown away.
+        """
+        # Setup Parent Class Attributes
+        super().__init__(maxsize)
+
+        # Parameters
+        self.policy = None
+        self.isRecorded = isRecorded or (lambda record: record.save)
+        self.dropCallback = dropCallback
+
+        # Attributes
+        self.dropped = 0
+
+        # Initial Methods Executed
+        self.setLimit(maxsize, policy)
+
+    # Methods #
+    def setLimit(self, maxsize, policy='block'):
+        """
+        setLimit: Changes the size and the policy of the queue.
+
+        Parameters:
+        :param maxsize: The most frames the queue holds, 0 is unbounded.
+        :param policy: What to do when the queue is full.
+        """
+        if policy not in self.policies:
+            raise RuntimeError('There is no ' + str(policy) + ' queue policy.')
+        with self.mutex:
+            self.maxsize = maxsize
+            self.policy = policy
+            self.not_full.notify_all()                  # A bigger queue may have room for waiting producers.
+
+    def put(self, item, block=True, timeout=None):
+        """
+        put: Puts an item on the queue following the queue's policy when it is full.
+
+        Parameters:
+        :param item: The item to put on the queue.
+        :param block: Whether to wait for room when nothing can be dropped.
+        :param timeout: The most time to wait for room when nothing can be dropped.
+        """
+        if self.policy == 'block' or self.maxsize <= 0:
+            return super().put(item, block, timeout)
+        dropped = None
+        with self.not_full:
+            while self._qsize() >= self.maxsize:
+                index = self.__dropCandidate(item)
+                if index is None:                       # Nothing may be dropped so wait like a normal queue.
+                    if not block:
+                        raise Full
+                    self.not_full.wait(timeout)
+                    if timeout is not None and self._qsize() >= self.maxsize:
+                        raise Full
+                    continue
+                self.dropped += 1
+                if index < 0:                           # Drop the new item and leave the queue as it is.
+                    dropped = item
+                    break
+                dropped = self.queue[index]             # Remove a queued item that will never be taken.
+                del self.queue[index]
+                self.unfinished_tasks -= 1
+                if not self.unfinished_tasks:
+                    self.all_tasks_done.notify_all()
+            if dropped is not item:
+                self._put(item)
+                self.unfinished_tasks += 1
+                self.not_empty.notify()
+        if dropped is not None and self.dropCallback:   # Clean up outside of the lock.
+            self.dropCallback(dropped)
+
+    def putControl(self, signal):
+        """
+        putControl: Puts a ControlSignal on the queue. It is put even when the queue is full, so the threads taking
+                    from the queue get it without anyone waiting for room, and it is never dropped.
+
+        Parameters:
+        :param signal: The ControlSignal to put on the queue.
+        """
+        with self.mutex:
+            self._put(signal)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+
+    def __dropCandidate(self, item):
+        """
+        __dropCandidate: A private method that chooses what to drop from a full queue. Must be called with the lock.
+
+        Parameters:
+        :param item: The item being put on the queue.
+        :return: The index of the queued item to drop, -1 to drop the new item, or None to drop nothing.
+        """
+        if self.policy == 'drop newest':
+            return -1
+        # Drop oldest gives up the oldest frame and drop unsaved the oldest preview frame before any recorded frame.
+        for index, queued in enumerate(self.queue):
+            if isinstance(queued, ControlSignal):       # Control signals are never dropped or inspected.
+                continue
+            if self.policy == 'drop oldest' or not self.isRecorded(queued):
+                return index
+        if self.policy == 'drop oldest' or not self.isRecorded(item):
+            return -1
+        return None
+
+
+class PreTriggerBuffer:
+    def __init__(self, seconds=0, frames=0, memoryLimit=256*2**20):
+        """
+        PreTriggerBuffer: A ring of the most recent converted frames that were not recorded. When recording starts the
+                          ring is flushed to the savers so the recording includes the moments before it was started.
+
+        Required Modules: threading, math, collections
+        Required Classes: FrameRecord
+        Methods: isActive, setWindow, capacity, add, flush, firstNumber
+
+        Class Attributes
+        none
+
+        Object Parameters & Attributes
+        Parameters:
+        :param seconds: How many seconds before recording starts to keep.
+        :param frames: How many frames before recording starts to keep. The larger of the two windows is used.
+        :param memoryLimit: The most bytes of frames the ring may hold, which keeps it from taking memory that the live
+                            frames need. The window is shortened when the frames at the set resolution do not fit.
+
+        Attributes:
+        ring: The kept frames, oldest first.
+        lock: A lock that keeps frames from being added while the ring is flushed.
+        frameBytes: The size of the last kept frame.
+        fps: The frame rate of the last kept frame.
+        flushedFile: The file the ring was last flushed into, so it is only flushed once per recording.
+        flushedTime: The capture time of the frame that caused the last flush.
+        lastFlushed: The number of frames flushed for the last recording.
+        firstNumbers: The number of the first kept frame of each recording that was flushed.
+        """
+        # Parameters
+        self.seconds = seconds
+        self.frames = frames
+        self.memoryLimit = memoryLimit
+
+        # Attributes
+        self.ring = deque()
+        self.lock = threading.Lock()
+        self.frameBytes = 0
+        self.fps = 0
+        self.flushedFile = None
+        self.flushedTime = 0
+        self.lastFlushed = 0
+        self.firstNumbers = {}
+
+    # Methods #
+    def isActive(self):
+        """ isActive: Returns whether frames are being kept, so unrecorded frames must still be fully converted."""
+        return bool(self.seconds or self.frames)
+
+    def setWindow(self, seconds=None, frames=None, memoryLimit=None):
+        """
+        setWindow: Changes how much is kept before recording starts.
+
+        Parameters:
+        :param seconds: How many seconds before recording starts to keep.
+        :param frames: How many frames before recording starts to keep.
+        :param memoryLimit: The most bytes of frames the ring may hold.
+        """
+        with self.lock:
+            if seconds is not None:
+                self.seconds = seconds
+            if frames is not None:
+                self.frames = frames
+            if memoryLimit is not None:
+                self.memoryLimit = memoryLimit
+            while len(self.ring) > self.capacity():
+                self.ring.popleft()
+
+    def capacity(self):
+        """ capacity: Returns the number of frames the ring holds at the current resolution and frame rate."""
+        wanted = max(self.frames, math.ceil(self.seconds * self.fps))
+        if self.frameBytes:
+            wanted = min(wanted, self.memoryLimit // self.frameBytes)
+        return wanted
+
+    def add(self, record):
+        """
+        add: Keeps a frame that is not being recorded, the oldest frames are forgotten once the ring is full.
+
+        Parameters:
+        :param record: The FrameRecord of a converted frame.
+        """
+        if not self.isActive() or record.saveFrame is None:
+            return
+        # Keep a new record of the full frame so the ring does not hold the processed frame as well.
+        kept = FrameRecord(record.saveFrame, record.width, record.height, record.fps, record.frameNumber,
+                           record.timestamp, record.file, False)
+        kept.saveFrame = record.saveFrame
+        kept.times = dict(record.times)                     # Keep when it passed the stages before it was kept.
+        with self.lock:
+            if record.timestamp <= self.flushedTime:        # Frames from before the last flush arrived late.
+                return
+            self.fps = record.fps
+            self.frameBytes = getattr(record.saveFrame, 'nbytes', 0)
+            self.ring.append(kept)
+            while len(self.ring) > self.capacity():
+                self.ring.popleft()
+
+    def flush(self, record, send):
+        """
+        flush: Sends the kept frames to be saved the first time a frame of a new recording is seen. Must be called for
+               every recorded frame before it is sent to be saved so the kept frames are saved before it.
+
+        Parameters:
+        :param record: The FrameRecord of a recorded frame.
+        :param send: A function that sends a record to the savers.
+        """
+        with self.lock:
+            if record.file != self.flushedFile:
+                self.flushedFile = record.file
+                self.flushedTime = record.timestamp
+                kept = sorted((held for held in self.ring if held.timestamp < record.timestamp),
+                              key=lambda held: held.frameNumber)
+                self.ring.clear()
+                # Frames dropped before they were kept leave gaps, and the capture numbers each recording from 1, so
+                # number the kept frames in a row ending at 0 because the savers wait for frames in order. Recorded
+                # frames can reach here out of order, so the frame that starts the flush is not always frame 1.
+                for index, held in enumerate(kept):
+                    held.frameNumber = index - len(kept) + 1
+                    held.file = record.file
+                    held.save = True
+                    send(held)
+                self.lastFlushed = len(kept)
+                self.firstNumbers[record.file] = 1 - len(kept)
+            send(record)
+
+    def firstNumber(self, file):
+        """
+        firstNumber: Gives the number of the first frame of a recording, the first kept frame if the ring was flushed
+                     into it and otherwise 1, the first recorded frame.
+
+        Parameters:
+        :param file: The file of the recording.
+        :return: The frame number.
+        """
+        return self.firstNumbers.get(file, 1)
+
+
 class CameraCapture:
     def __init__(self):
         """
@@ -46,7 +650,7 @@ class CameraCapture:
         Required Modules: time, datetime, io, queue, threading
         Required Classes: None
         Methods: startCapture, endCapture, resetCapture, newFile, setDimFPS, waitUntil, mergeLocks, mergeCamParams,
-                 mergeReturnedData, __recorderTask
+                 mergeReturnedData, _releaseFrame, _markReset, _markFrame, __recorderTask
 
         Class Attributes
         none
@@ -63,11 +667,15 @@ class CameraCapture:
         fps: The capture speed of the camera.
         width: Frame width in pixels.
         height: Frame height in pixels.
-        frameStreamq: A queue to hold the raw frames to be processed.
+        frameStreamq: A queue to hold the raw frames to be processed. It can be bounded with frameStreamq.setLimit.
+        rawType: The image type of the frames put on the frame queue.
+        outputType: The image type the frames should be converted to.
 
         Threading and Timing:
         locks: The threading locks used by this object.
         camParams: The parameters for the camera.
+        resetParams: A list of the parameters that require the capture to restart, setting stopFrameCap.
+        hotParams: A list of the parameters that are applied to the running camera between frames, setting applyParams.
         returnedData: Information produced about the camera such as recoding state and frame rate.
         dimensionLock: A lock to prevent changing the resolution of the frame while the camera is capturing.
         sync: A synchronization event that causes the camera to start when the event is triggered.
@@ -75,6 +683,9 @@ class CameraCapture:
         record: An event that starts recording.
         continueRunning: An event that tells all the threads to stay alive and shutdown.
         recorderThread: A thread that controls whether the frames are being recorded/saved.
+        lastFrameTime: The time the last frame was captured.
+        resetFrom: The time of the last frame before the capture restarted, until a new frame is captured.
+        startTime: The time a synchronized recording was scheduled to start, until its first frame is captured.
         """
         # Naming
         self.fileList = ['']
@@ -86,16 +697,24 @@ class CameraCapture:
         self.fps = 10
         self.width = 640
         self.height = 480
-        self.frameStreamq = Queue()
+        self.frameStreamq = FrameQueue(dropCallback=self._releaseFrame)
+        self.rawType = 'BGR'
+        self.outputType = 'BGR'
 
         # Threading
         self.locks = {'paramLock': threading.Lock(), 'statsLock': threading.Lock(), 'stopFrameCap': threading.Event(),
-                      'startRecording': threading.Event(), 'stopRecording': threading.Event()}
+                      'applyParams': threading.Event(), 'startRecording': threading.Event(),
+                      'stopRecording': threading.Event()}
         self.camParams = {'Filename': 'Test_Trial', 'Set Start Record': False, 'Set Stop Record': False,
                           'Set Record': False, 'Sync Time': time.time(),
                           'Start Record Time': time.time(),
                           'End Record Time': time.time()}
-        self.returnedData = {'True Mode': 0, 'Is Recording': False}
+        self.resetParams = []
+        self.hotParams = []
+        self.returnedData = {'True Mode': 0, 'Is Recording': False, 'Reset Gap': 0, 'Start Error': 0}
+        self.lastFrameTime = None
+        self.resetFrom = None
+        self.startTime = None
         self.dimensionLock = threading.Lock()
         self.sync = threading.Event()
         self.syncRecord = threading.Event()
@@ -171,15 +790,28 @@ class CameraCapture:
             self.fps = fps  # Set FPS.
             self.height = height  # Set height.
 
-    def waitUntil(self, synctime, interrupt=threading.Event()):
+    def waitUntil(self, synctime, interrupt=threading.Event(), spinTime=0.005):
         """
-        waitUntil: Makes the processor wait until a certain time unless interrupted.
+        waitUntil: Makes the processor wait until a certain time unless interrupted. Sleeping can wake up late by the
+                   scheduler's jitter so it sleeps until shortly before the time and then checks the clock until the
+                   time is reached, which keeps synchronized starts on different computers within a millisecond.
 
         Parameters:
         :param synctime: The time to wait untill.
         :param interrupt: A threading event that will end the waiting if triggered.
+        :param spinTime: How many seconds before the time to stop sleeping and start checking the clock.
+        :return: How many seconds after the time the wait ended, or None if it was interrupted.
         """
-        interrupt.wait(timeout=synctime - time.time())
+        remaining = synctime - time.time()
+        if remaining > spinTime:                        # Sleep through most of the wait.
+            if interrupt.wait(timeout=remaining - spinTime):
+                return None
+        # The performance counter is used for the last moments since it is the finest clock.
+        deadline = time.perf_counter() + (synctime - time.time())
+        while time.perf_counter() < deadline:
+            if interrupt.is_set():
+                return None
+        return time.time() - synctime
 
     def mergeLocks(self, master):
         """
@@ -217,6 +849,43 @@ class CameraCapture:
                 master[key] = value
         self.returnedData = master
 
+    def _releaseFrame(self, record):
+        """
+        _releaseFrame: Gives the buffer of a frame that was dropped from the frame queue back to its pool.
+
+        Parameters:
+        :param record: The FrameRecord of the dropped frame.
+        """
+        if isinstance(record.frame, FrameBuffer):
+            record.frame.release()
+
+    def _markReset(self):
+        """ _markReset: Notes that the capture is restarting so the gap in frames it causes can be measured."""
+        self.resetFrom = self.lastFrameTime
+
+    def _markFrame(self, timestamp):
+        """
+        _markFrame: Notes when a frame was captured. The first frame after a restart reports the time since the last
+                    frame before it as the Reset Gap in milliseconds. The first frame of a synchronized recording
+                    reports how late it was captured as the Start Error in milliseconds.
+
+        Parameters:
+        :param timestamp: The time the frame was captured.
+        :return: The start error in seconds if this is the first frame of a synchronized recording, otherwise None.
+        """
+        startError = None
+        if self.resetFrom:
+            with self.locks['statsLock']:
+                self.returnedData['Reset Gap'] = (timestamp - self.resetFrom) * 1000
+            self.resetFrom = None
+        if self.startTime is not None:                      # The first frame of a synchronized recording.
+            startError = timestamp - self.startTime
+            with self.locks['statsLock']:
+                self.returnedData['Start Error'] = startError * 1000
+            self.startTime = None
+        self.lastFrameTime = timestamp
+        return startError
+
     def __recorderTask(self):
         """
         __recorderTask: A private method that continuously checks whether the camera should be capturing or not. The
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+benchmarkConversion.py
+
+Last Edited: 10/17/2026
+
+Lead Author[s]: agent
+Contributor[s]:
+
+
+Description:
+
+Compares the OpenCV YUV420p to BGR conversion used by ImageConverter against the floating point reference conversion.
+For several resolutions it checks that the pixels match within one and measures how many frames per second each can
+convert. The test frames are padded the same way the pi camera pads its YUV frames.
+
+Machine I/O
+input: none
+output: A table of the results printed to the console.
+
+User I/O
+input: Optionally the number of frames to convert at each resolution. (python3 benchmarkConversion.py 50)
+output: none
+
+"""
+###############################################################################
+
+
+########## Librarys, Imports, & Setup ##########
+
+# Default Libraries
+import sys
+import time
+
+# Downloaded Libraries
+import numpy
+import cv2
+
+# Custom Libraries
+import clientCapture
+
+########## Definitions ##########
+
+# Functions #
+
+def makeFrame(width, height):
+    """
+    makeFrame: Makes a padded YUV420p frame of a colorful pattern like the pi camera produces.
+
+    Parameters:
+    :param width: The width of the image in pixels.
+    :param height: The height of the image in pixels.
+    :return: The bytes of the frame.
+    """
+    fwidth = (width + 31) // 32 * 32
+    fheight = (height + 15) // 16 * 16
+    randomizer = numpy.random.default_rng(0)
+    rows, columns = numpy.indices((fheight, fwidth))
+    BGR = numpy.dstack(((columns * 255 // fwidth), (rows * 255 // fheight), ((rows + columns) % 256)))
+    BGR = (BGR + randomizer.integers(0, 32, BGR.shape)).clip(0, 255).astype(numpy.uint8)
+    return cv2.cvtColor(BGR, cv2.COLOR_BGR2YUV_I420).tobytes()
+
+
+def timeConversion(function, frame, width, height, count):
+    """
+    timeConversion: Measures how many frames a second a conversion can do.
+
+    Parameters:
+    :param function: The conversion method.
+    :param frame: The bytes of the frame.
+    :param width: The width of the image in pixels.
+    :param height: The height of the image in pixels.
+    :param count: The number of frames to convert.
+    :return: The frames per second.
+    """
+    start = time.perf_counter()
+    for index in range(count):
+        function(frame, width, height)
+    return count / (time.perf_counter() - start)
+
+
+def benchmark(resolutions=((320, 240), (640, 480), (1280, 720), (1920, 1080)), count=30):
+    """
+    benchmark: Checks and times the conversions at each resolution and prints the results.
+
+    Parameters:
+    :param resolutions: The resolutions to test.
+    :param count: The number of frames to convert at each resolution.
+    :return: True if every resolution matched within one.
+    """
+    converter = clientCapture.ImageConverter('YUV420', 'BGR')
+    matched = True
+    print('{:>10} {:>10} {:>12} {:>12} {:>12} {:>9}'.format('Resolution', 'Max Error', 'Within 1', 'OpenCV FPS',
+                                                              'Float FPS', 'Speed Up'))
+    for width, height in resolutions:
+        frame = makeFrame(width, height)
+        fast = converter.yuv420p2bgr(frame, width, height)
+        reference = converter.yuv420p2bgrFloat(frame, width, height)
+        error = numpy.abs(fast.astype(numpy.int16) - reference.astype(numpy.int16))
+        within = numpy.count_nonzero(error <= 1) / error.size
+        matched = matched and error.max() <= 1
+        fastFPS = timeConversion(converter.yuv420p2bgr, frame, width, height, count)
+        floatFPS = timeConversion(converter.yuv420p2bgrFloat, frame, width, height, max(count // 10, 1))
+        print('{:>10} {:>10} {:>11.4%} {:>12.1f} {:>12.1f} {:>8.1f}x'.format('{}x{}'.format(width, height),
+                                                                            error.max(), within, fastFPS, floatFPS,
+                                                                            fastFPS / floatFPS))
+    return matched
+
+
+########## Main ##########
+
+if __name__ == '__main__':
+    frameCount = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    if benchmark(count=frameCount):
+        print('The conversions match within one.')
+    else:
+        print('WARNING: The conversions differ by more than one!')
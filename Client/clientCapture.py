@@ -119,24 +119,44 @@ import sys
 import io
 import time
 import datetime
+import json
 import socket
 import struct
 import os
 import threading
-from queue import Queue
-from statistics import mean
+from queue import Queue, Empty
 
 # Downloaded Libraries
 import numpy
 import cv2
+try:
+    import h5py
+except ImportError:
+    h5py = None
+try:
+    import hdf5plugin                       # Adds the lz4 filter to h5py.
+except ImportError:
+    hdf5plugin = None
 
 # Custom Libraries
 import imageProcess
 import baseCapture
+import stageGraph
+import frameStats
+import timestampLog
+import savingBuffers
 try:
     import piCapture
 except:
     pass
+try:
+    import syntheticCapture
+except:
+    pass
+try:
+    import processCapture
+except:
+    pass
 
 
 ########## Definitions ##########
@@ -144,7 +164,7 @@ except:
 # Classes #
 
 class USBCameraCapture(baseCapture.CameraCapture):
-    def __init__(self,  cameraNumber=0):
+    def __init__(self,  cameraNumber=0, mono=False, bufferDepth=30):
         """
         USBCameraCapture: An object that interacts with a USB camera to capture frames.
 
@@ -159,6 +179,8 @@ class USBCameraCapture(baseCapture.CameraCapture):
         Object Parameters & Attributes
         Parameters:
         :param cameraNumber: The number of the camera that the object will use for capture.
+        :param mono: Whether the frames are converted to single channel grayscale for processing and saving.
+        :param bufferDepth: The number of frame arrays whose memory is kept and read into again.
 
         Attributes:
         File Naming:
@@ -168,6 +190,7 @@ class USBCameraCapture(baseCapture.CameraCapture):
 
         Frame Handling:
         frameList: An array of temporary buffers that store the raw frames after they come from the encoder.
+        framePool: A pool of the memory the camera reads frames into, which is reused once every holder drops a frame.
         fps: The capture speed of the camera.
         width: Frame width in pixels.
         height: Frame height in pixels.
@@ -177,6 +200,7 @@ class USBCameraCapture(baseCapture.CameraCapture):
         locks: The threading locks used by this object.
         camParams: The parameters for the camera.
         resetParams: A list of the parameters that require the camera to reset.
+        hotParams: A list of the parameters that are changed on the running camera without resetting it.
         returnedData: Information produced about the camera such as recoding state and frame rate.
         dimensionLock: A lock to prevent changing the resolution of the frame while the camera is capturing.
         sync: A synchronization event that causes the camera to start when the event is triggered.
@@ -191,10 +215,14 @@ class USBCameraCapture(baseCapture.CameraCapture):
 
         # Parameters
         self.cameraNumber = cameraNumber
+        if mono:
+            self.outputType = 'GRAY'
 
         # Attributes
+        self.framePool = baseCapture.FrameArrayPool(depth=bufferDepth)
         self.camParams.update({'X Resolution': 640, 'Y Resolution': 480, 'FPS': 30, 'Expo Comp': 0})
-        self.resetParams = ['X Resolution', 'Y Resolution', 'FPS', 'Expo Comp']
+        self.resetParams = ['X Resolution', 'Y Resolution', 'FPS']
+        self.hotParams = ['Expo Comp']
         self.captureTask = self.__captureTask
         self.captureThread = threading.Thread(target=self.captureTask)
 
@@ -208,6 +236,7 @@ class USBCameraCapture(baseCapture.CameraCapture):
         self.camera = cv2.VideoCapture(self.cameraNumber)   # Sets the camera that creates the frames
         while self.continueRunning.is_set():
             self.locks['stopFrameCap'].clear()              # Clear the stop capture event.
+            self._markReset()                               # Measure how long the restart takes.
             self.frameNumber = 0                            # Clear the frame numbering system.
 
             with self.locks['paramLock']:
@@ -219,12 +248,14 @@ class USBCameraCapture(baseCapture.CameraCapture):
                                self.camParams['FPS'])
                 # Set a synchronization time to start the capture time at.
                 synctime = self.camParams['Sync Time']
+            shape = (self.height, self.width, 3)
 
             # Setup the Capture Timing
             if self.syncRecord.is_set():                    # If recording at sync time then:
                 self.syncRecord.clear()                     # Reset sync recording for next time.
                 self.record.set()                           # Set to record immediately when capturing.
                 print('Recording ' + self.fileList[-1])     # Notify recording the new file.
+                self.startTime = synctime                   # Measure how close to the time the recording starts.
                 self.waitUntil(synctime)                    # Wait until sync time.
             elif self.sync.is_set():                        # When synchronizing capture times then:
                 self.sync.clear()                           # Clear sync for next time.
@@ -232,25 +263,43 @@ class USBCameraCapture(baseCapture.CameraCapture):
 
             # Set up the infinite capture loop.
             while (not self.locks['stopFrameCap'].is_set()) and self.continueRunning.is_set():
-                ret, img = self.camera.read()
+                if self.locks['applyParams'].is_set():      # Change the exposure between frames without a restart.
+                    self.locks['applyParams'].clear()
+                    with self.locks['paramLock']:
+                        self.camera.set(15, self.camParams['Expo Comp'])
+                # Read straight into pooled memory, the array then is the frame all the way to the first consumer.
+                ret, img = self.camera.read(image=self.framePool.acquire(shape))
+                if ret and img.shape != shape:              # The camera chose another size so read into that size.
+                    shape = img.shape
                 self.frameNumber += 1                       # When done increase the number of frames captured
+                timestamp = time.time()
+                startError = self._markFrame(timestamp)
                 # Put the frame on the queue with its information. The are some unsafe interactions for speed, be careful!
-                # [Frame, width, height, FPS, frame number, current time, filename to save as, whether to save or not]
-                self.frameStreamq.put([img, self.width, self.height, self.fps,
-                                       self.frameNumber, time.time(), self.fileList[-1], self.record.is_set()])
+                # (Frame, width, height, FPS, frame number, current time, filename to save as, whether to save or not)
+                self.frameStreamq.put(baseCapture.FrameRecord(img, self.width, self.height, self.fps,
+                                                              self.frameNumber, timestamp, self.fileList[-1],
+                                                              self.record.is_set(), startError))
+                if not self.frameNumber % max(int(self.fps), 1):  # About once a second update the pool statistics.
+                    with self.locks['statsLock']:
+                        self.returnedData.update(self.framePool.stats())
         # When finished release the camera.
         self.camera.release()
 
 
 class FrameManager:
-    def __init__(self, frameType='jpeg', clientSocket=None, rawFrameq=Queue(), rawThreadCount=1, directory=os.getcwd()):
+    def __init__(self, frameType='jpeg', clientSocket=None, rawFrameq=baseCapture.FrameQueue(), rawThreadCount=1,
+                 directory=os.getcwd(), queueSettings=None, outputType='BGR', preTriggerSeconds=0, preTriggerFrames=0,
+                 preTriggerMemory=256*2**20, processScale=1, poolDepth=120, threadBounds=None, loadShedding=False,
+                 traceEvery=0, saveType='video', hdf5Filter=None, timestampType='timestamp'):
         """
         FrameManager: An object that accepts frames, processes them, and saves them.
 
-        Required Modules: queue, threading, imageProcess
-        Required Classes: ImageConverter, SavingThread, ImageProcess, ImageProcessor, ImageStreamer
-        Methods: startManagement, endManagement, restartManagement, findAverageTime, connect2Server, mergeLocks,
-                 mergeCamParam, mergeReturnedData, mergeProcessParams, __getRawTask, __copyProTask, __statsTask
+        Required Modules: queue, threading, imageProcess, stageGraph, frameStats
+        Required Classes: ImageConverter, SavingThread, ImageProcess, ImageProcessor, ImageStreamer, StageGraph,
+                          StageScaler, LoadShedder, StatsEngine, FrameTracer
+        Methods: startManagement, endManagement, restartManagement, connect2Server, frameQueues, setQueueLimits,
+                 queueDrops, savingMissing, mergeLocks, mergeCamParam, mergeReturnedData, mergeProcessParams,
+                 __buildGraph, __addStreamStage, __prepareRawFrame, __sendRawToSavers, __dispatchProcessed, __statsTask
 
         Class Attributes
         none:
@@ -258,13 +307,52 @@ class FrameManager:
         Object Parameters & Attributes
         Parameters:
         :param frameType: The encoding of the raw frames.
+        :param outputType: The image type the raw frames are converted to for processing and saving, BGR or GRAY.
         :param clientSocket: An optional socket to stream processed frames to.
         :param rawFrameq: A queue where the raw frames are being supplied.
         :param rawThreadCount: The number of threads converting the raw frame into an open CV object.
         :param directory: The directory to store the produced files in.
+        :param queueSettings: A dictionary of stage names with a tuple of the most frames the stage's queue holds and
+                              the policy when it is full. The stages are Raw Frame, Processing, Raw Save, Processed
+                              Save, Timestamp Save, Process Info Save, and Stream. Unlisted queues are not bounded.
+                              For example: {'Raw Frame': (120, 'drop unsaved'), 'Stream': (4, 'drop oldest')}
+        :param preTriggerSeconds: How many seconds of frames from before recording starts to add to the recording.
+        :param preTriggerFrames: How many frames from before recording starts to add, the larger window is used.
+        :param preTriggerMemory: The most bytes of converted frames kept for the pre-trigger window.
+        :param processScale: How many times smaller the frames are for processing and streaming, 1, 2, 4, or 8. JPEG
+                             frames are decoded at the smaller size and only recorded frames are decoded in full.
+        :param poolDepth: The number of full size converted frames whose memory is kept for reuse.
+        :param threadBounds: An optional dictionary of stage names with a tuple of the fewest and most worker threads
+                             the stage may have, so threads are added when it falls behind and retired when it is idle.
+                             For example: {'Raw Frame': (2, 6), 'Processing': (1, 4)}
+        :param loadShedding: Whether to lower the quality of the live processing and stream when the processed delay
+                             keeps growing. The decisions are logged to LoadShedding.txt in the directory.
+        :param traceEvery: One of every this many recorded frames has when it passed each stage written to a Chrome
+                           trace-event file next to the recording, none when 0.
+        :param saveType: How the raw and processed frames are saved, 'video' for AVI files, 'segmented' for AVI files
+                         split into segments that are encoded at the same time and listed in a manifest, 'hdf5' for
+                         one HDF5 file per recording with a raw and a processed group that also hold the frame
+                         numbers, timestamps, and for processed frames the information, so no timestamp or process
+                         information files are written, or 'raw' for unencoded memory-mapped files with a JSON header
+                         that can be compressed later.
+        :param hdf5Filter: The compression filter of the HDF5 files, 'gzip', 'lzf', 'lz4', or None.
+        :param timestampType: How the timestamps are saved, 'timestamp' for text lines, or 'binarytimestamp' for fixed
+                              width binary records that timestampLog reads and converts to text lines.
 
         Attributes:
         statsq: A queue of the statistical information of each frame.
+        queueSettings: The sizes and policies of the bounded queues.
+        preTrigger: A ring of the latest unrecorded frames which is saved when recording starts.
+        processScale: How many times smaller the frames are for processing and streaming.
+        framePool: A pool of the memory that full size frames are converted into.
+        scaler: An object that changes the number of worker threads of the stages within their bounds, or None.
+        shedder: An object that decides which unrecorded frames are not processed or streamed when overloaded, or None.
+        tracer: An object that writes the stage timestamps of a sample of the recorded frames to a trace file.
+        graph: The stages the frames flow through. The raw frames are converted by the Raw Frame stage and sent to the
+               Processing stage and, when recorded, the Recording junction which sends them to the Raw Save and
+               Timestamp Save stages. Processed frames are sent to the Stream stage and, when recorded, the Processed
+               Save and Process Info Save stages. Stages can be added or removed before management starts, for
+               example graph.removeStage('Processed Save') skips saving the processed video.
 
         Objects:
         frameConverter: An object that converts a frame of one type to another.
@@ -281,8 +369,6 @@ class FrameManager:
         processParams: A dictionary of the parameters needed for processing a frame.
         rawThreadCount: The number of threads used to prepare raw frames to be saved and processed.
         continueRunning: An event that tells all the threads to stay alive and shutdown.
-        getRawThreadList: A list of threads used tp prepare raw frames to be saved and processed.
-        proCopyThread: A thread that prepares processed frames to be saved and streamed.
         statsThread: A thread used to collect the statics on the frame management process.
         """
         # Parameters
@@ -291,12 +377,23 @@ class FrameManager:
 
         # Attributes
         self.statsq = Queue()
+        self.queueSettings = queueSettings or {}
+        self.preTrigger = baseCapture.PreTriggerBuffer(preTriggerSeconds, preTriggerFrames, preTriggerMemory)
+        self.processScale = processScale
+        self.framePool = baseCapture.FrameArrayPool(depth=poolDepth, name='Converted')
+        self.shedder = LoadShedder(os.path.join(directory, 'LoadShedding.txt')) if loadShedding else None
+        self.tracer = frameStats.FrameTracer(traceEvery)
         # Objects
-        self.frameConverter = ImageConverter(frameType, 'BGR')
-        self.rawSaver = SavingThread('video', directory=directory)
-        self.processedSaver = SavingThread('video', directory=directory)
-        self.timestampSaver = SavingThread('timestamp', directory=directory)
-        self.processInfoSaver = SavingThread('processinfo', directory=directory)
+        self.frameConverter = ImageConverter(frameType, outputType)
+        encoder = hdf5Filter if saveType == 'hdf5' else None
+        self.rawSaver = SavingThread(saveType, encoder=encoder, directory=directory, fileSuffix='Raw',
+                                     frameField='saveFrame', poolDepth=poolDepth)
+        self.processedSaver = SavingThread(saveType, encoder=encoder, directory=directory, fileSuffix='Processed',
+                                           frameField='processed', poolDepth=poolDepth)
+        self.timestampSaver = SavingThread(timestampType, directory=directory, fileSuffix='Timestamps')
+        self.processInfoSaver = SavingThread('processinfo', directory=directory, fileSuffix='ProcessInfo')
+        for saver in (self.rawSaver, self.timestampSaver):  # These are also sent the pre-trigger frames.
+            saver.firstNumber = self.preTrigger.firstNumber
         self.imageProcess = imageProcess.ImageProcess()
         self.processor = ImageProcessor(self.imageProcess.blankProcess, threadCount=2)
         if clientSocket:                                    # Create a VideoStreamer object if there was a socket.
@@ -308,13 +405,20 @@ class FrameManager:
                       'sendFrames': threading.Event()}
         self.returnedData = {'True Frame Rate': 0, 'Raw Frame Delay': 0, 'Processed Frame Delay':0}
         self.camParams = {'FPS': 30}
+        self.rawThreadCount = rawThreadCount
+        self.graph = stageGraph.StageGraph()
+        self.__buildGraph()
+        self.scaler = stageGraph.StageScaler(self.graph, threadBounds) if threadBounds else None
+        self.setQueueLimits(self.queueSettings)             # Bound the queues and report their dropped frames.
+        self.returnedData.update(self.queueDrops())
+        self.returnedData['Pre-Trigger Frames'] = 0
+        self.returnedData['Load Shedding Level'] = 0
+        self.returnedData.update(self.framePool.stats())
+        self.returnedData.update(self.graph.stats())
+        if self.scaler:
+            self.returnedData.update(self.scaler.stats())
         self.processParams = self.imageProcess.parameters
         self.continueRunning = threading.Event()
-        self.rawThreadCount = rawThreadCount
-        self.getRawThreadList = []
-        for worker in range(self.rawThreadCount):           # Create the number of raw manager threads.
-            self.getRawThreadList.append(threading.Thread(target=self.__getRawTask))
-        self.proCopyThread = threading.Thread(target=self.__copyProTask)
         self.statsThread = threading.Thread(target=self.__statsTask)
 
     # Methods #
@@ -323,19 +427,10 @@ class FrameManager:
         # Set threads to stay alive
         self.continueRunning.set()
 
-        # Start Objects' Threads
-        self.rawSaver.startSaving()
-        self.processedSaver.startSaving()
-        self.timestampSaver.startSaving()
-        self.processInfoSaver.startSaving()
-        self.processor.startProcessing()
-        if self.clientSocket:                       # Start streamer if there is a socket.
-            self.streamer.startStreaming()
-
-        # Start Management Threads
-        for worker in range(self.rawThreadCount):   # Start all raw manager threads.
-            self.getRawThreadList[worker].start()
-        self.proCopyThread.start()
+        # Start every stage, the savers and streamer first so they are ready for frames.
+        self.graph.startGraph()
+        if self.scaler:                             # Scale the stages once they are running.
+            self.scaler.startScaling()
         self.statsThread.start()
         print('Frame Management Started')           # Print that Management has started.
 
@@ -345,32 +440,17 @@ class FrameManager:
         self.rawFrameq.join()                       # Wait until there are no new raw frames.
         self.continueRunning.clear()                # Set all threads to shutdown.
 
-        # End raw frame preparing threads.
-        for worker in range(self.rawThreadCount):   # Put blank data into rawFrameq to unblock threads.
-            self.rawFrameq.put([None, None, None, None, None, None, None, None])
-        for worker in range(self.rawThreadCount):   # Wait for all raw frame manager threads to shutdown.
-            self.getRawThreadList[worker].join()
-        self.getRawThreadList.clear()
-
-        # End raw video saver thread.
-        self.rawSaver.endSaving()
-        # End processing thread.
-        self.processor.endProcessing()
-        self.processor.processedq.join()
-        self.processor.processedq.put([None, None, None, None, None, None, None, None, None])
-        # End processed frame manager.
-        self.proCopyThread.join()
-        # End saving processed video, timestamps, and processed info.
-        self.processedSaver.endSaving()
-        self.timestampSaver.endSaving()
-        self.processInfoSaver.endSaving()
+        # Stop scaling then end every stage once the stages before it have ended and its frames have been handled.
+        if self.scaler:
+            self.scaler.endScaling()
+        self.graph.endGraph()
         # End Stats Thread.
         self.statsq.put(None)
         self.statsThread.join()
+        self.tracer.dumpAll()                       # Every frame has finished so write the last traces.
 
-        # End streaming thread if it exists
+        # Tell the server the stream has ended if there is one.
         if self.clientSocket:
-            self.streamer.endStreaming()
             with self.locks['connection_lock']:
                 self.clientSocket.write(struct.pack('<L', 0))   # Tell the server we are done streaming.
         print('Frame Management Ended')             # Print that the manager has shutdown.
@@ -387,58 +467,21 @@ class FrameManager:
                 self.clientSocket = clientSocket        # Replace the with one.
                 if not self.streamer:                   # If there no streamer create one.
                     self.streamer = VideoStreamer(clientSocket, threadCount=2)
-            # Reset Objects' Threads
-            self.rawSaver.resetSaving()
-            self.processedSaver.resetSaving()
-            self.timestampSaver.resetSaving()
-            self.processInfoSaver.resetSaving()
-            self.processor.resetProcessing()
-            if self.streamer:                           # If there was streamer then restart it.
-                self.streamer.resetStreaming(clientSocket=self.clientSocket)
-            # Reset management threads.
-            for worker in range(self.rawThreadCount):  # Create the number of raw manager threads.
-                self.getRawThreadList.append(threading.Thread(target=self.__getRawTask))
-            self.proCopyThread = threading.Thread(target=self.__copyProTask)
+                    self.__addStreamStage()
+                    self.setQueueLimits(self.queueSettings)
+                else:
+                    self.streamer.setServer(clientSocket)
+            # Restart every stage and the stats thread.
             self.statsThread = threading.Thread(target=self.__statsTask)
             self.continueRunning.set()                  # Set threads to stay alive.
             self.statsThread.start()                    # Start the stats thread.
-            for worker in range(self.rawThreadCount):   # Start the raw frame manager threads.
-                self.getRawThreadList[worker].start()
-            self.proCopyThread.start()                  # Start the processed frame manager thread.
+            self.graph.startGraph()
+            if self.scaler:
+                self.scaler.startScaling()
             print('Frame Management Restarted')
         else:
             print('Reset Failed: Close Down Frame Management Before Resetting!')
 
-    def findAverageTime(self, times, delay=True):
-        """
-        findAverageTime: Calculates the average FPS based on a list of timestamps.
-
-        Parameters:
-        :param time: List of times between each frame.
-        :param delay: Calculates the average delay of capturing a frame to finishing processing the frame.
-        :return: Either delay of a frame from capture to finished processing or the average FPS.
-        """
-        # Setup
-        previoustime = 0                                     # The previous frame's timestamp.
-        total = 0                                            # The total time of all frames. Either delay or FPS.
-        # Repetitive Math
-        for fstats in times:                                 # For all entries in the frames' timestamps.
-            if delay:                                        # If the delay was selected:
-                total += fstats[2]                           # Add the timestamp representing the delay time to total.
-            else:                                            # If average FPS is desired:
-                if previoustime:                             # And there was a previous frame
-                    total += 1 / (fstats[1] - previoustime)  # Then add the frame rate between each frame to total.
-                previoustime = fstats[1]                     # Set the current frame's timestamp to the previous one.
-        # Divide the total by number of entries in list.
-        if delay:
-            return total / max(len(times), 1)
-        else:
-            return total / max(len(times) - 1, 1)            # Since fps is the time between frames there is one less.
-
-    def findSlope(self, xs, ys):
-        m = (mean(xs)*mean(ys)-mean(xs*ys))/(mean(xs)**2-mean(xs**2))
-        return m
-
     def connect2Server(self, clientSocket):
         """
         connect2Server: Tells the streamer to connect a server or creates a streamer if it does not exist.
@@ -450,6 +493,39 @@ class FrameManager:
             self.streamer.setServer(clientSocket)                       # Sets the server for the streamer.
         else:
             self.streamer = VideoStreamer(clientSocket, threadCount=2)  # Creates a streamer with assigned server.
+            self.__addStreamStage()
+            self.setQueueLimits(self.queueSettings)
+
+    def frameQueues(self):
+        """
+        frameQueues: Gathers the queues that frames pass through.
+
+        :return: A dictionary of the queues by name.
+        """
+        return self.graph.queues()
+
+    def setQueueLimits(self, queueSettings):
+        """
+        setQueueLimits: Bounds the queues and sets what they do when they are full.
+
+        Parameters:
+        :param queueSettings: A dictionary of queue names with a tuple of the most frames the queue holds and the
+                              policy when it is full.
+        """
+        self.queueSettings = queueSettings
+        queues = self.frameQueues()
+        for name, (maxsize, policy) in queueSettings.items():
+            if name in queues and hasattr(queues[name], 'setLimit'):
+                queues[name].setLimit(maxsize, policy)
+
+    def queueDrops(self):
+        """ queueDrops: Returns the number of frames each queue has dropped to be put in the returned data."""
+        return {name + ' Drops': getattr(queue, 'dropped', 0) for name, queue in self.frameQueues().items()}
+
+    def savingMissing(self):
+        """ savingMissing: Returns the number of frames each saver gave up waiting for to be put in the returned data."""
+        savers = (self.rawSaver, self.timestampSaver, self.processedSaver, self.processInfoSaver)
+        return {saver.reorder.name + ' Missing': saver.reorder.missingCount for saver in savers}
 
     def mergeLocks(self, master):
         """
@@ -499,67 +575,117 @@ class FrameManager:
                 master[key] = value
         self.processParams = master
 
-    def __getRawTask(self):
-        """
-        __getRawTask: A thread task that takes a frame and its information from the raw frame queue and prepares it to
-                     be saved and processed.
-        """
-        while self.continueRunning.is_set():            # Keep the thread running while true.
-            # Get a raw frame and its information from the raw frame queue.
-            frameStream, width, height, fps, frameNumber, timestamp, file, save = self.rawFrameq.get()
-            # If it was something then do this:  (Since .get() is blocking, Nones are loaded into the queue to unblock)
-            if frameStream is not None:
-                # If the frame stream is a buffer "get" it.
-                if isinstance(frameStream, type(io.BytesIO())):
-                    frameStream = frameStream.getbuffer()
-                # Convert the frame from a certain type to an OpenCV object, an BGR file.
-                frameBGR = self.frameConverter.convert(frameStream, width, height)
-                # Send the frame to be processed.
-                self.processor.processingq.put([frameBGR, width, height, fps, frameNumber, timestamp, file, save])
-
-                # If the frame is to be saved. (Recording was on when the frame was captured):
-                if save:
-                    # Send raw frame be saved.
-                    rawfile = file + 'Raw'              # Add an extra bit to filename to note this is a raw frame.
-                    self.rawSaver.frameSaveq.put([frameBGR, width, height, fps, frameNumber, rawfile])
-                    # Send timestamp to be saved.
-                    timefile = file + 'Timestamps'      # Add an extra bit to filename to note this is a timestamp.
-                    self.timestampSaver.frameSaveq.put([timestamp, width, height, fps, frameNumber, timefile])
-                # frameStream.close()                     # Close the bytestream object to free up memory.
-                # Send statistical information to the stats thread via queue.
-                self.statsq.put(['Raw', frameNumber, time.time(), timestamp])
-            # Regardless if the information was a frame or not.
-            self.rawFrameq.task_done()                  # Tell the queue we are done with the given information.
-
-    def __copyProTask(self):
-        """
-        __copyProTask: A thread task that takes a frame and its information from the processed frame queue and prepares
-                       it to be saved and streamed.
-        """
-        # Keep the thread running while there are things to be processed or when told to live.
-        while self.continueRunning.is_set() or self.processor.isAlive() or self.processor.hasProcessed():
-            # Get a processed frame and its information from the raw frame queue.
-            frameBGRnpa, width, height, fps, frameNumber, timestamp, information, file, save = self.processor.processedq.get()
-
-            # If it was something the do this:  (Since it is a blocking, Nones are loaded into the queue to unblock)
-            if frameNumber:
-                # If streamer is present and told to stream then send frame to streamer.
-                if self.locks['sendFrames'].is_set() and self.streamer:
-                    self.streamer.sendFrameq.put([frameBGRnpa, frameNumber])
-
-                # If the frame is to be saved. (Recording was on when the frame was captured):
-                if save:
-                    # Send processed frame be saved.
-                    profile = file + 'Processed'        # Add an extra bit to filename to note this is a processed frame
-                    self.processedSaver.frameSaveq.put([frameBGRnpa, width, height, fps, frameNumber, profile])
-                    # Send processed frame information to be saved.
-                    proInfofile = file + 'ProcessInfo'  # Add an extra bit to filename to note this is a processed info.
-                    self.processInfoSaver.frameSaveq.put([information, width, height, frameNumber, timestamp, proInfofile])
-                # Send statistical information to the stats thread via queue.
-                self.statsq.put(['Pro', frameNumber, time.time(), timestamp])
+    def __buildGraph(self):
+        """
+        __buildGraph: A private method that creates the stages the frames flow through and the edges between them.
+        """
+        graph = self.graph
+        # Stages with a task are run by the graph, the savers and streamer empty their queues with their own threads.
+        graph.addStage('Raw Frame', self.__prepareRawFrame, self.rawThreadCount, inputq=self.rawFrameq)
+        graph.addStage('Processing', self.__dispatchProcessed, self.processor.threadCount)
+        graph.addStage('Recording')                     # A junction for the raw frames that are saved.
+        savers = [('Raw Save', self.rawSaver, 'Recording', 'converted'),
+                  ('Processed Save', self.processedSaver, 'Processing', 'dispatched')]
+        if self.rawSaver.saveType != 'hdf5':            # The HDF5 file already holds the timestamps and information.
+            savers += [('Timestamp Save', self.timestampSaver, 'Recording', 'converted'),
+                       ('Process Info Save', self.processInfoSaver, 'Processing', 'dispatched')]
+        for name, saver, source, previous in savers:
+            graph.addStage(name, inputq=saver.frameSaveq, start=saver.startSaving, end=saver.endSaving,
+                           restart=saver.resetSaving)
+            self.tracer.addSpan(saver.stampName, previous, 'Write ' + saver.name, 'SavingThread ' + saver.name)
+        # Every frame is processed unless it is shed, the recorded frames are also saved.
+        graph.connect('Raw Frame', 'Processing',
+                      lambda record: not (self.shedder and self.shedder.skipProcessing(record)))
+        # Recorded frames are sent to the junction through the pre-trigger buffer, so the savers end after the Raw
+        # Frame stage.
+        graph.addDependency('Raw Frame', 'Recording')
+        for name, saver, source, previous in savers:
+            graph.connect(source, name, None if source == 'Recording' else lambda record: record.save)
+        if self.streamer:
+            self.__addStreamStage()
 
-            # Regardless if the information was a frame or not.
-            self.processor.processedq.task_done()       # Tell the queue we are done with the given information.
+    def __addStreamStage(self):
+        """
+        __addStreamStage: A private method that adds the streamer to the graph, processed frames are only streamed while
+                          the server asks for them. The graph starts the streamer when it is added while running.
+        """
+        streamer = self.streamer
+        self.graph.addStage('Stream', inputq=streamer.sendFrameq, start=streamer.startStreaming,
+                            end=streamer.endStreaming, restart=streamer.resetStreaming)
+        self.graph.connect('Processing', 'Stream', lambda record: self.locks['sendFrames'].is_set() and
+                           not (self.shedder and self.shedder.skipStream(record)))
+        self.tracer.addSpan('sent', 'dispatched', 'Send', 'VideoStreamer')
+
+    def __prepareRawFrame(self, record):
+        """
+        __prepareRawFrame: A private method run by the Raw Frame stage that converts a raw frame so it can be processed
+                           and sends it to be saved when it is recorded.
+
+        Parameters:
+        :param record: The FrameRecord of the raw frame.
+        :return: The FrameRecord with its converted frame, to be processed.
+        """
+        record.stamp('dequeued')
+        # If the frame stream is a buffer "get" it.
+        frameStream = record.frame
+        rawBuffer = None
+        if isinstance(frameStream, (io.BytesIO, baseCapture.FrameBuffer)):
+            rawBuffer = frameStream
+            frameStream = frameStream.getbuffer()
+        # Convert the frame from a certain type to an OpenCV object, an BGR file.
+        # Only frames that may be saved are converted in full, the rest only at the processing scale.
+        # Full size frames are converted into pooled memory that is reused once every holder drops the frame.
+        # When shedding load unrecorded frames may be processed even smaller.
+        scale = self.processScale * (self.shedder.scale(record) if self.shedder else 1)
+        if scale == 1 or record.save or self.preTrigger.isActive():
+            shape = self.frameConverter.outputShape(record.width, record.height)
+            out = self.framePool.acquire(shape) if shape else None
+            record.saveFrame = self.frameConverter.convert(frameStream, record.width, record.height, out=out)
+            del out
+        if scale == 1:
+            record.frame = record.saveFrame
+        else:
+            record.frame = self.frameConverter.convert(frameStream, record.width, record.height, scale)
+        record.stamp('converted')
+        # Once converted the raw frame is no longer needed so give its buffer back to the capture pool.
+        if isinstance(rawBuffer, baseCapture.FrameBuffer):
+            del frameStream
+            rawBuffer.release()
+
+        # If the frame is to be saved. (Recording was on when the frame was captured):
+        if record.save:
+            # The frames kept from before recording started are saved first.
+            self.preTrigger.flush(record, self.__sendRawToSavers)
+        else:
+            self.preTrigger.add(record)                 # Keep the frame in case recording starts soon.
+        # Send statistical information to the stats thread via queue.
+        self.statsq.put(('Raw', record))
+        return record
+
+    def __sendRawToSavers(self, record):
+        """
+        __sendRawToSavers: Sends a raw frame and its timestamp to be saved through the Recording junction.
+
+        Parameters:
+        :param record: The FrameRecord of the frame.
+        """
+        self.tracer.collect(record)
+        self.graph.send('Recording', record)
+
+    def __dispatchProcessed(self, record):
+        """
+        __dispatchProcessed: A private method run by the Processing stage that processes a frame before it is sent to
+                             be saved and streamed.
+
+        Parameters:
+        :param record: The FrameRecord of the converted frame.
+        :return: The FrameRecord with its processed frame and information.
+        """
+        record = self.processor.process(record)
+        # Send statistical information to the stats thread via queue.
+        record.stamp('dispatched')
+        self.statsq.put(('Pro', record))
+        return record
 
     def __statsTask(self):
         """
@@ -567,75 +693,201 @@ class FrameManager:
         """
         # Setup
         start = time.time()+10                                      # Sets the next time to calculate FPS and delay.
-        trueFPS = []                                                # The list of frames' timestamp.
-        rawTimes = []                                               # Timestamps from raw frames.
-        proTimes = []                                               # Timestamps from processed frames.
-        averfps = 0                                                 # Average FPS.
+        # The delays are kept as running statistics so each frame costs the same and nothing is sorted.
+        engine = frameStats.StatsEngine(('Raw Frame', 'Processing', 'Processed Frame'))
 
         while self.continueRunning.is_set():                        # Continuously do this while alive:
             stats = self.statsq.get()                               # Get stats from other threads.
             if stats:                                               # There are stats:
                 # Get timestamp information.
-                if stats[0] == 'Raw':                               # If from raw frame:
-                    # Put raw timestamp information into a list with:
-                    # [frame number, time finishing raw management, delay from capture to finishing raw management]
-                    rawTimes.append([stats[1], stats[2], stats[2]-stats[3]])
-                    # Put raw FPS information into a list with:
-                    # [frame number, time of frame capture]
-                    trueFPS.append([stats[1], stats[3]])
+                stage, record = stats
+                times = record.times
+                if stage == 'Raw':                                  # If from raw frame:
+                    # Count the frame for the FPS and add the delay from capture to finishing raw management.
+                    engine.addFrame(record.timestamp)
+                    engine.add('Raw Frame', record.timestamp, times['converted']-record.timestamp)
                 else:                                               # If from processed frame:
-                    # Put processed timestamp information into a list with:
-                    # [frame number, time finishing pro management, delay from capture to finishing pro management]
-                    proTimes.append([stats[1], stats[2], stats[2]-stats[3]])
+                    # Add the time spent processing and the delay from capture to finishing pro management.
+                    if 'processed' in times:
+                        engine.add('Processing', record.timestamp, times['processed']-times['converted'])
+                    engine.add('Processed Frame', record.timestamp, times['dispatched']-record.timestamp)
 
-                # Every now and then calculate FPS and delay.
+                # Every now and then report the FPS and delay.
                 if time.time() > start:                             # Once 10 seconds have passed:
                     with self.locks['paramLock']:
                         fps = self.camParams['FPS']
-                    # Sort the timestamps by frame order.
-                    trueFPS.sort(key=lambda times: times[0])
-                    rawTimes.sort(key=lambda times: times[0])
-                    proTimes.sort(key=lambda times: times[0])
-
-                    # Calculate FPS if there is more than one frame timestamp.
-                    if len(trueFPS) > 1:
-                        averfps = self.findAverageTime(trueFPS, delay=False)
+                    averfps = engine.frameRate()
                     # Check if the FPS is correct.
-                    if averfps < averfps-2:
+                    if averfps and averfps < fps-2:
                         print('WARNING: True FPS is {:}fps which is lower than expected!'.format(averfps))
                     elif averfps > fps+5:
                         print('WARNING: True FPS is {:}fps which is higher than expected!'.format(averfps))
                     # Check if the Delays are stable.
-                    if len(rawTimes) > 1:
-                        rawFrameTotal = numpy.array([x for x in range(len(rawTimes))], dtype=numpy.float64)
-                        rawDelays = numpy.array([rawTimes[y][2]*1000 for y in range(len(rawTimes))], dtype=numpy.float64)
-                        averRawDelay = mean(rawDelays)
-                        rawSlope = self.findSlope(rawFrameTotal, rawDelays)*averfps
-                        if rawSlope > 0.1:
-                            print('WARNING: Raw Delay is Increasing! This can FREEZE The COMPUTER if left unchecked.')
-                            print('Increase: {:0.6f} ms/s'.format(rawSlope))
-                    if len(proTimes) > 1:
-                        proFrameTotal = numpy.array([x for x in range(len(proTimes))], dtype=numpy.float64)
-                        proDelays = numpy.array([proTimes[y][2]*1000 for y in range(len(proTimes))], dtype=numpy.float64)
-                        averProDelay = mean(proDelays)
-                        proSlope = self.findSlope(proFrameTotal, proDelays)*averfps
-                        if proSlope > 0.1:
-                            print('WARNING: Processed Delay is Increasing! This can cause COMPUTER FAILURE if left unchecked.')
-                            print('Increase: {:0.6f} ms/s'.format(proSlope))
+                    rawSlope = engine.slope('Raw Frame')
+                    if self.scaler:                                 # Add converting threads when the delay grows.
+                        self.scaler.setSlope('Raw Frame', rawSlope)
+                    if rawSlope > 0.1:
+                        print('WARNING: Raw Delay is Increasing! This can FREEZE The COMPUTER if left unchecked.')
+                        print('Increase: {:0.6f} ms/s'.format(rawSlope))
+                    proSlope = engine.slope('Processed Frame')
+                    if self.scaler:                                 # Add processing threads when the delay grows.
+                        self.scaler.setSlope('Processing', proSlope)
+                    if proSlope > 0.1:
+                        print('WARNING: Processed Delay is Increasing! This can cause COMPUTER FAILURE if left unchecked.')
+                        print('Increase: {:0.6f} ms/s'.format(proSlope))
+                    if self.shedder:                                # Shed or restore the live processing quality.
+                        self.shedder.update(proSlope, self.graph.stages['Processing'].inputq.qsize())
                     # Safely updated the statistics for other threads to see.
                     with self.locks['statsLock']:
                         self.returnedData['True Frame Rate'] = averfps
-                        self.returnedData['Raw Frame Delay'] = averRawDelay
-                        self.returnedData['Processed Frame Delay'] = averProDelay
-                    trueFPS.clear()
-                    rawTimes.clear()
-                    proTimes.clear()
+                        self.returnedData.update(engine.report())
+                        self.returnedData.update(self.queueDrops())
+                        self.returnedData.update(self.savingMissing())
+                        self.returnedData['Pre-Trigger Frames'] = self.preTrigger.lastFlushed
+                        if self.shedder:
+                            self.returnedData['Load Shedding Level'] = self.shedder.level
+                        self.returnedData.update(self.framePool.stats())
+                        self.returnedData.update(self.graph.stats())
+                        if self.scaler:
+                            self.returnedData.update(self.scaler.stats())
+                    self.tracer.check()                             # Write the traces of finished recordings.
+                    engine.reset()
                     start = time.time()+10                          # Sets the next time to calculate FPS and delay.
             # Regardless if the information was a frame or not.
             self.statsq.task_done()                             # Tell the queue we are done with the given information.
 
 
+class LoadShedder:
+    # Class Attributes
+    levelText = ('full quality',
+                 'one of every {skipEvery} unrecorded frames is not processed',
+                 'also only one of every {streamEvery} frames is streamed',
+                 'also unrecorded frames are processed {shedScale} times smaller')
+
+    def __init__(self, logFile=None, skipEvery=2, streamEvery=3, shedScale=2, slopeLimit=0.1, highDepth=8):
+        """
+        LoadShedder: An object that lowers the quality of the live processing when the processed frame delay keeps
+                     growing, one step at a time, and raises it again once the backlog drains. Recorded frames are
+                     always converted, saved, and processed the same, only unrecorded frames and the stream are shed.
+                     Every change is logged with the range of frames the last level applied to.
+
+        Required Modules: time, threading
+        Required Classes: None
+        Methods: update, skipProcessing, skipStream, scale, __log
+
+        Class Attributes
+        levelText: The description of each shedding level for the log.
+
+        Object Parameters & Attributes
+        Parameters:
+        :param logFile: The file the shedding decisions are added to, they are only printed when None.
+        :param skipEvery: At level 1 and up, one of every this many unrecorded frames is not processed.
+        :param streamEvery: At level 2 and up, only one of every this many processed frames is streamed.
+        :param shedScale: At level 3, how many more times smaller unrecorded frames are processed.
+        :param slopeLimit: How fast the processed delay may grow in ms/s before shedding more.
+        :param highDepth: How many frames waiting to be processed causes shedding more.
+
+        Attributes:
+        level: The current shedding level from 0 for full quality to 3.
+        lock: A lock to safely change the level and frame range, the converting threads and stats thread both use it.
+        firstFrame: The first frame number the current level applied to.
+        lastFrame: The newest frame number seen.
+        lastFile: The file of the newest frame seen.
+        """
+        # Parameters
+        self.logFile = logFile
+        self.skipEvery = skipEvery
+        self.streamEvery = streamEvery
+        self.shedScale = shedScale
+        self.slopeLimit = slopeLimit
+        self.highDepth = highDepth
+
+        # Attributes
+        self.level = 0
+        self.lock = threading.Lock()
+        self.firstFrame = 0
+        self.lastFrame = 0
+        self.lastFile = ''
+
+    # Methods #
+    def update(self, slope, depth):
+        """
+        update: Sheds one more level when the processing is falling behind or restores one level when it has caught up.
+
+        Parameters:
+        :param slope: How fast the processed delay is growing in ms/s.
+        :param depth: The number of frames waiting to be processed.
+        :return: The shedding level.
+        """
+        with self.lock:
+            if (slope > self.slopeLimit or depth >= self.highDepth) and self.level < 3:
+                self.__log(self.level + 1)
+            elif slope <= 0 and depth == 0 and self.level > 0:   # The backlog has drained.
+                self.__log(self.level - 1)
+            return self.level
+
+    def skipProcessing(self, record):
+        """
+        skipProcessing: Decides if a converted frame is not processed. Every frame is checked so the shed frame ranges
+                        are known.
+
+        Parameters:
+        :param record: The FrameRecord of the frame.
+        :return: True when the frame should not be processed.
+        """
+        with self.lock:                                         # The range is read by update on the stats thread.
+            self.lastFrame = record.frameNumber
+            self.lastFile = record.file
+            level = self.level
+        return level >= 1 and not record.save and not record.frameNumber % self.skipEvery
+
+    def skipStream(self, record):
+        """
+        skipStream: Decides if a processed frame is not streamed.
+
+        Parameters:
+        :param record: The FrameRecord of the frame.
+        :return: True when the frame should not be streamed.
+        """
+        return self.level >= 2 and bool(record.frameNumber % self.streamEvery)
+
+    def scale(self, record):
+        """
+        scale: Returns how many more times smaller a frame is processed.
+
+        Parameters:
+        :param record: The FrameRecord of the frame.
+        """
+        if self.level >= 3 and not record.save:
+            return self.shedScale
+        return 1
+
+    def __log(self, level):
+        """
+        __log: A private method that changes the level and logs the frames the last level applied to. Must be called
+               with the lock.
+
+        Parameters:
+        :param level: The new shedding level.
+        """
+        settings = {'skipEvery': self.skipEvery, 'streamEvery': self.streamEvery, 'shedScale': self.shedScale}
+        line = '{:} Load shedding level {:} -> {:}: frames {:}-{:} of {:} were at "{:}", now "{:}"\n'.format(
+            datetime.datetime.now(), self.level, level, self.firstFrame, self.lastFrame, self.lastFile,
+            self.levelText[self.level].format(**settings), self.levelText[level].format(**settings))
+        self.level = level
+        self.firstFrame = self.lastFrame + 1
+        print(line, end='')
+        if self.logFile:
+            with open(self.logFile, 'a') as log:
+                log.write(line)
+
+
 class ImageConverter:
+    # Class Attributes
+    reducedFlags = {2: (cv2.IMREAD_REDUCED_COLOR_2, cv2.IMREAD_REDUCED_GRAYSCALE_2),
+                    4: (cv2.IMREAD_REDUCED_COLOR_4, cv2.IMREAD_REDUCED_GRAYSCALE_4),
+                    8: (cv2.IMREAD_REDUCED_COLOR_8, cv2.IMREAD_REDUCED_GRAYSCALE_8)}
+
     def __init__(self, previous, new):
         """
         ImageConverter: An object that converts one image type to another.
@@ -643,10 +895,12 @@ class ImageConverter:
         Required Modules: numpy, cv2
         Required Classes: None
         Parameters: previous, new
-        Methods: deterTarget, convert, yuv420p2bgr, jpeg2bgr
+        Methods: deterTarget, outputShape, convert, noChange, yuv420p2bgr, yuv420p2bgrFloat, yuv420p2gray, y2bgr,
+                 jpeg2bgr, jpeg2gray, bgr2gray, bgr2jpeg, yuv420p2jpeg, y2jpeg, __reduce
 
         Class Attributes
-        none
+        reducedFlags: The JPEG decoding flags for color and grayscale images that decode an image 2, 4, or 8 times
+                      smaller, which is much quicker than decoding the full image and shrinking it.
 
         Object Parameters & Attributes
         Parameters:
@@ -654,21 +908,27 @@ class ImageConverter:
         :param new: New image type to convert to.   (String)
 
         Attributes
+        jpegQuality: The quality of the JPEG images that are encoded, from 0 to 100.
         conversionTable: A table that contain links to the methods for converting images which allows conversion
                                 selection via indexing.
         row: The row that indexes to the conversion desired.
         column: The column that indexes to the conversion desired.
+        fillsOutput: Whether the conversion can put the image in an array supplied by the caller.
         """
         # Parameters
         self.previous = previous
         self.new = new
         # Attributes
-        # conversionTable:       BRG                YUV           JPEG
-        self.conversionTable = [[self.noChange,    None,          None],
-                                [self.yuv420p2bgr, self.noChange, None],
-                                [self.jpeg2bgr,    None,          self.noChange]]
+        self.jpegQuality = 90
+        # The Y type is a YUV420 frame with only its Y (luminance) plane, the GRAY type is a single channel image.
+        # conversionTable:       BRG                YUV           JPEG               GRAY
+        self.conversionTable = [[self.noChange,    None,          self.bgr2jpeg,     self.bgr2gray],
+                                [self.yuv420p2bgr, self.noChange, self.yuv420p2jpeg, self.yuv420p2gray],
+                                [self.jpeg2bgr,    None,          self.noChange,     self.jpeg2gray],
+                                [self.y2bgr,       None,          self.y2jpeg,       self.yuv420p2gray]]
         self.row = None
         self.column = None
+        self.fillsOutput = False
         # Initial Methods Executed
         self.deterTarget(previous, new)         # Determine and set the the conversion needed based on previous and new.
 
@@ -688,6 +948,8 @@ class ImageConverter:
             self.row = 1
         elif previous.upper() == 'JPEG':
             self.row = 2
+        elif previous.upper() == 'Y':
+            self.row = 3
         else:
             raise RuntimeError('Cannot convert from a ' + previous + ' type.')
 
@@ -698,26 +960,51 @@ class ImageConverter:
             self.column = 1
         elif new.upper() == 'JPEG':
             self.column = 2
+        elif new.upper() == 'GRAY':
+            self.column = 3
         else:
             raise RuntimeError('Cannot convert to a ' + new + ' type.')
 
+        if self.conversionTable[self.row][self.column] is None:
+            raise RuntimeError('Cannot convert from a ' + previous + ' type to a ' + new + ' type.')
+
         # Set the attributes to the new ones
         self.previous = previous
         self.new = new
+        self.fillsOutput = self.conversionTable[self.row][self.column] in (self.yuv420p2bgr, self.yuv420p2gray,
+                                                                           self.y2bgr, self.bgr2gray)
 
-    def convert(self, frameBuffer, width, height):
+    def outputShape(self, width, height):
         """
-        convert: Converts one type of image to another by selecting the method that does so.
+        outputShape: Finds the shape of the array a full size image is converted into, so the caller can supply it.
+
+        Parameters:
+        :param width: The width of the image in pixels.
+        :param height: The height of the image in pixels.
+        :return: The shape of the converted image, or None when the conversion makes its own array.
+        """
+        if not self.fillsOutput:
+            return None
+        elif self.column == 3:                          # Grayscale images have a single channel.
+            return height, width
+        return height, width, 3
+
+    def convert(self, frameBuffer, width, height, scale=1, out=None):
+        """
+        convert: Converts one type of image to another by selecting the method that does so. Different scales can be
+                 converted from the same buffer, so a small image for processing and a full image for saving.
 
         Parameters:
         :param frameBuffer: The buffer that contains the image.
         :param width: The width of the image in pixels.
         :param height: The height of the image in pixels.
+        :param scale: How many times smaller to make the image, such as 2, 4, or 8.
+        :param out: An optional array of the full size image to put the converted image in instead of a new array.
         :return: The same image of a different type based what was selected beforehand.
         """
-        return self.conversionTable[self.row][self.column](frameBuffer, width, height)
+        return self.conversionTable[self.row][self.column](frameBuffer, width, height, scale, out)
 
-    def noChange(self, frameBuffer, width, height):
+    def noChange(self, frameBuffer, width, height, scale=1, out=None):
         """
         noChange: Returns the frame.
 
@@ -725,18 +1012,52 @@ class ImageConverter:
         :param frameBuffer: The buffer that contains the image.
         :param width: The width of the image in pixels.
         :param height: The height of the image in pixels.
+        :param scale: How many times smaller to make the image, such as 2, 4, or 8.
+        :param out: Not used since the frame is passed on as it is.
         :return: A BGR numpy array of the frame.
         """
-        return frameBuffer
+        return self.__reduce(frameBuffer, scale)
 
-    def yuv420p2bgr(self, frameBuffer, width, height):
+    def yuv420p2bgr(self, frameBuffer, width, height, scale=1, out=None):
         """
-        yuv420p2bgr: Converts a YUV420p image to a BGR image.
+        yuv420p2bgr: Converts a YUV420p image to a BGR image with OpenCV's integer conversion, which uses the same BT.601
+                     matrix as yuv420p2bgrFloat without making any floating point copies of the frame.
 
         Parameters:
         :param frameBuffer: The buffer that contains the image.
         :param width: The width of the image in pixels.
         :param height: The height of the image in pixels.
+        :param scale: How many times smaller to make the image, such as 2, 4, or 8.
+        :param out: An optional BGR array to put the full size image in.
+        :return: A BGR numpy array of the frame.
+        """
+        # Calculate the actual image size in the frameBytes (accounting for rounding of the resolution)
+        fwidth = (width + 31) // 32 * 32
+        fheight = (height + 15) // 16 * 16
+        # The padded planes are laid out as an I420 image of the padded size, so they are converted as one image.
+        YUV = numpy.frombuffer(frameBuffer, dtype=numpy.uint8, count=fwidth * fheight * 3 // 2).reshape(
+            (fheight * 3 // 2, fwidth))
+        if scale > 1:
+            return self.__reduce(cv2.cvtColor(YUV, cv2.COLOR_YUV2BGR_I420)[:height, :width], scale)
+        if fwidth == width and fheight == height:
+            return cv2.cvtColor(YUV, cv2.COLOR_YUV2BGR_I420, dst=out)   # Convert straight into the output.
+        BGR = cv2.cvtColor(YUV, cv2.COLOR_YUV2BGR_I420)
+        if out is None:
+            return numpy.ascontiguousarray(BGR[:height, :width])    # Crop the actual resolution.
+        numpy.copyto(out, BGR[:height, :width])
+        return out
+
+    def yuv420p2bgrFloat(self, frameBuffer, width, height, scale=1, out=None):
+        """
+        yuv420p2bgrFloat: Converts a YUV420p image to a BGR image by applying the conversion matrix to every pixel. It is
+                          much slower than yuv420p2bgr and is kept as a reference to check the conversion against.
+
+        Parameters:
+        :param frameBuffer: The buffer that contains the image.
+        :param width: The width of the image in pixels.
+        :param height: The height of the image in pixels.
+        :param scale: How many times smaller to make the image, such as 2, 4, or 8.
+        :param out: Not used since this is only a reference.
         :return: A BGR numpy array of the frame.
         """
         # Calculate the actual image size in the frameBytes (accounting for rounding of the resolution)
@@ -752,7 +1073,7 @@ class ImageConverter:
         V = numpy.frombuffer(frameBuffer, dtype=numpy.uint8, count=halfFrameArea, offset=frameArea+halfFrameArea).reshape(
             (fheight // 2, fwidth // 2)).repeat(2, axis=0).repeat(2, axis=1)
         # Stack the YUV channels together, crop the actual resolution, convert to floating point for later calculations, and apply the standard biases
-        YUV = numpy.dstack((Y, U, V))[:height, :width, :].astype(numpy.float)
+        YUV = numpy.dstack((Y, U, V))[:height, :width, :].astype(numpy.float64)
         YUV[:, :, 0] = YUV[:, :, 0] - 16  # Offset Y by 16
         YUV[:, :, 1:] = YUV[:, :, 1:] - 128  # Offset UV by 128
         # YUV conversion matrix from ITU-R BT.601 version (SDTV)
@@ -761,9 +1082,49 @@ class ImageConverter:
                          [1.164, -0.392, -0.813],   # G
                          [1.164,  0.000,  1.596]])  # R
         # Take the dot product with the matrix to produce BGR output, clamp the results to byte range and convert to bytes
-        return YUV.dot(M.T).clip(0, 255).astype(numpy.uint8)
+        return self.__reduce(YUV.dot(M.T).clip(0, 255).astype(numpy.uint8), scale)
 
-    def jpeg2bgr(self, frameBuffer, width, height):
+    def yuv420p2gray(self, frameBuffer, width, height, scale=1, out=None):
+        """
+        yuv420p2gray: Takes the Y (luminance) plane of a YUV420p image as a grayscale image. The U and V planes are not
+                      needed so this also works when only the Y plane was kept.
+
+        Parameters:
+        :param frameBuffer: The buffer that contains the image.
+        :param width: The width of the image in pixels.
+        :param height: The height of the image in pixels.
+        :param scale: How many times smaller to make the image, such as 2, 4, or 8.
+        :param out: An optional grayscale array to put the full size image in.
+        :return: A grayscale numpy array of the frame.
+        """
+        # Calculate the actual image size in the frameBytes (accounting for rounding of the resolution)
+        fwidth = (width + 31) // 32 * 32
+        fheight = (height + 15) // 16 * 16
+        Y = numpy.frombuffer(frameBuffer, dtype=numpy.uint8, count=fwidth * fheight).reshape((fheight, fwidth))
+        # Crop the actual resolution and copy it out of the buffer since the buffer will be reused.
+        if scale > 1:
+            return self.__reduce(Y[:height, :width], scale)
+        if out is None:
+            return Y[:height, :width].copy()
+        numpy.copyto(out, Y[:height, :width])
+        return out
+
+    def y2bgr(self, frameBuffer, width, height, scale=1, out=None):
+        """
+        y2bgr: Converts the Y (luminance) plane of a YUV420p image to a gray BGR image.
+
+        Parameters:
+        :param frameBuffer: The buffer that contains the image.
+        :param width: The width of the image in pixels.
+        :param height: The height of the image in pixels.
+        :param scale: How many times smaller to make the image, such as 2, 4, or 8.
+        :param out: An optional BGR array to put the full size image in.
+        :return: A BGR numpy array of the frame.
+        """
+        return cv2.cvtColor(self.yuv420p2gray(frameBuffer, width, height, scale), cv2.COLOR_GRAY2BGR,
+                            dst=out if scale <= 1 else None)
+
+    def jpeg2bgr(self, frameBuffer, width, height, scale=1, out=None):
         """
         jpeg2bgr: Converts a JPEG image to a BGR image.
 
@@ -771,39 +1132,183 @@ class ImageConverter:
         :param frameBuffer: The buffer that contains the image.
         :param width: The width of the image in pixels.
         :param height: The height of the image in pixels.
+        :param scale: How many times smaller to make the image, such as 2, 4, or 8.
+        :param out: Not used since OpenCV always decodes a JPEG image into a new array.
         :return: A BGR numpy array of the frame.
         """
         data = numpy.frombuffer(frameBuffer, dtype=numpy.uint8)     # Changes image to a NumPy array.
-        return cv2.imdecode(data, 1)                                # Changes image to a BGR image.
+        if scale in self.reducedFlags:                              # Decode a smaller image directly.
+            return cv2.imdecode(data, self.reducedFlags[scale][0])
+        return self.__reduce(cv2.imdecode(data, 1), scale)          # Changes image to a BGR image.
+
+    def jpeg2gray(self, frameBuffer, width, height, scale=1, out=None):
+        """
+        jpeg2gray: Converts a JPEG image to a grayscale image. Only the luminance of the JPEG is decoded so it is quicker
+                   than decoding the color image.
+
+        Parameters:
+        :param frameBuffer: The buffer that contains the image.
+        :param width: The width of the image in pixels.
+        :param height: The height of the image in pixels.
+        :param scale: How many times smaller to make the image, such as 2, 4, or 8.
+        :param out: Not used since OpenCV always decodes a JPEG image into a new array.
+        :return: A grayscale numpy array of the frame.
+        """
+        data = numpy.frombuffer(frameBuffer, dtype=numpy.uint8)     # Changes image to a NumPy array.
+        if scale in self.reducedFlags:                              # Decode a smaller image directly.
+            return cv2.imdecode(data, self.reducedFlags[scale][1])
+        return self.__reduce(cv2.imdecode(data, cv2.IMREAD_GRAYSCALE), scale)   # Changes image to a grayscale image.
+
+    def bgr2gray(self, frameBuffer, width, height, scale=1, out=None):
+        """
+        bgr2gray: Converts a BGR image to a grayscale image.
+
+        Parameters:
+        :param frameBuffer: The BGR numpy array of the image.
+        :param width: The width of the image in pixels.
+        :param height: The height of the image in pixels.
+        :param scale: How many times smaller to make the image, such as 2, 4, or 8.
+        :param out: An optional grayscale array to put the full size image in.
+        :return: A grayscale numpy array of the frame.
+        """
+        if scale > 1:
+            return self.__reduce(cv2.cvtColor(frameBuffer, cv2.COLOR_BGR2GRAY), scale)
+        return cv2.cvtColor(frameBuffer, cv2.COLOR_BGR2GRAY, dst=out)
+
+    def bgr2jpeg(self, frameBuffer, width, height, scale=1, out=None):
+        """
+        bgr2jpeg: Encodes a BGR image as a JPEG image.
+
+        Parameters:
+        :param frameBuffer: The BGR numpy array of the image.
+        :param width: The width of the image in pixels.
+        :param height: The height of the image in pixels.
+        :param scale: How many times smaller to make the image, such as 2, 4, or 8.
+        :param out: Not used since the encoded size is not known beforehand.
+        :return: A numpy array of the bytes of the JPEG image.
+        """
+        quality = (cv2.IMWRITE_JPEG_QUALITY, self.jpegQuality)
+        ret, data = cv2.imencode('.jpg', self.__reduce(frameBuffer, scale), quality)
+        if not ret:
+            raise RuntimeError('Cannot encode the frame as a JPEG.')
+        return data
+
+    def yuv420p2jpeg(self, frameBuffer, width, height, scale=1, out=None):
+        """
+        yuv420p2jpeg: Encodes a YUV420p image as a JPEG image.
+
+        Parameters:
+        :param frameBuffer: The buffer that contains the image.
+        :param width: The width of the image in pixels.
+        :param height: The height of the image in pixels.
+        :param scale: How many times smaller to make the image, such as 2, 4, or 8.
+        :param out: Not used since the encoded size is not known beforehand.
+        :return: A numpy array of the bytes of the JPEG image.
+        """
+        return self.bgr2jpeg(self.yuv420p2bgr(frameBuffer, width, height, scale), width, height)
+
+    def y2jpeg(self, frameBuffer, width, height, scale=1, out=None):
+        """
+        y2jpeg: Encodes the Y (luminance) plane of a YUV420p image as a grayscale JPEG image.
+
+        Parameters:
+        :param frameBuffer: The buffer that contains the image.
+        :param width: The width of the image in pixels.
+        :param height: The height of the image in pixels.
+        :param scale: How many times smaller to make the image, such as 2, 4, or 8.
+        :param out: Not used since the encoded size is not known beforehand.
+        :return: A numpy array of the bytes of the JPEG image.
+        """
+        return self.bgr2jpeg(self.yuv420p2gray(frameBuffer, width, height, scale), width, height)
+
+    def __reduce(self, image, scale):
+        """
+        __reduce: A private method that shrinks an image by averaging the pixels that are combined.
+
+        Parameters:
+        :param image: The numpy array of the image.
+        :param scale: How many times smaller to make the image.
+        :return: The smaller image, or the same image when the scale is 1 or the image is still encoded.
+        """
+        if scale <= 1 or not isinstance(image, numpy.ndarray):
+            return image
+        return cv2.resize(image, (image.shape[1] // scale, image.shape[0] // scale), interpolation=cv2.INTER_AREA)
 
 
 class SavingThread:
-    def __init__(self, type='video', fileFormat=None, encoder=None, directory=None):
+    # Class Attributes
+    hdf5Files = {}              # The open HDF5 files by path with how many savers are writing to each.
+    hdf5Created = set()         # The paths of the HDF5 files created so far, later savers add to them.
+    hdf5Lock = threading.Lock()
+
+    def __init__(self, type='video', fileFormat=None, encoder=None, directory=None, fileSuffix='', frameField='frame',
+                 chunkFrames=32, segmentFrames=300, encoderCount=4, poolDepth=120):
         """
         SavingThread: A threaded object that can save frames to videos, frames to files, timestamps, and information from
-                      image processing.
-        Required Modules: queue, threading, numpy, cv2
-        Required Classes: None
-        Methods: isSaving, startSaving, endSaving, resetSaving, _get_save_type, __saveVideoTask, __saveImageTask,
-                 __saveTimestampsTask, __saveProcessTask
+                      image processing, or all of them together to one HDF5 file. The savers of a recording
+                      share its HDF5 file, each writing to its own group.
+        Required Modules: queue, threading, numpy, cv2, h5py (only for HDF5), hdf5plugin (only for lz4)
+        Required Classes: FrameQueue, ReorderBuffer, MappedRecording
+        Methods: isSaving, startSaving, endSaving, resetSaving, _get_save_type, __orderedRecords, __saveVideoTask,
+                 __saveImageTask, __saveTimestampsTask, __writeTimestamp, __saveBinaryTimestampsTask,
+                 __saveProcessTask, __saveHDF5Task, __openHDF5, __closeHDF5, __createHDF5, __writeHDF5Block,
+                 __saveRawTask,
+                 __closeRaw, __saveSegmentsTask, __encodeSegmentsTask, __writeManifest, __openImageIndex,
+                 __writeImagesTask
 
         Class Attributes
-        none
+        hdf5Files: A dictionary of the open HDF5 files by path with a list of the file and how many savers are writing
+                   to it, so the file is closed once the last saver has finished its recording.
+        hdf5Created: The paths of the HDF5 files that have been created, so a saver that opens one after the others
+                     have closed it adds its group instead of overwriting it.
+        hdf5Lock: A lock to safely open and close the shared HDF5 files.
 
 
         Object Parameters & Attributes
         Parameters:
-        :param type: The type of saving to be done.
+        :param type: The type of saving to be done, 'video', 'segmented', 'image', 'timestamp', 'binarytimestamp',
+                     'processinfo', 'hdf5', or 'raw'.
         :param fileFormat: For some saving types choose the file type to save the information as.
-        :param encoder: The encoder used to save videos with the default is Huffman Lossless Codec(HFYU).
+        :param encoder: The encoder used to save videos with the default is Huffman Lossless Codec(HFYU). For HDF5 the
+                        compression filter, 'gzip', 'lzf', 'lz4', or None for no compression. For images the PNG
+                        compression level, TIFF compression scheme, or JPEG quality, or a list of OpenCV parameters.
         :param directory: The directory to save the files in.
+        :param fileSuffix: An extra bit added to the filename of each frame to note what is being saved. For HDF5 the
+                           name of the group in the recording's file instead, in lower case.
+        :param frameField: The frame of the FrameRecord to save, the converted 'frame', the full resolution 'saveFrame',
+                           or the 'processed' one.
+        :param chunkFrames: For HDF5 the number of frames in each chunk, the frames are written a chunk at a time.
+        :param segmentFrames: For segmented videos the number of frames in each segment file.
+        :param encoderCount: For segmented videos or images the number of threads encoding segments or writing
+                             images at the same time.
+        :param poolDepth: For segmented videos the number of frames in the pool of converted frames. It is split
+                          between the queues of the encoders so waiting frames hold back the reorder buffer instead
+                          of taking the whole pool.
 
         Attributes:
-        frameSaveq: The queue where to get the incoming information that will be saved.
+        name: The name of the saver used in the statistics and traces.
+        stampName: The stage each frame is stamped with once it is written.
+        frameSaveq: The queue where to get the incoming FrameRecords that will be saved.
+        reorder: The ReorderBuffer that puts the frames in order and gives up on frames that never arrive.
+        imageFolder: For images the folder of the recording, with a folder for each writer and an index of the frames.
+        imageIndex: For images the open index file with the frame number and path of each written frame.
+        indexLock: A lock that keeps the writers from adding to the index at the same time.
+        firstNumber: A function that gives the number of the first frame of a recording from its file, 1 unless the
+                     saver is also sent the frames from before recording started.
         continueRunning: A singal that keeps the saving thread alive.
         """
         # Parameters
         self.saveType = type
+        self.fileSuffix = fileSuffix
+        self.frameField = frameField
+        self.chunkFrames = chunkFrames
+        self.segmentFrames = segmentFrames
+        self.encoderCount = encoderCount
+        self.poolDepth = poolDepth
+        self.imageFolder = None
+        self.imageIndex = None
+        self.indexLock = threading.Lock()
+        self.firstNumber = lambda file: 1
         if dir:
             try:
                 os.chdir(directory)
@@ -816,8 +1321,11 @@ class SavingThread:
         # Use the strings from the parameters to choose the file format and encoder.
         self.fileFormat, self.encoder = self._get_save_type(type, fileFormat, encoder)
         # Attributes
+        self.name = fileSuffix or type
+        self.stampName = 'written ' + self.name                                 # The stage frames are stamped with.
         self.currentVideo = None
-        self.frameSaveq = Queue()
+        self.frameSaveq = baseCapture.FrameQueue(isRecorded=lambda item: True)   # Everything here is recorded.
+        self.reorder = savingBuffers.ReorderBuffer(name=self.name)              # Puts the frames back in order.
         self.continueRunning = threading.Event()
 
     # Methods #
@@ -838,7 +1346,7 @@ class SavingThread:
         """ endSaving: Ends the saving thread and prints a conformation message."""
         self.frameSaveq.join()                                      # Wait until there is nothing to save.
         self.continueRunning.clear()                                # Tell the saving thread to shutdown.
-        self.frameSaveq.put([None, None, None, None, None, None])   # Load blank information to unblock thread.
+        self.frameSaveq.putControl(self.frameSaveq.stopSignal)      # Unblock the thread so it stops.
         self.saveThread.join()                                      # Wait for saving thread to finish running.
 
     def resetSaving(self, type=None, fileFormat=None, encoder=None):
@@ -876,9 +1384,26 @@ class SavingThread:
             fileFormat = '.' + (fileFormat or 'avi')                            # Choose the file format.
             encoder = tuple(ccFormat for ccFormat in (encoder or 'HFYU'))       # Choose the video encoder.
             encoder = cv2.VideoWriter_fourcc(*encoder)                          # Set the encoder.
+        elif type == 'segmented':                                               # When saving a segmented video:
+            self.saveThread = threading.Thread(target=self.__saveSegmentsTask)  # Create a thread with the segment task.
+            fileFormat = '.' + (fileFormat or 'avi')                            # Choose the file format.
+            encoder = tuple(ccFormat for ccFormat in (encoder or 'HFYU'))       # Choose the video encoder.
+            encoder = cv2.VideoWriter_fourcc(*encoder)                          # Set the encoder.
         elif type == 'image':                                                   # When saving to images:
             self.saveThread = threading.Thread(target=self.__saveImagesTask)    # Create a thread with the image task.
             fileFormat = '.' + (fileFormat or 'tiff')                           # Choose the file format.
+            # An encoder number sets the compression, the PNG level, TIFF scheme, or JPEG quality.
+            if isinstance(encoder, int):
+                if fileFormat == '.png':
+                    encoder = [cv2.IMWRITE_PNG_COMPRESSION, encoder]
+                elif fileFormat in ('.tif', '.tiff'):
+                    encoder = [cv2.IMWRITE_TIFF_COMPRESSION, encoder]
+                elif fileFormat in ('.jpg', '.jpeg'):
+                    encoder = [cv2.IMWRITE_JPEG_QUALITY, encoder]
+                else:
+                    raise RuntimeError('Cannot set the compression of ' + fileFormat + ' images')
+            else:
+                encoder = list(encoder or [])                               # Or a list of OpenCV write parameters.
         elif type == 'timestamp':                                               # When saving timestamps:
             self.saveThread = threading.Thread(target=self.__saveTimestampsTask)  # Create a thread with the timestamps task.
             fileFormat = '.' + (fileFormat or 'txt')                            # Choose the file format.
@@ -886,6 +1411,10 @@ class SavingThread:
             self.fileHeader = 'I do not know what to put in the header yet... Use your imagination!\n'
             self.subHeader = None
             self.lineText = 'Frame Number: {:}      Timestamp: {:}\n'
+            self.startText = 'Start Error: {:.3f} ms\n'                        # Written before a recording's first frame.
+        elif type == 'binarytimestamp':                                         # When saving binary timestamps:
+            self.saveThread = threading.Thread(target=self.__saveBinaryTimestampsTask)
+            fileFormat = '.' + (fileFormat or 'bin')                            # Choose the file format.
         elif type == 'processinfo':                                             # When saving processed info:
             self.saveThread = threading.Thread(target=self.__saveProcessInfoTask)  # Create a thread with the processed info task.
             fileFormat = '.' + (fileFormat or 'txt')                            # Choose the file format.
@@ -893,162 +1422,530 @@ class SavingThread:
             self.fileHeader = 'I do not know what to put in the header yet... Use your imagination!\n'
             self.subHeader = 'Frame Number: {:}      Timestamp: {:}\n'
             self.lineText = None
+        elif type == 'raw':                                                     # When saving unencoded frames:
+            self.saveThread = threading.Thread(target=self.__saveRawTask)      # Create a thread with the raw task.
+            fileFormat = '.' + (fileFormat or 'dat')                            # Choose the file format.
+        elif type == 'hdf5':                                                    # When saving everything to HDF5:
+            if h5py is None:
+                raise RuntimeError('Cannot save to HDF5 without h5py.')
+            self.saveThread = threading.Thread(target=self.__saveHDF5Task)     # Create a thread with the HDF5 task.
+            fileFormat = '.' + (fileFormat or 'hdf5')                           # Choose the file format.
+            if encoder == 'gzip':                                               # Choose the compression filter.
+                encoder = {'compression': 'gzip', 'compression_opts': 4}
+            elif encoder == 'lzf':
+                encoder = {'compression': 'lzf'}
+            elif encoder == 'lz4':
+                if hdf5plugin is None:
+                    raise RuntimeError('Cannot compress HDF5 with lz4 without hdf5plugin.')
+                encoder = dict(hdf5plugin.LZ4())
+            elif encoder is None or isinstance(encoder, dict):                  # Uncompressed or already chosen.
+                encoder = encoder or {}
+            else:
+                raise RuntimeError('Unknown HDF5 filter ' + str(encoder))
         else:                                                                   # If not a type then don't make a thread.
             self.saveThread = None
         return fileFormat, encoder                                              # Return the file format and encoder.
 
+    def __orderedRecords(self):
+        """
+        __orderedRecords: A generator that takes FrameRecords from the queue and gives them out in frame order through
+                          the reorder buffer. Frames that never arrive are given up on after the buffer's timeout, and
+                          the generator ends once the blank information from endSaving is received.
+        """
+        file = None                                                     # The file of the frames being ordered.
+        closedFiles = set()                                             # Files that have been finished.
+        while True:
+            try:                                                        # Only wake up to expire gaps while frames wait.
+                record = self.frameSaveq.get(timeout=self.reorder.timeout if self.reorder.isWaiting() else None)
+            except Empty:
+                yield from self.reorder.expire()
+                continue
+            if record is self.frameSaveq.stopSignal:                    # When shutting down give out what is left.
+                self.frameSaveq.task_done()
+                yield from self.reorder.flush()
+                return
+            if record.file != file:                                     # A new recording has started.
+                if record.file in closedFiles:                          # A late frame of a finished recording.
+                    self.reorder.lateCount += 1
+                    self.frameSaveq.task_done()
+                    continue
+                yield from self.reorder.flush()                         # Finish the last recording first.
+                if file is not None:
+                    closedFiles.add(file)
+                file = record.file
+                # Wait from the first frame of the recording, not the first one to arrive, which may be a later one.
+                self.reorder.reset(min(record.frameNumber, self.firstNumber(file)), file)
+            frame = getattr(record, self.frameField, None)
+            ready = self.reorder.push(record, getattr(frame, 'nbytes', 0))
+            self.frameSaveq.task_done()                                 # The buffer holds the frame from here.
+            yield from ready
+
     def __saveVideoTask(self):
         """
         __saveVideoTask: A thread task that takes frames and their information from the queue and saves them to a
                          video file.
         """
-        # Setup
         previousFile = ''                                               # Previous name of the file.
-        previousNumber = 0                                              # Previous frame number
-        holdFrames = []                                                 # A list of frames to temporarily hold out of order frames.
-        while self.continueRunning.is_set():                            # Continuously wait for a frame to save.
-            # Wait for the frame and its information.
-            frameBGRnpa, width, height, fps, frameNumber, file = self.frameSaveq.get()
-            if frameNumber:                                             # If there was information:
-                if not (file == previousFile):                          # And if the filename is different than the last.
-                    # Set the openCV object to save the new video file.
-                    if self.currentVideo:                               # Release file if there is one present.
-                        self.currentVideo.release()
-                    self.currentVideo = cv2.VideoWriter(file+self.fileFormat, self.encoder, fps, (width, height), isColor=True)
-                    previousFile = file                                 # Set the current filename to the previous one.
-                    previousNumber = frameNumber-1                      # Set the previous frame to the one before this one.
-                    holdFrames.clear()                                  # Clear any extra frames held in the out of order frames list.
-                if frameNumber == previousNumber+1:                     # If this frame is the one after the last:
-                    self.currentVideo.write(frameBGRnpa)                # Add this frame to video.
-                    previousNumber += 1                                 # Set the previous frame number to this one.
-                    for index in range(len(holdFrames)):                # Check all of the out of order frames:
-                        frameBGRnpa, frameNumber = holdFrames.pop(0)    # Get the frame and its number.
-                        if frameNumber == previousNumber + 1:           # If it is the next frame:
-                            self.currentVideo.write(frameBGRnpa)        # Add it to the video.
-                            previousNumber += 1                         # Advance a frame.
-                        else:                                           # If it is not the next frame put it back.
-                            holdFrames.insert(0, [frameBGRnpa, frameNumber])
-                            break                                       # The list is ordered so all other frames will not match.
-                else:                                                   # When the frame received is not the next one:
-                    holdFrames.append([frameBGRnpa, frameNumber])       # Add it to the out of order frame list.
-                    holdFrames.sort(key=lambda frame: frame[1])         # Order the list for ease of access.
-            self.frameSaveq.task_done()                                 # Tell the queue we are done processing the information.
+        for record in self.__orderedRecords():                          # Take each frame in order.
+            file = record.file + self.fileSuffix
+            frameBGRnpa = getattr(record, self.frameField)
+            if not (file == previousFile):                              # If the filename is different than the last.
+                # Set the openCV object to save the new video file.
+                if self.currentVideo:                                   # Release file if there is one present.
+                    self.currentVideo.release()
+                # The size is taken from the frame since processed frames can be smaller than the capture.
+                self.currentVideo = cv2.VideoWriter(file+self.fileFormat, self.encoder, record.fps,
+                                                    (frameBGRnpa.shape[1], frameBGRnpa.shape[0]),
+                                                    isColor=frameBGRnpa.ndim == 3)  # Grayscale has one channel.
+                previousFile = file                                     # Set the current filename to the previous one.
+            self.currentVideo.write(frameBGRnpa)                        # Add this frame to video.
+            record.stamp(self.stampName)
         # When shutting down release the last file.
         if self.currentVideo:
             self.currentVideo.release()
+            self.currentVideo = None
+
+    def __saveRawTask(self):
+        """
+        __saveRawTask: A thread task that takes frames from the queue and copies them unencoded into a memory-mapped
+                       file for each recording. Each frame goes straight to the slot of its frame number so the frames
+                       do not need to be put in order, and the frames missing once the recording closes are recorded.
+        """
+        recording = None                                                # The open MappedRecording.
+        previousFile = ''                                               # Previous name of the file.
+        closedFiles = set()                                             # Recordings that have been closed.
+        while True:
+            record = self.frameSaveq.get()
+            if record is self.frameSaveq.stopSignal:                    # When shutting down stop taking frames.
+                self.frameSaveq.task_done()
+                break
+            file = record.file + self.fileSuffix
+            frame = getattr(record, self.frameField)
+            if not (file == previousFile):                              # If the filename is different than the last.
+                if file in closedFiles:                                 # A late frame of a closed recording.
+                    self.reorder.lateCount += 1
+                    self.frameSaveq.task_done()
+                    continue
+                if recording:
+                    self.__closeRaw(recording, previousFile)
+                    closedFiles.add(previousFile)
+                firstNumber = min(record.frameNumber, self.firstNumber(record.file))
+                recording = savingBuffers.MappedRecording(file + self.fileFormat, frame.shape, frame.dtype,
+                                                          record.fps, firstNumber)
+                previousFile = file                                     # Set the current filename to the previous one.
+            if record.startError is not None:                           # The first frame of the recording.
+                recording.startError = record.startError
+            if recording.write(record.frameNumber, frame):              # Copy the frame to its slot.
+                record.stamp(self.stampName)
+            else:
+                self.reorder.lateCount += 1
+            self.frameSaveq.task_done()                                 # Tell the queue we are done with the frame.
+        # When shutting down close the last file.
+        if recording:
+            self.__closeRaw(recording, previousFile)
+
+    def __closeRaw(self, recording, file):
+        """
+        __closeRaw: Closes a memory-mapped recording and records the frames missing from it.
+
+        Parameters:
+        :param recording: The MappedRecording.
+        :param file: The filename of the recording.
+        """
+        for first, last in recording.close():
+            self.reorder.missing.append((file, first, last))
+            self.reorder.missingCount += last - first + 1
+            print('{:}: frames {:}-{:} of {:} never arrived'.format(self.name, first, last, file))
+
+    def __saveSegmentsTask(self):
+        """
+        __saveSegmentsTask: A thread task that splits each recording into segments of a fixed number of frames and
+                            hands each segment to one of several encoding threads, so segments are encoded at the same
+                            time. A manifest of the segments is written once every segment of a recording is finished.
+        """
+        # Start the encoders, each has a small share of the frame pool so frames do not pile up when they fall behind.
+        queueFrames = max(self.poolDepth // self.encoderCount, 2)
+        encoderqs = [Queue(maxsize=queueFrames) for encoder in range(self.encoderCount)]
+        encoders = [threading.Thread(target=self.__encodeSegmentsTask, args=(encoderq,)) for encoderq in encoderqs]
+        for encoder in encoders:
+            encoder.start()
+        previousFile = ''                                               # Previous name of the file.
+        segments = []                                                   # The manifest entry of each segment.
+        for record in self.__orderedRecords():                          # Take each frame in order.
+            file = record.file + self.fileSuffix
+            if not (file == previousFile):                              # If there is a new recording:
+                if segments:                                            # Finish the last one first.
+                    self.__writeManifest(previousFile, segments, encoderqs, fps)
+                segments = []
+                fps = record.fps
+                frameCount = 0                                          # The number of frames in this recording.
+                previousFile = file                                     # Set the current filename to the previous one.
+            if frameCount % self.segmentFrames == 0:                    # Start a new segment.
+                index = len(segments)
+                segments.append({'file': os.path.basename(file) + '_{:04d}'.format(index) + self.fileFormat,
+                                 'firstFrame': record.frameNumber, 'lastFrame': record.frameNumber,
+                                 'frameCount': 0, 'firstTimestamp': record.timestamp,
+                                 'lastTimestamp': record.timestamp})
+            segment = segments[-1]
+            segment['lastFrame'] = record.frameNumber
+            segment['lastTimestamp'] = record.timestamp
+            segment['frameCount'] += 1
+            frameCount += 1
+            # Each segment is encoded by one encoder and the segments are dealt out in turn.
+            path = os.path.join(os.path.dirname(file), segment['file'])
+            encoderqs[(len(segments) - 1) % self.encoderCount].put((path, record))
+        if segments:
+            self.__writeManifest(previousFile, segments, encoderqs, fps)
+        for encoderq in encoderqs:                                      # Shut down the encoders.
+            encoderq.put(None)
+        for encoder in encoders:
+            encoder.join()
+
+    def __encodeSegmentsTask(self, encoderq):
+        """
+        __encodeSegmentsTask: A thread task that encodes the frames of the segments it is given to their video files.
+
+        Parameters:
+        :param encoderq: The queue of (segment path, FrameRecord) to encode, 'close' to finish the current segment, or
+                         None to shut down.
+        """
+        video = None                                                    # The open segment file.
+        previousPath = ''                                               # The path of the open segment file.
+        while True:
+            item = encoderq.get()
+            if item is None or item == 'close':                         # Finish the current segment.
+                if video:
+                    video.release()
+                video, previousPath = None, ''
+                encoderq.task_done()
+                if item is None:
+                    return
+                continue
+            path, record = item
+            frame = getattr(record, self.frameField)
+            if not (path == previousPath):                              # If this is a new segment:
+                if video:
+                    video.release()
+                video = cv2.VideoWriter(path, self.encoder, record.fps, (frame.shape[1], frame.shape[0]),
+                                        isColor=frame.ndim == 3)        # Grayscale has one channel.
+                previousPath = path
+            video.write(frame)                                          # Add this frame to the segment.
+            record.stamp(self.stampName)
+            encoderq.task_done()
+
+    def __writeManifest(self, file, segments, encoderqs, fps):
+        """
+        __writeManifest: Waits for the segments of a recording to be encoded and writes the manifest that lists them in
+                         order with their frame ranges and timestamps, so they can be read as one video.
+
+        Parameters:
+        :param file: The filename of the recording.
+        :param segments: The manifest entry of each segment.
+        :param encoderqs: The queues of the encoders.
+        :param fps: The frame rate of the recording.
+        """
+        for encoderq in encoderqs:                                      # Close every segment and wait for them.
+            encoderq.put('close')
+        for encoderq in encoderqs:
+            encoderq.join()
+        # The frames given up on while putting the frames in order.
+        missing = [[first, last] for missingFile, first, last in self.reorder.missing
+                   if missingFile + self.fileSuffix == file]
+        manifest = {'fps': fps, 'segmentFrames': self.segmentFrames,
+                    'frameCount': sum(segment['frameCount'] for segment in segments), 'missingFrames': missing,
+                    'segments': segments}
+        with open(file + 'Manifest.json', 'w') as manifestFile:
+            json.dump(manifest, manifestFile, indent=1)
 
     def __saveImagesTask(self):
         """
-        __saveImagesTask: A thread task that takes frames and their information from the queue and saves them to files.
+        __saveImagesTask: A thread task that takes frames and their information from the queue and hands them to a
+                          pool of writer threads that save them to image files. Each writer has its own folder in the
+                          recording's image folder, frame N is written by writer N modulo the number of writers, and
+                          each written frame is added to the recording's index.
         """
-        while self.continueRunning.is_set():               # Continuously wait for a frame to save.
+        # Start the writers, each has a bounded queue so frames do not pile up when the writers fall behind.
+        writerqs = [Queue(maxsize=8) for writer in range(self.encoderCount)]
+        writers = [threading.Thread(target=self.__writeImagesTask, args=(writerq,)) for writerq in writerqs]
+        for writer in writers:
+            writer.start()
+        previousFile = ''                                               # Previous name of the file.
+        while True:
             # Wait for the frame and its information.
-            frameBGRnpa, width, height, fps, frameNumber, file = self.frameSaveq.get()
-            if frameNumber:                                # If there was information:
-                # Add an extra piece to filename.
-                filename = file + '{0}'.format(frameNumber)+self.fileFormat
-                cv2.imwrite(filename, frameBGRnpa)         # Save the frame as an image.
-            self.frameSaveq.task_done()                    # Tell the queue we are done processing the information.
+            record = self.frameSaveq.get()
+            if record is self.frameSaveq.stopSignal:                    # When shutting down stop taking frames.
+                self.frameSaveq.task_done()
+                break
+            file = record.file + self.fileSuffix
+            if not (file == previousFile):                              # If there is a new recording:
+                self.__openImageIndex(file, writerqs)
+                previousFile = file                                     # Set the current filename to the previous one.
+            writerqs[record.frameNumber % self.encoderCount].put(record)
+            self.frameSaveq.task_done()                                 # The writer has the frame from here.
+        self.__openImageIndex(None, writerqs)                           # Finish the last recording.
+        for writerq in writerqs:                                        # Shut down the writers.
+            writerq.put(None)
+        for writer in writers:
+            writer.join()
+
+    def __openImageIndex(self, file, writerqs):
+        """
+        __openImageIndex: Waits for the writers to finish the last recording, closes its index, and makes the folders
+                          and index of a new recording.
+
+        Parameters:
+        :param file: The filename of the new recording, or None to only finish the last one.
+        :param writerqs: The queues of the writers.
+        """
+        for writerq in writerqs:                                        # Wait for every frame to be written.
+            writerq.join()
+        if self.imageIndex:
+            self.imageIndex.close()
+            self.imageIndex = None
+        if file is None:
+            return
+        self.imageFolder = file + 'Images'
+        for writer in range(len(writerqs)):
+            os.makedirs(os.path.join(self.imageFolder, '{:02d}'.format(writer)), exist_ok=True)
+        self.imageIndex = open(os.path.join(self.imageFolder, 'Index.txt'), 'w')
+
+    def __writeImagesTask(self, writerq):
+        """
+        __writeImagesTask: A thread task that writes the frames it is given to image files in its own folder.
+
+        Parameters:
+        :param writerq: The queue of FrameRecords to write, or None to shut down.
+        """
+        while True:
+            record = writerq.get()
+            if record is None:
+                writerq.task_done()
+                return
+            # Add an extra piece to filename.
+            name = os.path.basename(record.file) + self.fileSuffix + '{0}'.format(record.frameNumber) + self.fileFormat
+            path = os.path.join('{:02d}'.format(record.frameNumber % self.encoderCount), name)
+            written = False
+            try:
+                written = cv2.imwrite(os.path.join(self.imageFolder, path), getattr(record, self.frameField),
+                                      self.encoder)
+                if written:
+                    record.stamp(self.stampName)
+                    with self.indexLock:                                # Add the frame to the index.
+                        self.imageIndex.write('{:}\t{:}\n'.format(record.frameNumber, path))
+            except cv2.error:                                           # Reported below like a failed write.
+                pass
+            finally:
+                if not written:
+                    print('Error: Frame {:} could not be written to {:}'.format(record.frameNumber, path))
+                writerq.task_done()                                     # Never leave endSaving waiting.
 
     def __saveTimestampsTask(self):
         """ __saveTimestampsTask: A thread task that takes frame timestamps from the queue and saves it to a file."""
-        holdFrames = []                                                         # A list of frames to temporarily hold out of order frames.
-        # Get the first set of information.
-        timestamp, width, height, fps, frameNumber, file = self.frameSaveq.get()
-        while self.continueRunning.is_set():                                    # Continuously wait for a information to save.
-            with open(file + self.fileFormat, 'w') as dataSheet:                # Open or create a text file.
-                # Write the information to the file.
+        previousFile = ''                                                       # Previous name of the file.
+        dataSheet = None                                                        # The open text file.
+        for record in self.__orderedRecords():                                  # Take each frame in order.
+            file = record.file + self.fileSuffix
+            if not (file == previousFile):                                      # If there is a new file to save:
+                if dataSheet:
+                    dataSheet.close()
+                dataSheet = open(file + self.fileFormat, 'w')                   # Open or create a text file.
                 dataSheet.write(self.fileHeader)
-                dataSheet.write(self.lineText.format(frameNumber, datetime.datetime.fromtimestamp(timestamp)))
                 previousFile = file                                             # Set the previous filename to this one.
-                previousNumber = frameNumber                                    # Set the previous frame number to this one.
-                holdFrames.clear()                                              # Clear any extra frames held in the out of order frames list.
-                self.frameSaveq.task_done()                                     # Tell the queue we are done processing the information.
-                while self.continueRunning.is_set():                            # Continuously wait for a information to save.
-                    # Get the first set of information.
-                    timestamp, width, height, fps, frameNumber, file = self.frameSaveq.get()
-                    if timestamp:                                               # If there was information:
-                        if not (file == previousFile):                          # If there is a new file to save:
-                            break                                               # Break out to create new text file.
-                        timestamp = datetime.datetime.fromtimestamp(timestamp)  # Change it to datetime form.
-                        if frameNumber == previousNumber + 1:                   # If this information is after the last:
-                            # The write timestamp to file.
-                            dataSheet.write(self.lineText.format(frameNumber, timestamp))
-                            previousNumber += 1                                 # Set the previous number to this one.
-                            for index in range(len(holdFrames)):                # Check all of the out of order frames:
-                                frameBGRnpa, frameNumber = holdFrames.pop(0)    # Get the frame and its number.
-                                if frameNumber == previousNumber + 1:           # If it is the next frame:
-                                    # Write timestamp to file
-                                    dataSheet.write(self.lineText.format(frameNumber, timestamp))
-                                    previousNumber += 1                         # Advance a frame.
-                                else:                                           # If it is not the next frame put it back.
-                                    holdFrames.insert(0, [frameBGRnpa, frameNumber])
-                                    break                                       # The list is ordered so all other frames will not match.
-                        else:                                                   # When the frame received is not the next one:
-                            holdFrames.append([timestamp, frameNumber])         # Add it to the out of order frame list.
-                            holdFrames.sort(key=lambda frame: frame[1])         # Order the list for ease of access.
-                        self.frameSaveq.task_done()                             # Tell the queue we are done processing the information.
-                    else:
-                        break
-        self.frameSaveq.task_done()
+            self.__writeTimestamp(dataSheet, record)                            # Write the timestamp to the file.
+            record.stamp(self.stampName)
+        if dataSheet:
+            dataSheet.close()
+
+    def __writeTimestamp(self, dataSheet, record):
+        """
+        __writeTimestamp: Writes the timestamp of a frame to the file, after how late the recording started if it is the
+                          first frame of a synchronized recording.
+
+        Parameters:
+        :param dataSheet: The open timestamp file.
+        :param record: The FrameRecord of the frame.
+        """
+        if record.startError is not None:
+            dataSheet.write(self.startText.format(record.startError * 1000))
+        dataSheet.write(self.lineText.format(record.frameNumber, datetime.datetime.fromtimestamp(record.timestamp)))
+
+    def __saveBinaryTimestampsTask(self):
+        """
+        __saveBinaryTimestampsTask: A thread task that takes frame timestamps from the queue and appends them to a file
+                                    as fixed width binary records through a buffered writer, with a dropped record
+                                    for each frame that never arrived. See timestampLog for the layout.
+        """
+        previousFile = ''                                                       # Previous name of the file.
+        dataSheet = None                                                        # The open binary file.
+        for record in self.__orderedRecords():                                  # Take each frame in order.
+            file = record.file + self.fileSuffix
+            if not (file == previousFile):                                      # If there is a new file to save:
+                if dataSheet:
+                    dataSheet.close()
+                dataSheet = open(file + self.fileFormat, 'wb', buffering=2**20)  # Open or create a binary file.
+                previousFile = file                                             # Set the previous filename to this one.
+                previousNumber = min(record.frameNumber, self.firstNumber(record.file)) - 1
+            for frameNumber in range(previousNumber + 1, record.frameNumber):   # The frames given up on.
+                dataSheet.write(timestampLog.packDropped(frameNumber))
+            now = time.time()
+            dataSheet.write(timestampLog.packRecord(record, now))
+            record.stamp(self.stampName, now)
+            previousNumber = record.frameNumber
+        if dataSheet:
+            dataSheet.close()
 
     def __saveProcessInfoTask(self):
-        """ __saveTimestampsTask: A thread task that takes frame timestamps from the queue and saves it to a file."""
-        holdFrames = []                                                     # A list of frames to temporarily hold out of order frames.
-        # Get the first set of information.
-        information, width, height, frameNumber, timestamp, file = self.frameSaveq.get()
-        while self.continueRunning.is_set():                                # Continuously wait for a information to save.
-            with open(file + self.fileFormat, 'w') as dataSheet:            # Open or create a text file.
-                # Write the information to the file.
+        """ __saveProcessInfoTask: A thread task that takes processed information from the queue and saves it to a file."""
+        previousFile = ''                                                   # Previous name of the file.
+        dataSheet = None                                                    # The open text file.
+        for record in self.__orderedRecords():                              # Take each frame in order.
+            file = record.file + self.fileSuffix
+            if not (file == previousFile):                                  # If there is a new file to save:
+                if dataSheet:
+                    dataSheet.close()
+                dataSheet = open(file + self.fileFormat, 'w')               # Open or create a text file.
                 dataSheet.write(self.fileHeader)
-                dataSheet.write(self.subHeader.format(frameNumber, datetime.datetime.fromtimestamp(timestamp)))
-                dataSheet.write(information.decode())
-                dataSheet.write('\n')
                 previousFile = file                                         # Set the previous filename to this one.
-                previousNumber = frameNumber                                # Set the previous frame number to this one.
-                holdFrames.clear()                                          # Clear any extra frames held in the out of order frames list.
-                self.frameSaveq.task_done()                                 # Tell the queue we are done processing the information.
-                while self.continueRunning.is_set():                        # Continuously wait for a information to save.
-                    # Write the information to the file.
-                    information, width, height, frameNumber, timestamp, file = self.frameSaveq.get()
-                    if information:                                         # If there was information:
-                        if not (file == previousFile):                      # If there is a new file to save:
-                            break                                           # Break out to create new text file.
-                        timestamp = datetime.datetime.fromtimestamp(timestamp)  # Change time to datetime form.
-                        if frameNumber == previousNumber + 1:               # If this information is after the last:
-                            # The write information to file.
-                            dataSheet.write(self.subHeader.format(frameNumber, timestamp))
-                            dataSheet.write(information.decode())
-                            dataSheet.write('\n')
-                            previousNumber += 1                             # Set the previous number to this one.
-                            for index in range(len(holdFrames)):            # Check all of the out of order frames:
-                                frameBGRnpa, frameNumber = holdFrames.pop(0)    # Get the frame and its number.
-                                if frameNumber == previousNumber + 1:       # If it is the next frame:
-                                    # Write timestamp to file
-                                    dataSheet.write(self.subHeader.format(frameNumber, timestamp))
-                                    dataSheet.write(information.decode())
-                                    dataSheet.write('\n')
-                                    previousNumber += 1                     # Advance a frame.
-                                else:                                       # If it is not the next frame put it back.
-                                    holdFrames.insert(0, [frameBGRnpa, frameNumber])
-                                    break                                   # The list is ordered so all other frames will not match.
-                        else:                                               # When the frame received is not the next one:
-                            holdFrames.append([timestamp, frameNumber])     # Add it to the out of order frame list.
-                            holdFrames.sort(key=lambda frame: frame[1])     # Order the list for ease of access.
-                        self.frameSaveq.task_done()                         # Tell the queue we are done processing the information.
-                    else:
-                        break
-        self.frameSaveq.task_done()
+            # Write the information to the file.
+            dataSheet.write(self.subHeader.format(record.frameNumber, datetime.datetime.fromtimestamp(record.timestamp)))
+            dataSheet.write(record.information.decode())
+            dataSheet.write('\n')
+            record.stamp(self.stampName)
+        if dataSheet:
+            dataSheet.close()
+
+    def __saveHDF5Task(self):
+        """
+        __saveHDF5Task: A thread task that takes frames and their information from the queue and saves the frames, frame
+                        numbers, timestamps, and any processed information as datasets of a group in the recording's
+                        HDF5 file. The frames are gathered into a block the size of a chunk so each dataset is written
+                        once per chunk.
+        """
+        previousFile = ''                                                       # Previous name of the file.
+        hdf5 = None                                                             # The group of the open HDF5 file.
+        for record in self.__orderedRecords():                                  # Take each frame in order.
+            file = record.file + self.fileFormat
+            frame = getattr(record, self.frameField)
+            if not (file == previousFile):                                      # If there is a new file to save:
+                if hdf5:                                                        # Write what is left and close it.
+                    self.__writeHDF5Block(hdf5, block, count)
+                    self.__closeHDF5(previousFile)
+                hdf5, block = self.__createHDF5(file, frame, record)
+                count = 0                                                       # The number of frames in the block.
+                previousFile = file                                             # Set the previous filename to this one.
+            if frame.shape != block['frames'].shape[1:]:                        # The datasets cannot change size.
+                print('Error: Frame {:} of {:} is a different size and was not saved'.format(record.frameNumber, file))
+                continue
+            # Copy the frame into the block so its memory can be reused right away.
+            block['frames'][count] = frame
+            block['frameNumbers'][count] = record.frameNumber
+            block['timestamps'][count] = record.timestamp
+            if 'processInfo' in block:
+                block['processInfo'][count] = record.information or b''
+            block['times'][count] = record.times
+            if record.startError is not None:                                   # The first frame of the recording.
+                hdf5.attrs['startError'] = record.startError
+            count += 1
+            if count == self.chunkFrames:                                       # Write a whole chunk at once.
+                self.__writeHDF5Block(hdf5, block, count)
+                count = 0
+        # When shutting down write the last frames and close the file.
+        if hdf5:
+            self.__writeHDF5Block(hdf5, block, count)
+            self.__closeHDF5(previousFile)
+
+    def __openHDF5(self, file):
+        """
+        __openHDF5: Opens a recording's HDF5 file or shares it with the other savers that have it open.
+
+        Parameters:
+        :param file: The filename with the file format.
+        :return: The open HDF5 file.
+        """
+        with SavingThread.hdf5Lock:
+            if file not in SavingThread.hdf5Files:
+                mode = 'a' if file in SavingThread.hdf5Created else 'w'         # Only the first saver overwrites it.
+                SavingThread.hdf5Files[file] = [h5py.File(file, mode), 0]
+                SavingThread.hdf5Created.add(file)
+            SavingThread.hdf5Files[file][1] += 1
+            return SavingThread.hdf5Files[file][0]
+
+    def __closeHDF5(self, file):
+        """
+        __closeHDF5: Closes a recording's HDF5 file once no other saver is writing to it.
+
+        Parameters:
+        :param file: The filename with the file format.
+        """
+        with SavingThread.hdf5Lock:
+            SavingThread.hdf5Files[file][1] -= 1
+            if not SavingThread.hdf5Files[file][1]:
+                SavingThread.hdf5Files.pop(file)[0].close()
+
+    def __createHDF5(self, file, frame, record):
+        """
+        __createHDF5: Creates the saver's group in a recording's HDF5 file with resizable chunked datasets shaped like the
+                      first frame of the recording.
+
+        Parameters:
+        :param file: The filename with the file format.
+        :param frame: The first frame to be saved.
+        :param record: The FrameRecord of the first frame.
+        :return: The group and a dictionary of the blocks that hold each dataset's next chunk.
+        """
+        hdf5File = self.__openHDF5(file)
+        hdf5File.attrs['fps'] = record.fps
+        groupName = self.fileSuffix.lower() or self.saveType
+        if groupName in hdf5File:                                               # Replace a group recorded before.
+            del hdf5File[groupName]
+        hdf5 = hdf5File.create_group(groupName)
+        chunk = self.chunkFrames
+        hdf5.create_dataset('frames', shape=(0,) + frame.shape, maxshape=(None,) + frame.shape, dtype=frame.dtype,
+                            chunks=(chunk,) + frame.shape, **self.encoder)
+        hdf5.create_dataset('frameNumbers', shape=(0,), maxshape=(None,), dtype=numpy.int64, chunks=(chunk,))
+        hdf5.create_dataset('timestamps', shape=(0,), maxshape=(None,), dtype=numpy.float64, chunks=(chunk,))
+        block = {'frames': numpy.empty((chunk,) + frame.shape, frame.dtype),
+                 'frameNumbers': numpy.empty(chunk, numpy.int64),
+                 'timestamps': numpy.empty(chunk, numpy.float64),
+                 'times': [None] * chunk}                                       # Stamped once they are written.
+        if self.frameField == 'processed':                                     # Processed frames also have information.
+            hdf5.create_dataset('processInfo', shape=(0,), maxshape=(None,), dtype=h5py.vlen_dtype(bytes),
+                                chunks=(chunk,))
+            block['processInfo'] = numpy.empty(chunk, object)
+        return hdf5, block
+
+    def __writeHDF5Block(self, hdf5, block, count):
+        """
+        __writeHDF5Block: Adds the first frames of the blocks to the end of the datasets.
+
+        Parameters:
+        :param hdf5: The group of the open HDF5 file.
+        :param block: The dictionary of the blocks.
+        :param count: The number of frames in the blocks.
+        """
+        if not count:
+            return
+        for name, values in block.items():
+            if name == 'times':
+                continue
+            dataset = hdf5[name]
+            length = dataset.shape[0]
+            dataset.resize(length + count, axis=0)
+            dataset[length:length + count] = values[:count]
+        now = time.time()
+        for times in block['times'][:count]:
+            times[self.stampName] = now
 
 
 class ImageProcessor:
     def __init__(self, function, threadCount=1):
         """
-        ImageProcessor:A threaded object that processes a frame.
+        ImageProcessor: An object that processes a frame. The frame manager's Processing stage runs it with its own
+                        worker threads.
 
-        Required Modules: queue, threading
+        Required Modules: None
         Required Classes: None
-        Methods: isAlive, isProcessing, hasProcessed, startProcessing, endProcessing, restartProcessing, __processingTask
+        Methods: process
 
         Class Attributes
         none
@@ -1056,96 +1953,29 @@ class ImageProcessor:
         Object Parameters & Attributes
         Parameters:
         :param function: The reference to function that the processor will use on each frame.
-        :param threadCount: The number of threads that will be processing.
+        :param threadCount: The number of worker threads the Processing stage starts with.
 
         Attributes:
-        continueRunning: An event that keeps the threads alive.
-        processingq: The queue that the image processor receives images from.
-        processedq: The queue that the image processor put the processed images.
-        threadList: The list of the threads used in the image processor.
+        none
         """
         # Parameters
         self.function = function
         self.threadCount = threadCount
-        # Attributes
-        self.continueRunning = threading.Event()
-        self.processingq = Queue()
-        self.processedq = Queue()
-        self.threadList = []
-        # Create the threads.
-        for worker in range(self.threadCount):
-            self.threadList.append(threading.Thread(target=self.__processingTask))
 
     # Methods #
-    def isAlive(self):
-        """ isAlive: Determines if there are still threads processing."""
-        if len(self.threadList):
-            for worker in range(self.threadCount):          # For all threads:
-                if self.threadList[worker].is_alive():      # If there is a thread in list that is alive:
-                    return True                             # Return true.
-        return False                                        # If all threads are dead then return false.
-
-    def isProcessing(self):
-        """ isProcessing: Determines if there are still frames to be processed."""
-        return not self.processingq.empty()     # Check if there are frames in the queue.
-
-    def hasProcessed(self):
-        """ hasProcessed: Determines if there are frames any frames that have not been taken after being processed."""
-        return not self.processedq.empty()      # Check if there are frames in the queue.
-
-    def startProcessing(self):
-        """ startProcessing: Starts the processing thread and prints a conformation message."""
-        if not self.continueRunning.is_set():           # If the thread is not on:
-            self.continueRunning.set()                  # Set threads to stay alive.
-            for worker in range(self.threadCount):      # Start the processing threads.
-                self.threadList[worker].start()
-            print('Processing with {:} has started'.format(self.function))  # Print we have started processing.
-        else:                                           # If the threads were on then print we have failed.
-            print('Start Failed: Shutdown Processing Before Starting!')
-
-    def endProcessing(self):
-        """ endProcessing: Ends the saving threads and prints a conformation message."""
-        self.processingq.join()                         # Wait for all the frames to be processed.
-        self.continueRunning.clear()                    # Instruct all threads to shutdown.
-        for worker in range(self.threadCount):          # For all threads load an unblocking empty data.
-            self.processingq.put(None)
-        for worker in range(self.threadCount):          # After all threads received there data, for all threads:
-            self.threadList[worker].join()              # Wait for the threads to shutdown.
-        self.threadList.clear()
-
-    def resetProcessing(self, function=None):
-        """
-        resetProcessing: Restart processing from an ended state and optionally change some parameters.
-
-        Parameter:
-        :param function: The reference to function that the processor will use on each frame.
+    def process(self, record):
         """
-        if not self.continueRunning.is_set():           # If the thread is not on:
-            if function:                                # If there is a new function then:
-                for worker in range(self.threadCount):  # For all threads:
-                    self.threadList[worker].join()      # Wait for the threads to shutdown.
-                self.function = function                # Set the new function.
-            self.continueRunning.set()                  # Set threads to stay alive.
-            for worker in range(self.threadCount):
-                self.threadList.append(threading.Thread(target=self.__processingTask))
-            for worker in range(self.threadCount):      # Start the processing threads.
-                self.threadList[worker].start()
-            print('Processing with {:} has restarted'.format(self.function))  # Print we have restarted processing.
-        else:                                           # If the threads were on then print we have failed.
-            print('Start Failed: Shutdown Processing Before Restarting!')
+        process: Processes one frame with the function. The frame manager calls this from its own stage threads.
 
-    def __processingTask(self):
-        """
-        __processingTask: A thread task that takes frames and their information from the queue and processes them.
+        Parameters:
+        :param record: The FrameRecord of the frame.
+        :return: The FrameRecord with its processed frame and information.
         """
-        while self.continueRunning.is_set():                           # Continuously wait for a information to process.
-            # data format: [frameBGRnpa, width, height, fps, frameNumber, timestamp, file, save]
-            data = self.processingq.get()                              # Get data from to be processed queue.
-            if data:                                                   # If there was data:
-                results = self.function(data)      # Process that data with self.function.
-                # results format: [frameBGRnpa, width, height, fps, frameNumber, timestamp, information, file, save]
-                self.processedq.put(results)                           # Put results on the finished queue
-            self.processingq.task_done()                               # Tell the queue we are done processing the information.
+        record.stamp('processing')
+        record = self.function(record)
+        # The record now also has its processed frame and information.
+        record.stamp('processed')
+        return record
 
 
 class VideoStreamer:
@@ -1175,7 +2005,7 @@ class VideoStreamer:
         # Attributes
         self.locks = {'connection_lock': threading.Lock()}
         self.continueRunning = threading.Event()
-        self.sendFrameq = Queue()
+        self.sendFrameq = baseCapture.FrameQueue(isRecorded=lambda item: False)  # Streamed frames are never recorded.
         self.threadList = []
         # Create the threads
         for worker in range(self.threadCount):
@@ -1211,7 +2041,7 @@ class VideoStreamer:
         self.sendFrameq.join()                      # Wait for all the frames to be streamed.
         self.continueRunning.clear()                # Instruct all threads to shutdown.
         for worker in range(self.threadCount):      # For all threads load an unblocking empty data.
-            self.sendFrameq.put([None, None])
+            self.sendFrameq.putControl(self.sendFrameq.stopSignal)
         for worker in range(self.threadCount):      # After all threads received there data, for all threads:
             self.threadList[worker].join()          # Wait for the threads to shutdown.
         self.threadList.clear()
@@ -1250,9 +2080,9 @@ class VideoStreamer:
     def __streamingTask(self):
         """ __streamingTask: A thread task that takes frames and streams them."""
         while self.continueRunning.is_set():                    # Continuously wait for a information to stream.
-            frameBGRnpa, frameNumber = self.sendFrameq.get()    # Get data from to be frame queue.
-            if frameBGRnpa:                                     # If there was data:
-                stream = io.BytesIO(frameBGRnpa)                # Turn the data into a byte stream.
+            record = self.sendFrameq.get()                      # Get data from to be frame queue.
+            if record is not self.sendFrameq.stopSignal:        # If there was data:
+                stream = io.BytesIO(record.processed)           # Turn the data into a byte stream.
                 try:                                            # Try to send data:
                     with self.locks['connection_lock']:         # When socket is available:
                         # Inform the server we are sending data.
@@ -1260,6 +2090,7 @@ class VideoStreamer:
                         self.clientSocket.flush()               # Remove any extra bytes in the socket.
                         stream.seek(0)                          # Go to the beginning of the byte stream.
                         self.clientSocket.write(stream.read())  # Write frame byte stream to socket.
+                    record.stamp('sent')
                 finally:
                     stream.seek(0)                              # When finished got to the beginning.
                     stream.flush()                              # Erase frame.
@@ -1268,7 +2099,7 @@ class VideoStreamer:
 
 class ServerCommunicator:
     def __init__(self, manager, camParams, resetParams, returnedData,
-                 clientSocket=None, standAlone=False, encodeSize=20, sendDelay=1):
+                 clientSocket=None, standAlone=False, encodeSize=20, sendDelay=1, hotParams=()):
         """
         ServerCommunicator: A threaded object that communicates with a server.
 
@@ -1290,6 +2121,7 @@ class ServerCommunicator:
         :param standAlone: A boolean that determines if this program will continue without the server.
         :param encodeSize: The max size of the key at the end of the encoded message used to communicate with the server.
         :param sendDelay: Time in seconds between sending information to the server.
+        :param hotParams: List of parameters that are changed on the running camera without a reset.
 
         Attributes
         seeker: An object that finds the the server for the communicator.
@@ -1302,6 +2134,7 @@ class ServerCommunicator:
         # Parameters
         self.camParams = camParams
         self.resetParams = resetParams
+        self.hotParams = hotParams
         self.returnedData = returnedData
         self.clientSocket = clientSocket
         self.standAlone = standAlone
@@ -1311,7 +2144,8 @@ class ServerCommunicator:
         self.locks = {'paramLock': threading.Lock(), 'statsLock': threading.Lock(),
                       'startRecording': threading.Event(), 'stopRecording': threading.Event(),
                       'dataReceived': threading.Event(), 'stopFrameCap': threading.Event(),
-                      'sendFrames': threading.Event(), 'sendServerData': threading.Event()}
+                      'applyParams': threading.Event(), 'sendFrames': threading.Event(),
+                      'sendServerData': threading.Event()}
         self.seeker = ServerSeeker(hostPort, self, manager)
         self.fmt = '{:}s'.format(encodeSize)
         self.codeOffset = encodeSize * -1
@@ -1392,6 +2226,7 @@ class ServerCommunicator:
         """
         # Setup
         reset = False
+        apply = False
         record = False
         begin = False
         # The parameters are group in sets of 2. The first element is the key in the parameters dictionary. The the
@@ -1429,9 +2264,13 @@ class ServerCommunicator:
                 self.camParams[info[index]] = info[index + 1]
             if info[index] in self.resetParams:
                 reset = True
-        # Reset the capture if told to.
+            elif info[index] in self.hotParams:
+                apply = True
+        # Reset the capture if told to, otherwise change what can be changed while capturing.
         if reset:
             self.locks['stopFrameCap'].set()
+        elif apply:
+            self.locks['applyParams'].set()
         # Start or Stop the recording if told to.
         if record:
             if begin:
@@ -1515,7 +2354,10 @@ class ServerCommunicator:
             if type(item) is str:
                 fmt += str(len(item)) + 's'
             elif type(item) is int:
-                fmt += 'H'
+                if 0 <= item <= 0xFFFF:
+                    fmt += 'H'
+                else:                                                               # Counters can outgrow a short.
+                    fmt += 'q'
             else:
                 fmt += 'f'
         # Append the format on end of the list.
@@ -2039,14 +2881,37 @@ if __name__ == "__main__":
 
     # Setup Objects #
     # Here assign the correct object to object either being a USB camera or a Pi Camera. Uncomment the one desired.
+    # The frame type can be 'jpeg', 'yuv', or 'y-only' which is grayscale and skips encoding the frames.
+    # Mono captures process and save single channel grayscale frames which are a third of the size, for IR rigs.
     capture = piCapture.PiCameraCapture(frameType='jpeg')
+    #capture = piCapture.PiCameraCapture(frameType='jpeg', mono=True)
     #capture = USBCameraCapture(cameraNumber=1)
-
-    manager = FrameManager(frameType='bgr', rawFrameq=capture.frameStreamq, rawThreadCount=4, directory=storageDirectory)
+    # Without a camera frames can be generated or replayed from a recording.
+    #capture = syntheticCapture.SyntheticCameraCapture(pattern='gradient')
+    #capture = syntheticCapture.SyntheticCameraCapture(source='Test_Trial.avi')
+    # Any of the captures can run in its own process so the capture timing is not slowed down by the other threads.
+    #capture = processCapture.ProcessCameraCapture(piCapture.PiCameraCapture, frameType='jpeg')
+
+    # Bounded queues drop preview frames before recorded ones instead of using up all the memory when overloaded.
+    queueSettings = {'Raw Frame': (120, 'drop unsaved'), 'Processing': (60, 'drop unsaved'),
+                     'Stream': (4, 'drop oldest')}
+    # Converting and processing threads are added when frames back up and retired when idle, within these bounds.
+    threadBounds = {'Raw Frame': (2, 6), 'Processing': (1, 4)}
+    # The two seconds before recording starts are added to the start of each recording.
+    # One of every 30 recorded frames is traced through the stages to a [Recording]Trace.json file.
+    # A saveType of 'hdf5' saves each recording's frames with their numbers and timestamps to one chunked HDF5 file.
+    # A processScale of 2, 4, or 8 processes and streams smaller frames, JPEGs are then only fully decoded to be saved.
+    manager = FrameManager(frameType=capture.rawType, outputType=capture.outputType, rawFrameq=capture.frameStreamq,
+                           rawThreadCount=4, directory=storageDirectory, queueSettings=queueSettings,
+                           preTriggerSeconds=2, processScale=1, threadBounds=threadBounds, loadShedding=True,
+                           traceEvery=30)
+    # The stages the frames flow through can be changed before starting, such as not saving the processed video.
+    #manager.graph.removeStage('Processed Save')
     returnedData = capture.returnedData
     manager.mergeReturnedData(returnedData)
 
-    communicator = ServerCommunicator(manager, capture.camParams, capture.resetParams, returnedData, standAlone=True)
+    communicator = ServerCommunicator(manager, capture.camParams, capture.resetParams, returnedData, standAlone=True,
+                                      hotParams=capture.hotParams)
     myCommands = SudoCommandLine(camParams=capture.camParams, processParams=manager.processParams, stats=returnedData)
 
     masterLock = capture.locks
@@ -2058,6 +2923,7 @@ if __name__ == "__main__":
     # Right now the only way to change the header text in the files is by changing it in the object definition or below
     # This means that it can not be changed during run time. It is relatively easy to add this feature but I do not
     # know what should go into the header so I leave it up to someone else to program.
+    # With timestampType='binarytimestamp' the header is added by timestampLog.convertToText instead.
     manager.timestampSaver.fileHeader = 'Type here to add a header to the timestamp file.'
     manager.processInfoSaver.fileHeader = 'Type here to add a header to the processed information file.'
     manager.processInfoSaver.subHeader = 'Type here to add a sub-header to the processed information file.'
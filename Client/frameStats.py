@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+frameStats.py
+
+Last Edited: 10/17/2026
+
+Lead Author[s]: agent
+Contributor[s]:
+
+
+Description:
+
+Classes that keep statistics of the frames as they pass through, in constant memory and with a constant cost for each
+frame, so the statistics keep up at hundreds of frames per second. The mean, variance, and the slope of the delay over
+time are updated online as each frame arrives, and the delays are counted in a fixed set of buckets so the median and
+the tail delays of each stage can be read at any time without keeping or sorting the frames. A FrameTracer keeps the
+stage timestamps of a sample of the recorded frames and writes them as a Chrome trace-event file for each recording,
+which can be opened in chrome://tracing or Perfetto to see where a slow frame spent its time.
+
+Machine I/O
+input: none
+output: [Recording]Trace.json
+
+User I/O
+input: none
+output: none
+
+"""
+###############################################################################
+
+
+########## Librarys, Imports, & Setup ##########
+
+# Default Libraries
+import time
+import json
+import math
+import threading
+
+########## Definitions ##########
+
+# Classes #
+
+class RunningStats:
+    def __init__(self):
+        """
+        RunningStats: Keeps the mean and variance of a value and the slope of the value over time, updated online one
+                      sample at a time with Welford's method so no samples are kept.
+
+        Required Modules: math
+        Required Classes: None
+        Methods: reset, add, variance, std, slope
+
+        Class Attributes
+        none
+
+        Object Parameters & Attributes
+        Parameters:
+        none
+
+        Attributes:
+        count: The number of samples.
+        meanX: The mean of the times of the samples.
+        meanY: The mean of the samples.
+        m2X: The sum of the squared differences of the times from their mean.
+        m2Y: The sum of the squared differences of the samples from their mean.
+        coXY: The sum of the products of the differences of the times and the samples from their means.
+        maximum: The largest sample.
+        """
+        self.reset()
+
+    # Methods #
+    def reset(self):
+        """ reset: Forgets every sample."""
+        self.count = 0
+        self.meanX = 0.0
+        self.meanY = 0.0
+        self.m2X = 0.0
+        self.m2Y = 0.0
+        self.coXY = 0.0
+        self.maximum = 0.0
+
+    def add(self, x, y):
+        """
+        add: Adds a sample.
+
+        Parameters:
+        :param x: The time of the sample.
+        :param y: The sample.
+        """
+        self.count += 1
+        dx = x - self.meanX
+        dy = y - self.meanY
+        self.meanX += dx / self.count
+        self.meanY += dy / self.count
+        self.m2X += dx * (x - self.meanX)
+        self.m2Y += dy * (y - self.meanY)
+        self.coXY += dx * (y - self.meanY)
+        if y > self.maximum or self.count == 1:
+            self.maximum = y
+
+    def variance(self):
+        """ variance: Returns the sample variance."""
+        return self.m2Y / (self.count - 1) if self.count > 1 else 0.0
+
+    def std(self):
+        """ std: Returns the sample standard deviation."""
+        return math.sqrt(self.variance())
+
+    def slope(self):
+        """ slope: Returns the least squares slope of the samples over time."""
+        return self.coXY / self.m2X if self.m2X > 0 else 0.0
+
+
+class LatencyHistogram:
+    def __init__(self, minimum=0.05, growth=1.08, bucketCount=160):
+        """
+        LatencyHistogram: Counts delays in a fixed set of buckets that grow wider by the same factor, so any percentile
+                          can be read within the width of one bucket while adding a delay only costs one logarithm.
+
+        Required Modules: math
+        Required Classes: None
+        Methods: reset, add, percentile
+
+        Class Attributes
+        none
+
+        Object Parameters & Attributes
+        Parameters:
+        :param minimum: The upper edge of the first bucket in ms, smaller delays are counted in it.
+        :param growth: How many times wider each bucket is than the last.
+        :param bucketCount: The number of buckets, larger delays are counted in the last one.
+
+        Attributes:
+        buckets: The number of delays counted in each bucket.
+        count: The total number of delays.
+        logGrowth: The logarithm of the growth, kept to find buckets faster.
+        """
+        # Parameters
+        self.minimum = minimum
+        self.growth = growth
+        self.bucketCount = bucketCount
+
+        # Attributes
+        self.logGrowth = math.log(growth)
+        self.buckets = [0] * bucketCount
+        self.count = 0
+
+    # Methods #
+    def reset(self):
+        """ reset: Forgets every delay."""
+        self.buckets = [0] * self.bucketCount
+        self.count = 0
+
+    def add(self, delay):
+        """
+        add: Counts a delay.
+
+        Parameters:
+        :param delay: The delay in ms.
+        """
+        if delay <= self.minimum:
+            index = 0
+        else:
+            index = min(int(math.ceil(math.log(delay / self.minimum) / self.logGrowth)), self.bucketCount - 1)
+        self.buckets[index] += 1
+        self.count += 1
+
+    def percentile(self, percent):
+        """
+        percentile: Finds the delay that the given percent of delays are at or under.
+
+        Parameters:
+        :param percent: The percentile from 0 to 100.
+        :return: The upper edge of the bucket the percentile falls in, in ms.
+        """
+        if not self.count:
+            return 0.0
+        rank = percent / 100 * self.count
+        total = 0
+        for index, count in enumerate(self.buckets):
+            total += count
+            if total >= rank and count:
+                return self.minimum * self.growth ** index
+        return self.minimum * self.growth ** (self.bucketCount - 1)
+
+
+class StatsEngine:
+    # Class Attributes
+    percentiles = (50, 95, 99)
+
+    def __init__(self, stages=()):
+        """
+        StatsEngine: Keeps the frame rate and the delay statistics of each stage for the current period. Each frame
+                     only costs a few additions, and the statistics are read and started over at the end of the period.
+
+        Required Modules: None
+        Required Classes: RunningStats, LatencyHistogram
+        Methods: reset, addFrame, add, frameRate, mean, slope, report
+
+        Class Attributes
+        percentiles: The percentiles of the delays that are reported.
+
+        Object Parameters & Attributes
+        Parameters:
+        :param stages: The names of the stages to keep delays for, more are added when first seen.
+
+        Attributes:
+        delays: A dictionary of the RunningStats of each stage.
+        histograms: A dictionary of the LatencyHistogram of each stage.
+        frameCount: The number of frames captured in the period.
+        firstTime: The earliest capture time in the period.
+        lastTime: The latest capture time in the period.
+        """
+        # Attributes
+        self.delays = {}
+        self.histograms = {}
+        for stage in stages:
+            self.delays[stage] = RunningStats()
+            self.histograms[stage] = LatencyHistogram()
+        self.reset()
+
+    # Methods #
+    def reset(self):
+        """ reset: Starts a new period."""
+        for stage in self.delays:
+            self.delays[stage].reset()
+            self.histograms[stage].reset()
+        self.frameCount = 0
+        self.firstTime = None
+        self.lastTime = None
+
+    def addFrame(self, timestamp):
+        """
+        addFrame: Counts a captured frame for the frame rate. Frames may arrive in any order.
+
+        Parameters:
+        :param timestamp: The time the frame was captured.
+        """
+        self.frameCount += 1
+        if self.firstTime is None or timestamp < self.firstTime:
+            self.firstTime = timestamp
+        if self.lastTime is None or timestamp > self.lastTime:
+            self.lastTime = timestamp
+
+    def add(self, stage, timestamp, delay):
+        """
+        add: Adds the delay of a frame through a stage.
+
+        Parameters:
+        :param stage: The name of the stage.
+        :param timestamp: The time the frame was captured.
+        :param delay: The delay in seconds.
+        """
+        if stage not in self.delays:
+            self.delays[stage] = RunningStats()
+            self.histograms[stage] = LatencyHistogram()
+        self.delays[stage].add(timestamp, delay * 1000)
+        self.histograms[stage].add(delay * 1000)
+
+    def frameRate(self):
+        """ frameRate: Returns the frames per second captured in the period."""
+        if self.frameCount < 2 or self.lastTime <= self.firstTime:
+            return 0
+        return (self.frameCount - 1) / (self.lastTime - self.firstTime)
+
+    def mean(self, stage):
+        """ mean: Returns the mean delay of a stage in ms."""
+        return self.delays[stage].meanY if stage in self.delays else 0
+
+    def slope(self, stage):
+        """ slope: Returns how fast the delay of a stage is growing in ms/s."""
+        return self.delays[stage].slope() if stage in self.delays else 0
+
+    def report(self):
+        """ report: Returns the delay statistics of every stage to be put in the returned data."""
+        stats = {}
+        for stage, delays in self.delays.items():
+            stats[stage + ' Delay'] = delays.meanY
+            stats[stage + ' Delay Std'] = delays.std()
+            stats[stage + ' Delay Max'] = delays.maximum
+            stats[stage + ' Delay Slope'] = delays.slope()
+            for percent in self.percentiles:
+                stats[stage + ' Delay p{:}'.format(percent)] = self.histograms[stage].percentile(percent)
+        return stats
+
+
+class FrameTracer:
+    # Class Attributes
+    spans = (('dequeued', 'captured', 'Raw Frame Wait', 'FrameManager'),
+             ('converted', 'dequeued', 'Convert', 'FrameManager'),
+             ('processing', 'converted', 'Processing Wait', 'ImageProcessor'),
+             ('processed', 'processing', 'Process', 'ImageProcessor'),
+             ('dispatched', 'processed', 'Dispatch', 'FrameManager'))
+
+    def __init__(self, sampleEvery=30, settle=5.0, suffix='Trace.json'):
+        """
+        FrameTracer: Keeps the stage timestamps of one of every few recorded frames and writes them as a Chrome
+                     trace-event file for each recording. Each traced frame is shown as a process and each object it
+                     passed through as a thread, with a span for the time between each stage and the stage before it.
+                     Only the dictionary of timestamps is kept, not the frame, and it is filled in by the later stages
+                     while the frame finishes, so a recording is written once no frames have been added for a while.
+
+        Required Modules: time, json, threading
+        Required Classes: None
+        Methods: addSpan, collect, check, dumpAll, dump
+
+        Class Attributes
+        spans: The (stage, stage before it, span name, thread name) of the stages every frame passes through.
+
+        Object Parameters & Attributes
+        Parameters:
+        :param sampleEvery: One of every this many recorded frames is traced, none when 0.
+        :param settle: How many seconds after its last frame a recording is written.
+        :param suffix: An extra bit added to the filename of the recording for the trace file.
+
+        Attributes:
+        extraSpans: The spans added for the savers and streamer.
+        recordings: A dictionary of each recording's traced (frame number, timestamps) and the time of its last frame.
+        traceLock: A lock that keeps the recordings safe between the threads adding and writing them.
+        """
+        # Parameters
+        self.sampleEvery = sampleEvery
+        self.settle = settle
+        self.suffix = suffix
+
+        # Attributes
+        self.extraSpans = []
+        self.recordings = {}
+        self.traceLock = threading.Lock()
+
+    # Methods #
+    def addSpan(self, stage, previous, name, thread):
+        """
+        addSpan: Adds a stage that only some frames pass through, such as a saver.
+
+        Parameters:
+        :param stage: The name the stage stamps the frame with.
+        :param previous: The stage the span starts from.
+        :param name: The name of the span.
+        :param thread: The name of the thread the span is shown on.
+        """
+        self.extraSpans.append((stage, previous, name, thread))
+
+    def collect(self, record):
+        """
+        collect: Keeps the timestamps of a recorded frame if it is one of the sampled frames.
+
+        Parameters:
+        :param record: The FrameRecord of the frame.
+        """
+        if not self.sampleEvery or record.frameNumber % self.sampleEvery:
+            return
+        with self.traceLock:
+            frames, _ = self.recordings.get(record.file, ([], 0))
+            frames.append((record.frameNumber, record.times))
+            self.recordings[record.file] = (frames, time.time())
+
+    def check(self, now=None):
+        """
+        check: Writes the recordings that have not had a frame added for the settle time.
+
+        Parameters:
+        :param now: The current time, now by default.
+        """
+        now = now or time.time()
+        with self.traceLock:
+            files = [file for file, (_, last) in self.recordings.items() if now - last > self.settle]
+        for file in files:
+            self.dump(file)
+
+    def dumpAll(self):
+        """ dumpAll: Writes every recording, such as when shutting down."""
+        with self.traceLock:
+            files = list(self.recordings)
+        for file in files:
+            self.dump(file)
+
+    def dump(self, file):
+        """
+        dump: Writes the trace file of a recording and forgets it.
+
+        Parameters:
+        :param file: The filename of the recording.
+        """
+        with self.traceLock:
+            frames, _ = self.recordings.pop(file, ([], 0))
+        if not frames:
+            return
+        spans = self.spans + tuple(self.extraSpans)
+        threads = []                                            # The thread names in the order they are shown.
+        for span in spans:
+            if span[3] not in threads:
+                threads.append(span[3])
+        start = min(times['captured'] for _, times in frames)   # Times are shown from the first traced frame.
+        events = []
+        # Pre-trigger frames can have negative numbers so each frame is shown as a process in frame order.
+        for pid, (frameNumber, times) in enumerate(sorted(frames, key=lambda frame: frame[0]), 1):
+            times = dict(times)                                 # A copy in case a stage is still stamping.
+            events.append({'name': 'process_name', 'ph': 'M', 'pid': pid,
+                           'args': {'name': 'Frame {:}'.format(frameNumber)}})
+            for tid, thread in enumerate(threads):
+                events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                               'args': {'name': thread}})
+            for stage, previous, name, thread in spans:
+                if stage in times and previous in times:
+                    events.append({'name': name, 'cat': 'frame', 'ph': 'X', 'pid': pid,
+                                   'tid': threads.index(thread), 'ts': (times[previous] - start) * 1e6,
+                                   'dur': max(times[stage] - times[previous], 0) * 1e6,
+                                   'args': {'frame': frameNumber}})
+        with open(file + self.suffix, 'w') as traceFile:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, traceFile)
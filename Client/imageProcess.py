@@ -93,47 +93,39 @@ class ImageProcess:
         blankProcess: A process that does nothing but pass the information.
 
         Parameters
-        :param data: The frame and its details to process.
-        data format: [frameBGRnpa, width, height, fps, frameNumber, timestamp, file, save]
-            frameBGRnpa: The raw frame.
+        :param data: The FrameRecord of the frame to process.
+        data attributes:
+            frame: The raw frame. Either BGR or single channel grayscale when the capture is in mono.
             width, height, fps, frameNumber, timestamp: Information about the frame. Do not change.
             file, save: Filename and a boolean whether this frame will be saved. Do not change.
-        :return results:
-        results format: [proFrameBGRnpa, width, height, fps, frameNumber, timestamp, information, file, save]
-            proFrameBGRnpa: The frame with alterations done to it.
-            width, height, fps, frameNumber, timestamp: Information about the frame. Do not change.
+        :return results: The same FrameRecord with the results filled in.
+        results attributes:
+            processed: The frame with alterations done to it.
             information: Bit encoded information that was obtained from the processing.
-            file, save: Filename and a boolean whether this frame will be saved. Do not change.
         """
-        # Separate out the data.
-        frameBGRnpa, width, height, fps, frameNumber, timestamp, file, save = data
         ## No Image Processing ##
         # Pass information to return.
-        proFrameBGRnpa = frameBGRnpa
-        information = b'None'
-        # Create format to return the information as.
-        results = [proFrameBGRnpa, width, height, fps, frameNumber, timestamp, information, file, save]
-        return results
+        data.processed = data.frame
+        data.information = b'None'
+        return data
 
     def __imageProcess0(self, data):
         """
         __imageProcess0: A template for new processes. [Change the name and the description when this function has content.]
 
         Parameters
-        :param data: The frame and its details to process.
-        data format: [frameBGRnpa, width, height, fps, frameNumber, timestamp, file, save]
-            frameBGRnpa: The raw frame.
+        :param data: The FrameRecord of the frame to process.
+        data attributes:
+            frame: The raw frame. Either BGR or single channel grayscale when the capture is in mono, check frame.ndim.
             width, height, fps, frameNumber, timestamp: Information about the frame. Do not change.
             file, save: Filename and a boolean whether this frame will be saved. Do not change.
-        :return results:
-        results format: [proFrameBGRnpa, width, height, fps, frameNumber, timestamp, information, file, save]
-            proFrameBGRnpa: The frame with alterations done to it.
-            width, height, fps, frameNumber, timestamp: Information about the frame. Do not change.
+        :return results: The same FrameRecord with the results filled in.
+        results attributes:
+            processed: The frame with alterations done to it.
             information: Bit encoded information that was obtained from the processing.
-            file, save: Filename and a boolean whether this frame will be saved. Do not change.
         """
         # Separate out the data.
-        frameBGRnpa, width, height, fps, frameNumber, timestamp, file, save = data
+        frameBGRnpa = data.frame
 
         ## Parameter Retrieval ##
         with self.paramsLock:
@@ -145,6 +137,7 @@ class ImageProcess:
 
         proFrameBGRnpa = frameBGRnpa
         information = b'Something interesting goes here.'
-        # Create format to return the information as.
-        results = [proFrameBGRnpa, width, height, fps, frameNumber, timestamp, information, file, save]
-        return results
\ No newline at end of file
+        # Fill in the record to return the information.
+        data.processed = proFrameBGRnpa
+        data.information = information
+        return data
\ No newline at end of file
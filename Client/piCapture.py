@@ -29,7 +29,6 @@ output: none
 # Default Libraries
 import time
 import threading
-import io
 
 # Downloaded Libraries
 import picamera
@@ -42,21 +41,25 @@ import baseCapture
 # Classes #
 
 class PiCameraCapture(baseCapture.CameraCapture):
-    def __init__(self, frameType='jpeg'):
+    def __init__(self, frameType='jpeg', bufferDepth=30, mono=False):
         """
         PiCameraCapture: An object that interacts with the Pi Camera to capture frames.
 
-        Required Modules: time, io, queue, threading, picamera
+        Required Modules: time, queue, threading, picamera
         Required Classes: None
         Methods: startCapture, endCapture, resetCapture, newFile, setDimFPS, waitUntil, mergeLocks, mergeCamParams,
-                 mergeReturnedData, __captureTask, __streams
+                 mergeReturnedData, __captureTask, __applyHotParams, __streams
 
         Class Attributes
         none
 
         Object Parameters & Attributes
         Parameters:
-        :param frameType: The type file the frame will be encoded as.
+        :param frameType: The type file the frame will be encoded as. Either 'jpeg', 'yuv' for unencoded YUV420 frames,
+                          or 'y-only' for unencoded frames where only the Y (luminance) plane is kept as grayscale.
+        :param bufferDepth: The number of preallocated frame buffers that are reused for capturing.
+        :param mono: Whether the frames are converted to single channel grayscale for processing and saving. Mono yuv
+                     frames are captured the same as y-only frames.
 
         Attributes:
         File Naming:
@@ -66,6 +69,10 @@ class PiCameraCapture(baseCapture.CameraCapture):
 
         Frame Handling:
         frameList: An array of temporary buffers that store the raw frames after they come from the encoder.
+        framePool: A pool of reusable buffers that store the raw frames until they have been converted.
+        captureFormat: The format the camera encoder produces.
+        rawType: The image type of the frames put on the frame queue.
+        outputType: The image type the frames should be converted to.
         fps: The capture speed of the camera.
         width: Frame width in pixels.
         height: Frame height in pixels.
@@ -75,6 +82,7 @@ class PiCameraCapture(baseCapture.CameraCapture):
         locks: The threading locks used by this object.
         camParams: The parameters for the camera.
         resetParams: A list of parameters that reset the camera.
+        hotParams: A list of parameters that are changed on the running camera without resetting it.
         returnedData: Information produced about the camera such as recoding state and frame rate.
         dimensionLock: A lock to prevent changing the resolution of the frame while the camera is capturing.
         sync: A synchronization event that causes the camera to start when the event is triggered.
@@ -90,12 +98,33 @@ class PiCameraCapture(baseCapture.CameraCapture):
         # Parameters
         self.frameType = frameType
 
+        # Frame Handling
+        # The encoder only makes jpeg or yuv frames, the y-only frames are yuv frames without the U and V planes.
+        if mono and frameType == 'yuv':                 # The U and V planes are not needed for grayscale.
+            frameType = 'y-only'
+        if frameType == 'jpeg':
+            self.captureFormat = 'jpeg'
+            self.rawType = 'JPEG'
+        elif frameType == 'yuv':
+            self.captureFormat = 'yuv'
+            self.rawType = 'YUV420'
+        elif frameType == 'y-only':
+            self.captureFormat = 'yuv'
+            self.rawType = 'Y'
+            self.outputType = 'GRAY'
+        else:
+            raise RuntimeError('Cannot capture ' + frameType + ' frames.')
+        if mono:                                        # JPEG frames only decode their luminance.
+            self.outputType = 'GRAY'
+        self.framePool = baseCapture.FrameBufferPool(depth=bufferDepth, bufferSize=self.width*self.height*3//2)
+
         # Threading
         self.camParams.update({'Mode': 0, 'X Resolution': 640, 'Y Resolution': 480, 'FPS': 30, 'Rotation': 0,
                                'Zoom': (0.0, 0.0, 1.0, 1.0), 'Shutter Speed': 0, 'ISO': 0, 'Meter Mode': 'average',
                                'Expo Comp': 0, 'Expo Mode': 'off', 'LED': False})
-        self.resetParams = ['Mode', 'X Resolution', 'Y Resolution', 'FPS', 'Rotation', 'LED', 'Zoom', 'Shutter Speed',
-                            'ISO', 'Meter Mode', 'Expo Comp', 'Expo Mode', 'LED', 'Filename']
+        # Only the sensor mode, resolution, and frame rate cannot be changed while the camera is capturing.
+        self.resetParams = ['Mode', 'X Resolution', 'Y Resolution', 'FPS']
+        self.hotParams = ['Rotation', 'Zoom', 'Shutter Speed', 'ISO', 'Meter Mode', 'Expo Comp', 'Expo Mode', 'LED']
         self.captureTask = self.__captureTask
         self.captureThread = threading.Thread(target=self.captureTask)
 
@@ -112,23 +141,20 @@ class PiCameraCapture(baseCapture.CameraCapture):
             while self.continueRunning.is_set():    # Set up the infinite capture loop.
                 # Setup the Camera
                 self.locks['stopFrameCap'].clear()                # Clear the stop capture event.
+                self._markReset()                   # Measure how long the restart takes.
                 self.frameNumber = 0                # Clear the frame numbering system.
                 self.frameList.clear()              # Clear the frames in the temporary array.
                 with self.locks['paramLock']:                     # Safely get the parameters for the camera.
                     # Set the camera parameters properly.
                     # The parameters for the camera are relatively self explanatory. Check the picamera documentation
                     # for detailed explanations of the parameters.
-                    camera.led = self.camParams['LED']
                     self.setDimFPS(self.camParams['X Resolution'], self.camParams['Y Resolution'],
                                    self.camParams['FPS'])
                     camera.resolution = (self.width, self.height)
+                    if self.rawType == 'Y':         # Keep only the Y plane which is padded to a multiple of 32x16.
+                        self.framePool.frameLimit = ((self.width + 31) // 32 * 32) * ((self.height + 15) // 16 * 16)
                     camera.framerate = self.fps
-                    camera.rotation = (self.camParams['Rotation'])
-                    camera.shutter_speed = self.camParams['Shutter Speed']
-                    camera.iso = self.camParams['ISO']
-                    camera.meter_mode = self.camParams['Meter Mode']
-                    camera.exposure_compensation = self.camParams['Expo Comp']
-                    camera.exposure_mode = self.camParams['Expo Mode']
+                    self.__applyHotParams(camera)
                     # Set a synchronization time to start the capture time at.
                     synctime = self.camParams['Sync Time']
                     # For statistics get the true camera mode.
@@ -139,6 +165,7 @@ class PiCameraCapture(baseCapture.CameraCapture):
                     self.syncRecord.clear()         # Reset sync recording for next time.
                     self.record.set()               # Set to record immediately when capturing.
                     print('Recording ' + self.fileList[-1])     # Notify recording the new file.
+                    self.startTime = synctime       # Measure how close to the time the recording starts.
                     self.waitUntil(synctime)  # Wait until sync time.
                 elif self.sync.is_set():              # When synchronizing capture times then:
                     self.sync.clear()               # Clear sync for next time.
@@ -149,20 +176,50 @@ class PiCameraCapture(baseCapture.CameraCapture):
                 # Refer to the pi camera documentation on why this is the best why to record video.
                 # The streams method acts as an infinite file-like-object generator that supplies temporary places to
                 # store frames before they are processed and saved.
-                camera.capture_sequence(self.__streams(), self.frameType, use_video_port=True)
+                camera.capture_sequence(self.__streams(camera), self.captureFormat, use_video_port=True)
+
+    def __applyHotParams(self, camera):
+        """
+        __applyHotParams: A private method that sets the parameters which can be changed while the camera is capturing.
+                          Must be called with the parameter lock.
 
-    def __streams(self):
+        Parameters:
+        :param camera: The PiCamera to set the parameters of.
+        """
+        camera.led = self.camParams['LED']
+        camera.rotation = (self.camParams['Rotation'])
+        camera.zoom = self.camParams['Zoom']
+        camera.shutter_speed = self.camParams['Shutter Speed']
+        camera.iso = self.camParams['ISO']
+        camera.meter_mode = self.camParams['Meter Mode']
+        camera.exposure_compensation = self.camParams['Expo Comp']
+        camera.exposure_mode = self.camParams['Expo Mode']
+
+    def __streams(self, camera):
         """
         __streams: A private method that acts as an infinite file-like-object generator which supplies temporary places
                    to store frames before they are processed and saved. Also it puts these frames on a queue to be
                    processed.
+
+        Parameters:
+        :param camera: The PiCamera that is capturing, so parameters can be changed between frames.
         """
         # Generate frames as long as told to continue running and not told to reset frame capture.
         while (not self.locks['stopFrameCap'].is_set()) and self.continueRunning.is_set():
-            self.frameList.append(io.BytesIO())     # Create a new place to store a frame.
-            yield self.frameList[-1]                # Yield the byte stream to camera and go make a frame.
+            if self.locks['applyParams'].is_set():  # Change parameters between frames without stopping the camera.
+                self.locks['applyParams'].clear()
+                with self.locks['paramLock']:
+                    self.__applyHotParams(camera)
+            frameBuffer = self.framePool.acquire()  # Get a reusable place to store a frame.
+            yield frameBuffer                       # Yield the buffer to camera and go make a frame.
             self.frameNumber += 1                   # When done increase the number of frames captured
+            timestamp = time.time()
+            startError = self._markFrame(timestamp)
             # Put the frame on the queue with its information. The are some unsafe interactions for speed, be careful!
-            # [Frame, width, height, FPS, frame number, current time, filename to save as, whether to save or not]
-            self.frameStreamq.put([self.frameList.pop(), self.width, self.height, self.fps,
-                                   self.frameNumber, time.time(), self.fileList[-1], self.record.is_set()])
\ No newline at end of file
+            # (Frame, width, height, FPS, frame number, current time, filename to save as, whether to save or not)
+            self.frameStreamq.put(baseCapture.FrameRecord(frameBuffer, self.width, self.height, self.fps,
+                                                          self.frameNumber, timestamp, self.fileList[-1],
+                                                          self.record.is_set(), startError))
+            if not self.frameNumber % max(int(self.fps), 1):  # About once a second update the buffer pool statistics.
+                with self.locks['statsLock']:
+                    self.returnedData.update(self.framePool.stats())
\ No newline at end of file
@@ -0,0 +1,512 @@
+#!/usr/bin/env python3
+"""
+processCapture.py
+
+Last Edited: 10/17/2026
+
+Lead Author[s]: agent
+Contributor[s]:
+
+
+Description:
+
+A class that runs another capture object in its own process so the timing of the capture is not slowed down by the
+threads converting, processing, and saving frames which all share one interpreter. The frames are written into a ring
+of shared memory and only small descriptions of the frames are sent back to be put on the frame queue.
+
+Machine I/O
+input: none
+output: none
+
+User I/O
+input: none
+output: none
+
+"""
+###############################################################################
+
+
+########## Librarys, Imports, & Setup ##########
+
+# Default Libraries
+import time
+import threading
+import multiprocessing
+from multiprocessing import shared_memory
+from queue import Empty
+
+# Downloaded Libraries
+import numpy
+
+# Custom Libraries
+import baseCapture
+
+########## Definitions ##########
+
+# Functions #
+
+def _describeCapture(captureClass, captureArgs, answerq):
+    """
+    _describeCapture: The task of a short lived process that makes the capture object and sends back its parameters
+                      and frame types, so the camera is only ever opened outside of the main process.
+
+    Parameters:
+    :param captureClass: The class of the capture object.
+    :param captureArgs: A dictionary of the arguments to make the capture object with.
+    :param answerq: A queue to send the parameters back with.
+    """
+    capture = captureClass(**captureArgs)
+    answerq.put((capture.camParams, capture.resetParams, capture.hotParams, capture.rawType, capture.outputType))
+
+
+def _captureProcess(captureClass, captureArgs, camParams, fileList, memoryName, slotSize, freeSlots, descriptors,
+                    paramq, events):
+    """
+    _captureProcess: The task of the capture process. It makes the capture object, links it to the shared events and
+                     the shared memory ring, and runs its capture task until the main process shuts down or asks
+                     for a new process.
+
+    Parameters:
+    :param captureClass: The class of the capture object to run.
+    :param captureArgs: A dictionary of the arguments to make the capture object with.
+    :param camParams: The camera parameters to start capturing with.
+    :param fileList: The video file names used so far.
+    :param memoryName: The name of the shared memory ring.
+    :param slotSize: The number of bytes in each slot of the ring.
+    :param freeSlots: A queue of the indexes of the slots that can be written to.
+    :param descriptors: A queue to send the descriptions of the frames back with.
+    :param paramq: A queue that receives new camera parameters, file names, and whether to reset or apply them.
+    :param events: A dictionary of the events shared with the main process.
+    """
+    memory = shared_memory.SharedMemory(name=memoryName)
+    capture = captureClass(**captureArgs)
+    capture.camParams.update(camParams)
+    capture.fileList = fileList
+    # Use the events of the main process so it controls when to capture and record. The process has its own running
+    # event so the main process can stop it without stopping itself.
+    running = threading.Event()
+    running.set()
+    capture.continueRunning = running
+    capture.record = events['record']
+    capture.syncRecord = events['syncRecord']
+    capture.sync = events['sync']
+    capture.frameStreamq = SharedFrameWriter(memory, slotSize, freeSlots, descriptors, capture)
+
+    def receiveParams():
+        """
+        receiveParams: Updates the parameters and restarts the capture whenever the main process sends them, and stops
+                       the capture when the main process shuts down or sends None.
+        """
+        while running.is_set():
+            try:
+                message = paramq.get(timeout=0.1)
+            except Empty:
+                if events['continueRunning'].is_set():
+                    continue
+                message = None                              # The main process is shutting down.
+            if message is None:                             # Stop capturing.
+                running.clear()
+                capture.locks['stopFrameCap'].set()
+                break
+            newParams, newFileList, reset = message
+            with capture.locks['paramLock']:
+                capture.camParams.update(newParams)
+                capture.fileList = newFileList
+            if reset:
+                capture.locks['stopFrameCap'].set()         # Restart the capture with the new parameters.
+            else:
+                capture.locks['applyParams'].set()          # Change the parameters without a restart.
+
+    paramThread = threading.Thread(target=receiveParams, daemon=True)
+    paramThread.start()
+    try:
+        capture.captureTask()                               # Capture until the main process says to shutdown.
+    finally:
+        descriptors.put(('End',))
+        del capture.frameStreamq
+        memory.close()
+
+
+# Classes #
+
+class SharedFrameSlot(baseCapture.FrameBuffer):
+    def __init__(self, ring, index, length):
+        """
+        SharedFrameSlot: The frame in one slot of the shared memory ring. It is used like a FrameBuffer so the frame
+                         manager reads it without copying and releases it once the frame is converted.
+
+        Required Modules: multiprocessing
+        Required Classes: FrameBuffer
+        Methods: getbuffer, release
+
+        Class Attributes
+        none
+
+        Object Parameters & Attributes
+        Parameters:
+        :param ring: The SharedFrameRing the slot is in.
+        :param index: The index of the slot in the ring.
+        :param length: The number of bytes of the frame.
+        """
+        # Setup Parent Class Attributes
+        super().__init__()
+
+        # Parameters
+        self.ring = ring
+        self.index = index
+        self.length = length
+
+    # Methods #
+    def getbuffer(self):
+        """ getbuffer: Returns a memoryview of the frame in shared memory."""
+        start = self.index * self.ring.slotSize
+        return self.ring.memory.buf[start:start + self.length]
+
+    def release(self):
+        """ release: Gives the slot back to the capture process once the frame has been converted."""
+        if self.ring:
+            self.ring.freeSlots.put(self.index)
+            self.ring = None                                # A slot can only be given back once.
+
+
+class SharedFrameRing:
+    def __init__(self, context, slots, slotSize):
+        """
+        SharedFrameRing: A block of shared memory split into equal slots that each hold one frame.
+
+        Required Modules: multiprocessing
+        Required Classes: None
+        Methods: unlink, close
+
+        Class Attributes
+        none
+
+        Object Parameters & Attributes
+        Parameters:
+        :param context: The multiprocessing context used to make the queues.
+        :param slots: The number of frames the ring holds.
+        :param slotSize: The number of bytes in each slot.
+
+        Attributes:
+        memory: The shared memory.
+        freeSlots: A queue of the indexes of the slots that can be written to.
+        """
+        # Parameters
+        self.slots = slots
+        self.slotSize = slotSize
+
+        # Attributes
+        self.memory = shared_memory.SharedMemory(create=True, size=slots * slotSize)
+        self.freeSlots = context.Queue()
+        for index in range(slots):
+            self.freeSlots.put(index)
+
+    # Methods #
+    def unlink(self):
+        """ unlink: Removes the name of the shared memory, frames that are still being converted can be read."""
+        try:
+            self.memory.unlink()
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        """ close: Frees the shared memory once the frames in it are no longer used."""
+        self.unlink()
+        try:
+            self.memory.close()
+        except BufferError:                                 # Frames still being converted keep it alive.
+            pass
+
+
+class SharedFrameWriter:
+    # Class Attributes
+    statsKeys = ('Reset Gap', 'Start Error', 'True Mode', 'Late Frames')   # The returned data the capture makes.
+
+    def __init__(self, memory, slotSize, freeSlots, descriptors, capture, timeout=0.05):
+        """
+        SharedFrameWriter: Takes the place of the frame queue in the capture process. Each frame is copied into a free
+                           slot of the ring and a description of it is sent to the main process.
+
+        Required Modules: multiprocessing, numpy
+        Required Classes: None
+        Methods: put, putControl
+
+        Class Attributes
+        statsKeys: The keys of the returned data that the capture object makes and are sent back. The main process
+                   keeps the rest, such as whether it is recording.
+
+        Object Parameters & Attributes
+        Parameters:
+        :param memory: The shared memory of the ring.
+        :param slotSize: The number of bytes in each slot.
+        :param freeSlots: A queue of the indexes of the slots that can be written to.
+        :param descriptors: A queue to send the descriptions of the frames with.
+        :param capture: The capture object whose returned data is sent back now and then.
+        :param timeout: The most time to wait for a free slot before dropping the frame.
+
+        Attributes:
+        overruns: The number of frames dropped because the ring was full.
+        oversized: The number of frames dropped because they were larger than the slots of the ring.
+        """
+        # Parameters
+        self.memory = memory
+        self.slotSize = slotSize
+        self.freeSlots = freeSlots
+        self.descriptors = descriptors
+        self.capture = capture
+        self.timeout = timeout
+
+        # Attributes
+        self.overruns = 0
+        self.oversized = 0
+
+    # Methods #
+    def put(self, record, block=True, timeout=None):
+        """
+        put: Copies a frame into the ring and sends its description.
+
+        Parameters:
+        :param record: The FrameRecord of the frame.
+        """
+        frame = record.frame
+        if isinstance(frame, baseCapture.FrameBuffer):      # Encoded frames are sent as bytes.
+            data = frame.getbuffer()
+            shape, dtype = None, None
+        else:                                               # Arrays are sent as bytes with their shape.
+            frame = numpy.ascontiguousarray(frame)
+            data = memoryview(frame).cast('B')
+            shape, dtype = frame.shape, frame.dtype.str
+        index = None
+        if len(data) > self.slotSize:                       # The ring was made for smaller frames.
+            self.oversized += 1
+            if self.oversized == 1:
+                print('Error: Frames of {:} bytes do not fit in the shared ring slots of {:} bytes'.format(
+                    len(data), self.slotSize))
+        else:
+            try:
+                index = self.freeSlots.get(timeout=self.timeout)
+            except Empty:                                   # The main process is behind so drop the frame.
+                self.overruns += 1
+        if index is not None:
+            start = index * self.slotSize
+            self.memory.buf[start:start + len(data)] = data
+            self.descriptors.put(('Frame', index, len(data), shape, dtype, record.width, record.height, record.fps,
+                                  record.frameNumber, record.timestamp, record.file, record.save,
+                                  record.startError))
+        del data
+        if isinstance(frame, baseCapture.FrameBuffer):      # The frame was copied so its buffer can be reused.
+            frame.release()
+        if not record.frameNumber % max(int(record.fps), 1):  # About once a second send the statistics.
+            returnedData = self.capture.returnedData
+            with self.capture.locks['statsLock']:
+                stats = {key: returnedData[key] for key in self.statsKeys if key in returnedData}
+            if hasattr(self.capture, 'framePool'):
+                stats.update(self.capture.framePool.stats())
+            stats.update({'Shared Ring Overruns': self.overruns, 'Shared Ring Oversized Frames': self.oversized})
+            self.descriptors.put(('Stats', stats))
+
+    def putControl(self, record):
+        """ putControl: Control items are not needed between processes so they are ignored."""
+        pass
+
+
+class ProcessCameraCapture(baseCapture.CameraCapture):
+    def __init__(self, captureClass, slots=16, slotSize=None, **captureArgs):
+        """
+        ProcessCameraCapture: An object that runs another capture object's capture task in its own process. The
+                              recording is still controlled from this process.
+
+        Required Modules: time, threading, multiprocessing, numpy
+        Required Classes: SharedFrameRing, SharedFrameSlot, SharedFrameWriter
+        Methods: startCapture, endCapture, resetCapture, newFile, setDimFPS, waitUntil, mergeLocks, mergeCamParams,
+                 mergeReturnedData, __describe, __slotSize, __captureTask, __sendParams, __receiveFrame
+
+        Class Attributes
+        none
+
+        Object Parameters & Attributes
+        Parameters:
+        :param captureClass: The class of the capture object to run in its own process, such as PiCameraCapture.
+        :param slots: The number of frames the shared memory ring holds.
+        :param slotSize: The number of bytes in each slot. By default it fits a BGR frame at the set resolution, and
+                         the ring is made again when a reset changes to a larger resolution.
+        :param captureArgs: The arguments to make the capture object with.
+
+        Attributes:
+        File Naming:
+        fileList: List of all the video file names used.
+        previousFile: The previous video file name.
+        extraFileCount: An extra number added to video file names when their name has been used multiple times.
+
+        Frame Handling:
+        fps: The capture speed of the camera.
+        width: Frame width in pixels.
+        height: Frame height in pixels.
+        frameStreamq: A queue to hold the raw frames to be processed.
+        rawType: The image type of the frames put on the frame queue.
+        outputType: The image type the frames should be converted to.
+        ring: The shared memory ring the capture process writes frames into.
+        framePool: A pool of the memory that frame arrays are copied into out of the ring.
+
+        Threading and Timing:
+        locks: The threading locks used by this object.
+        camParams: The parameters for the camera.
+        resetParams: A list of the parameters that require the camera to reset.
+        returnedData: Information produced about the camera such as recoding state and frame rate.
+        context: The multiprocessing context used to start the capture process.
+        sync, syncRecord, record, continueRunning: The same events as other captures but shared with the process.
+        captureThread: The thread that starts the capture process and puts its frames on the frame queue.
+        recorderThread: A thread that controls whether the frames are being recorded/saved.
+        """
+        # Setup Parent Class Attributes
+        super().__init__()
+
+        # Parameters
+        self.captureClass = captureClass
+        self.captureArgs = captureArgs
+        self.slots = slots
+        self.slotSize = slotSize
+
+        # Threading
+        # The process must be spawned since this process already has running threads.
+        self.context = multiprocessing.get_context('spawn')
+
+        # Attributes
+        self.__describe()
+        self.returnedData.update({'Shared Ring Overruns': 0, 'Shared Ring Oversized Frames': 0})
+        self.ring = None
+        self.framePool = baseCapture.FrameArrayPool(name='Received')
+        self.sync = self.context.Event()
+        self.syncRecord = self.context.Event()
+        self.record = self.context.Event()
+        self.continueRunning = self.context.Event()
+        self.captureTask = self.__captureTask
+        self.captureThread = threading.Thread(target=self.captureTask)
+
+    # Methods #
+    def __describe(self):
+        """
+        __describe: A private method that learns the parameters and frame types of the capture object from a short
+                    lived process, so the camera is not opened by this process.
+        """
+        answerq = self.context.Queue()
+        process = self.context.Process(target=_describeCapture, args=(self.captureClass, self.captureArgs, answerq))
+        process.start()
+        while True:
+            try:
+                camParams, self.resetParams, self.hotParams, self.rawType, self.outputType = answerq.get(timeout=0.1)
+                break
+            except Empty:
+                if not process.is_alive():                  # The capture object could not be made.
+                    raise RuntimeError('Could not make a ' + self.captureClass.__name__ + ' capture object.')
+        process.join()
+        self.camParams.update(camParams)
+
+    def __slotSize(self, camParams):
+        """
+        __slotSize: A private method that gives the number of bytes in each slot of the ring for the parameters.
+
+        Parameters:
+        :param camParams: The camera parameters.
+        :return: The slot size, which fits a BGR frame at the resolution unless a size was set.
+        """
+        return self.slotSize or ((camParams['X Resolution'] + 31) // 32 * 32) * \
+                                ((camParams['Y Resolution'] + 15) // 16 * 16) * 3
+
+    def __captureTask(self):
+        """
+        __captureTask: A private method that starts the capture process and puts the frames it makes on the frame
+                       queue. It also sends the camera parameters to the process whenever the capture is reset, and
+                       starts a new process with a larger ring when the frames no longer fit in the slots.
+        """
+        restart = True
+        while restart and self.continueRunning.is_set():
+            # Setup the Ring
+            with self.locks['paramLock']:
+                camParams = dict(self.camParams)
+            slotSize = self.__slotSize(camParams)
+            if self.ring:                                   # Let go of the last ring.
+                self.ring.close()
+            self.ring = SharedFrameRing(self.context, self.slots, slotSize)
+            descriptors = self.context.Queue()
+            paramq = self.context.Queue()
+            events = {'continueRunning': self.continueRunning, 'record': self.record, 'syncRecord': self.syncRecord,
+                      'sync': self.sync}
+
+            # Start the Process
+            process = self.context.Process(target=_captureProcess,
+                                           args=(self.captureClass, self.captureArgs, camParams, list(self.fileList),
+                                                 self.ring.memory.name, slotSize, self.ring.freeSlots, descriptors,
+                                                 paramq, events))
+            process.start()
+            self.locks['stopFrameCap'].clear()
+
+            # Receive Frames
+            restart = False
+            while True:
+                if self.locks['stopFrameCap'].is_set():     # Pass on a reset to the capture process.
+                    restart = self.__sendParams(paramq, reset=True) or restart
+                elif self.locks['applyParams'].is_set():    # Pass on parameters that are changed while capturing.
+                    self.__sendParams(paramq, reset=False)
+                try:
+                    message = descriptors.get(timeout=0.1)
+                except Empty:
+                    if not process.is_alive():              # Stop if the process ended without saying so.
+                        break
+                    continue
+                if message[0] == 'Frame':
+                    self.__receiveFrame(message)
+                elif message[0] == 'Stats':
+                    with self.locks['statsLock']:
+                        self.returnedData.update(message[1])
+                else:                                       # The capture process has ended.
+                    break
+
+            # Shutdown the Process
+            paramq.put(None)
+            process.join()
+            self.ring.unlink()
+
+    def __sendParams(self, paramq, reset):
+        """
+        __sendParams: A private method that sends the camera parameters and file names to the capture process which
+                      then resets its capture or applies them while capturing.
+
+        Parameters:
+        :param paramq: The queue that the capture process receives parameters from.
+        :param reset: Whether the capture process should restart its capture.
+        :return: Whether the capture process was stopped so one with a larger ring can be started.
+        """
+        self.locks['applyParams'].clear()
+        if reset:
+            self.locks['stopFrameCap'].clear()
+        with self.locks['paramLock']:
+            camParams = dict(self.camParams)
+        self.setDimFPS(camParams['X Resolution'], camParams['Y Resolution'], camParams['FPS'])
+        if reset and self.__slotSize(camParams) > self.ring.slotSize:  # The new frames would not fit in the ring.
+            paramq.put(None)
+            return True
+        paramq.put((camParams, list(self.fileList), reset))
+        return False
+
+    def __receiveFrame(self, message):
+        """
+        __receiveFrame: A private method that turns a frame description into a FrameRecord on the frame queue.
+
+        Parameters:
+        :param message: The description of the frame from the capture process.
+        """
+        kind, index, length, shape, dtype, width, height, fps, frameNumber, timestamp, file, save, startError = message
+        frame = SharedFrameSlot(self.ring, index, length)
+        if shape is not None:
+            # Arrays go straight to processing and saving where they are kept, so they are copied out of the ring
+            # into pooled memory and the slot is given back right away.
+            array = self.framePool.acquire(shape, dtype)
+            numpy.copyto(array, numpy.frombuffer(frame.getbuffer(), dtype=dtype).reshape(shape))
+            frame.release()
+            frame = array
+        self.frameStreamq.put(baseCapture.FrameRecord(frame, width, height, fps, frameNumber, timestamp, file, save,
+                                                      startError))
+        if shape is not None and not frameNumber % max(int(fps), 1):  # About once a second update the statistics.
+            with self.locks['statsLock']:
+                self.returnedData.update(self.framePool.stats())
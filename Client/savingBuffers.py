@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+savingBuffers.py
+
+Last Edited: 10/17/2026
+
+Lead Author[s]: agent
+Contributor[s]:
+
+
+Description:
+
+The buffers that SavingThread holds frames in between taking them off its queue and writing them. Frames reach the
+savers out of order when several threads convert them, so a ReorderBuffer puts them back in order by frame number and
+gives up on the frames that never arrive, which keeps a dropped frame from holding up a recording forever. A
+MappedRecording copies raw frames straight into a memory-mapped file in any order without encoding them.
+
+Machine I/O
+input: none
+output: [Recording]Raw.dat files with a [Recording]Raw.json header
+
+User I/O
+input: none
+output: none
+
+"""
+###############################################################################
+
+
+########## Librarys, Imports, & Setup ##########
+
+# Default Libraries
+import os
+import time
+import json
+import heapq
+
+# Downloaded Libraries
+import numpy
+
+########## Definitions ##########
+
+# Classes #
+
+class ReorderBuffer:
+    def __init__(self, name='', maxFrames=300, memoryLimit=256*2**20, maxGap=120, timeout=2.0):
+        """
+        ReorderBuffer: Puts frames that arrive out of order back in order by frame number. The early frames wait in a
+                       heap until the frames before them arrive. Frames that never arrive, because they were dropped or
+                       shed, are declared missing once too many frames are waiting, too much memory is held, the gap
+                       is too large, or the gap has been open too long, so frames are never held forever.
+
+        Required Modules: time, heapq
+        Required Classes: None
+        Methods: reset, push, expire, flush, isWaiting, __pop, __skip
+
+        Class Attributes
+        none
+
+        Object Parameters & Attributes
+        Parameters:
+        :param name: The name printed when frames are declared missing.
+        :param maxFrames: The most frames that may wait.
+        :param memoryLimit: The most bytes of frames that may wait.
+        :param maxGap: The most frames that may be missing between the next frame and the earliest waiting frame.
+        :param timeout: How many seconds a gap may stay open before its frames are declared missing.
+
+        Attributes:
+        heap: The waiting frames as (frame number, arrival order, size, record).
+        nextNumber: The number of the next frame to give out.
+        heldBytes: The number of bytes of the waiting frames.
+        arrivals: A counter that keeps frames with the same number in arrival order.
+        waitingSince: The time the current gap was opened, or None when nothing is waiting.
+        file: The file of the frames, used when logging the missing frames.
+        missing: A list of the (file, first, last) frame numbers that were declared missing.
+        missingCount: The total number of frames declared missing.
+        lateCount: The number of frames that arrived after they were declared missing and were thrown away.
+        """
+        # Parameters
+        self.name = name
+        self.maxFrames = maxFrames
+        self.memoryLimit = memoryLimit
+        self.maxGap = maxGap
+        self.timeout = timeout
+
+        # Attributes
+        self.heap = []
+        self.nextNumber = 1
+        self.heldBytes = 0
+        self.arrivals = 0
+        self.waitingSince = None
+        self.file = None
+        self.missing = []
+        self.missingCount = 0
+        self.lateCount = 0
+
+    # Methods #
+    def reset(self, nextNumber, file=None):
+        """
+        reset: Starts a new sequence of frames, such as a new recording. Any frames still waiting should be flushed first.
+
+        Parameters:
+        :param nextNumber: The number of the first frame of the sequence.
+        :param file: The file the frames belong to.
+        """
+        self.heap.clear()
+        self.heldBytes = 0
+        self.waitingSince = None
+        self.nextNumber = nextNumber
+        self.file = file
+
+    def push(self, record, size=0):
+        """
+        push: Adds a frame and returns the frames that are now in order.
+
+        Parameters:
+        :param record: The FrameRecord of the frame.
+        :param size: The number of bytes the frame holds while it waits.
+        :return: A list of the FrameRecords ready to be written in order.
+        """
+        if record.frameNumber < self.nextNumber:            # It was already declared missing.
+            self.lateCount += 1
+            return []
+        heapq.heappush(self.heap, (record.frameNumber, self.arrivals, size, record))
+        self.arrivals += 1
+        self.heldBytes += size
+        ready = self.__pop()
+        # When waiting any longer would hold too much, give up on the frames in the gap.
+        while self.heap and (len(self.heap) > self.maxFrames or self.heldBytes > self.memoryLimit or
+                             self.heap[0][0] - self.nextNumber > self.maxGap):
+            self.__skip()
+            ready.extend(self.__pop())
+        return ready
+
+    def expire(self, now=None):
+        """
+        expire: Gives up on a gap that has been open longer than the timeout.
+
+        Parameters:
+        :param now: The current time, now by default.
+        :return: A list of the FrameRecords ready to be written in order.
+        """
+        if self.waitingSince is None or (now or time.time()) - self.waitingSince < self.timeout:
+            return []
+        self.__skip()
+        return self.__pop()
+
+    def flush(self):
+        """
+        flush: Gives out every waiting frame in order, declaring the gaps between them missing.
+
+        :return: A list of the FrameRecords in order.
+        """
+        ready = []
+        while self.heap:
+            self.__skip()
+            ready.extend(self.__pop())
+        return ready
+
+    def isWaiting(self):
+        """ isWaiting: Returns whether any frames are waiting for the frames before them."""
+        return bool(self.heap)
+
+    def __pop(self):
+        """ __pop: A private method that takes the frames that are next in order off the heap."""
+        ready = []
+        while self.heap and self.heap[0][0] <= self.nextNumber:
+            frameNumber, arrival, size, record = heapq.heappop(self.heap)
+            self.heldBytes -= size
+            if frameNumber == self.nextNumber:
+                ready.append(record)
+                self.nextNumber += 1
+            else:                                           # A second frame with the same number is thrown away.
+                self.lateCount += 1
+        if not self.heap:
+            self.waitingSince = None
+        elif ready or self.waitingSince is None:            # A new gap has been opened.
+            self.waitingSince = time.time()
+        return ready
+
+    def __skip(self):
+        """ __skip: A private method that declares the frames before the earliest waiting frame missing."""
+        first, last = self.nextNumber, self.heap[0][0] - 1
+        if last >= first:
+            self.missing.append((self.file, first, last))
+            self.missingCount += last - first + 1
+            print('{:}: frames {:}-{:} of {:} never arrived'.format(self.name, first, last, self.file))
+        self.nextNumber = self.heap[0][0]
+
+
+class MappedRecording:
+    def __init__(self, path, frameShape, dtype, fps=0, firstNumber=1, growFrames=256):
+        """
+        MappedRecording: A recording whose frames are copied straight into a memory-mapped file of shape
+                         (frames, height, width[, channels]) without encoding them. Each frame goes to the slot of its
+                         frame number so frames can arrive in any order. The file grows as frames arrive and a small
+                         JSON header is written next to it when it is closed, so it can be opened with numpy.memmap.
+
+        Required Modules: os, json, numpy
+        Required Classes: None
+        Methods: write, close, __grow
+
+        Class Attributes
+        none
+
+        Object Parameters & Attributes
+        Parameters:
+        :param path: The path of the data file, the header has the same name ending in .json.
+        :param frameShape: The shape of each frame.
+        :param dtype: The data type of the frames.
+        :param fps: The frame rate saved in the header.
+        :param firstNumber: The number of the first frame of the recording, which gets the first slot so earlier frames
+                            that arrive late still have a slot.
+        :param growFrames: The fewest slots the file grows by at a time, it otherwise doubles.
+
+        Attributes:
+        headerPath: The path of the JSON header.
+        frameBytes: The number of bytes of each frame.
+        baseNumber: The frame number of the first slot.
+        capacity: The number of slots the file has room for.
+        mapped: The memory-mapped frames.
+        written: Whether each slot has been written.
+        startError: How late the recording started, saved in the header.
+        """
+        # Parameters
+        self.path = path
+        self.frameShape = tuple(frameShape)
+        self.dtype = numpy.dtype(dtype)
+        self.fps = fps
+        self.firstNumber = firstNumber
+        self.growFrames = growFrames
+
+        # Attributes
+        self.headerPath = os.path.splitext(path)[0] + '.json'
+        self.frameBytes = int(numpy.prod(self.frameShape)) * self.dtype.itemsize
+        self.baseNumber = None
+        self.capacity = 0
+        self.mapped = None
+        self.written = numpy.zeros(0, bool)
+        self.startError = None
+        open(path, 'wb').close()                            # Start with an empty file.
+
+    # Methods #
+    def write(self, frameNumber, frame):
+        """
+        write: Copies a frame into the slot of its frame number.
+
+        Parameters:
+        :param frameNumber: The number of the frame.
+        :param frame: The frame, shaped like the other frames.
+        :return: Whether the frame was written, frames from before the first slot or of another size are not.
+        """
+        if self.baseNumber is None:
+            self.baseNumber = min(frameNumber, self.firstNumber)
+        slot = frameNumber - self.baseNumber
+        if slot < 0 or frame.shape != self.frameShape:
+            return False
+        if slot >= self.capacity:
+            self.__grow(slot + 1)
+        self.mapped[slot] = frame
+        self.written[slot] = True
+        return True
+
+    def close(self):
+        """
+        close: Flushes the frames, trims the file to the written frames, and writes the header.
+
+        :return: A list of the (first, last) frame numbers of the frames missing between the written ones.
+        """
+        slots = numpy.flatnonzero(self.written)
+        if self.mapped is not None:
+            self.mapped.flush()
+            self.mapped = None                              # Unmap the file before trimming it.
+        first, last = (int(slots[0]), int(slots[-1])) if len(slots) else (0, -1)
+        os.truncate(self.path, (last + 1) * self.frameBytes)
+        # The ranges of unwritten slots between the first and last written slots.
+        missing = []
+        if len(slots) > 1:
+            gaps = numpy.flatnonzero(numpy.diff(slots) > 1)
+            missing = [(int(slots[gap]) + 1 + self.baseNumber, int(slots[gap + 1]) - 1 + self.baseNumber)
+                       for gap in gaps]
+        header = {'dtype': self.dtype.str, 'shape': [last - first + 1] + list(self.frameShape),
+                  'offset': first * self.frameBytes, 'firstFrame': first + (self.baseNumber or 0), 'fps': self.fps,
+                  'startError': self.startError, 'missingFrames': missing}
+        with open(self.headerPath, 'w') as headerFile:
+            json.dump(header, headerFile, indent=1)
+        return missing
+
+    def __grow(self, slots):
+        """
+        __grow: A private method that makes the file large enough for a number of slots and maps it again.
+
+        Parameters:
+        :param slots: The fewest slots the file needs.
+        """
+        capacity = max(slots, self.capacity * 2, self.capacity + self.growFrames)
+        if self.mapped is not None:
+            self.mapped.flush()
+        os.truncate(self.path, capacity * self.frameBytes)
+        self.mapped = numpy.memmap(self.path, self.dtype, 'r+', shape=(capacity,) + self.frameShape)
+        written = numpy.zeros(capacity, bool)
+        written[:self.capacity] = self.written
+        self.written = written
+        self.capacity = capacity
@@ -0,0 +1,494 @@
+#!/usr/bin/env python3
+"""
+stageGraph.py
+
+Last Edited: 10/17/2026
+
+Lead Author[s]: agent
+Contributor[s]:
+
+
+Description:
+
+Classes that pass frames through a graph of stages. Each stage has an input queue and either its own worker threads
+that run a task on every frame or an object with its own threads, such as a saver, that takes frames off the queue.
+Stages are joined by edges with an optional condition, and a frame is sent down every edge whose condition it meets.
+The same FrameRecord is sent down every edge so frames are never copied. Stages can be added, removed, or joined
+differently without changing any thread loops. A StageScaler can change how many worker threads a stage has while
+frames are flowing, based on how deep its queue is and whether the frame delay is growing.
+
+Machine I/O
+input: none
+output: none
+
+User I/O
+input: none
+output: none
+
+"""
+###############################################################################
+
+
+########## Librarys, Imports, & Setup ##########
+
+# Default Libraries
+import time
+import threading
+
+# Custom Libraries
+import baseCapture
+
+########## Definitions ##########
+
+# Classes #
+
+class Stage:
+    # Class Attributes
+    retireSignal = baseCapture.ControlSignal('Retire')  # Tells one worker thread to end.
+
+    def __init__(self, name, task=None, threadCount=1, inputq=None, start=None, end=None, restart=None):
+        """
+        Stage: A step in a StageGraph that frames are sent to. A stage with a task runs the task on each frame with its
+               own worker threads and sends the frame the task returns down its edges. A stage without a task but with
+               an input queue only fills the queue for an object that empties it with its own threads. A stage with
+               neither is a junction that sends each frame straight down its edges.
+
+        Required Modules: time, threading
+        Required Classes: FrameQueue, ControlSignal
+        Methods: isJunction, send, route, startStage, endStage, setThreadCount, stats, __workTask
+
+        Class Attributes
+        retireSignal: The ControlSignal that tells one worker thread to end without ending the stage.
+
+        Object Parameters & Attributes
+        Parameters:
+        :param name: The name of the stage, also used for its queue settings and statistics.
+        :param task: A function that takes a FrameRecord and returns the FrameRecord to send on, or None to stop it.
+        :param threadCount: The number of worker threads running the task.
+        :param inputq: The queue frames wait in before the stage. One is made when the stage has a task without one.
+        :param start: A function that starts the object emptying the input queue.
+        :param end: A function that ends the object emptying the input queue once the queue is empty.
+        :param restart: A function that starts the object again after it has ended. start is used when not given.
+
+        Attributes:
+        edges: A list of the stages frames are sent to and the condition a frame must meet to be sent there.
+        continueRunning: An event that keeps the worker threads alive.
+        threadList: The list of the worker threads.
+        threadLock: A lock to safely change the worker threads while frames are flowing.
+        retiring: The number of retire signals that no worker thread has taken yet. It is changed with the
+                  statistics lock since the threads change it while the stage is ending.
+        retired: The worker threads that have taken a retire signal, which may still be finishing.
+        started: Whether the stage has been started before, so the object is restarted instead of started.
+        statsLock: A lock to safely change the counters.
+        count: The number of frames the stage has taken in.
+        lastCount: The count the last time the statistics were taken.
+        lastTime: The time the statistics were last taken.
+        """
+        # Parameters
+        self.name = name
+        self.task = task
+        self.threadCount = threadCount
+        if inputq is None and task is not None:
+            inputq = baseCapture.FrameQueue()
+        self.inputq = inputq
+        self.start = start
+        self.end = end
+        self.restart = restart
+
+        # Attributes
+        self.edges = []
+        self.continueRunning = threading.Event()
+        self.threadList = []
+        self.threadLock = threading.Lock()
+        self.retiring = 0
+        self.retired = set()
+        self.started = False
+        self.statsLock = threading.Lock()
+        self.count = 0
+        self.lastCount = 0
+        self.lastTime = time.time()
+
+    # Methods #
+    def isJunction(self):
+        """ isJunction: Returns whether the stage sends frames straight down its edges instead of queueing them."""
+        return self.inputq is None
+
+    def send(self, record):
+        """
+        send: Gives a frame to the stage.
+
+        Parameters:
+        :param record: The FrameRecord of the frame.
+        """
+        with self.statsLock:
+            self.count += 1
+        if self.isJunction():
+            self.route(record)
+        else:
+            self.inputq.put(record)
+
+    def route(self, record):
+        """
+        route: Sends a frame down every edge whose condition it meets. Every stage gets the same record.
+
+        Parameters:
+        :param record: The FrameRecord of the frame.
+        """
+        for target, condition in self.edges:
+            if condition is None or condition(record):
+                target.send(record)
+
+    def startStage(self):
+        """ startStage: Starts the worker threads or the object that empties the input queue."""
+        if self.task is not None:
+            with self.threadLock:
+                self.retiring = 0
+                self.retired = set()
+                self.continueRunning.set()
+                self.threadList = [threading.Thread(target=self.__workTask) for worker in range(self.threadCount)]
+                for worker in self.threadList:
+                    worker.start()
+        elif self.started and self.restart:
+            self.restart()
+        elif self.start:
+            self.start()
+        self.started = True
+
+    def endStage(self):
+        """ endStage: Waits until the input queue is empty then ends the worker threads or the object."""
+        if self.task is not None:
+            self.inputq.join()                          # Wait for all the frames to be handled.
+            with self.threadLock:
+                self.continueRunning.clear()            # Instruct all threads to shutdown.
+                # Each thread still working gets one stop signal, a thread waiting to retire takes a retire signal.
+                with self.statsLock:
+                    working = [worker for worker in self.threadList
+                               if worker.is_alive() and worker not in self.retired]
+                    signals = len(working) - self.retiring
+                for worker in range(signals):
+                    self.inputq.putControl(self.inputq.stopSignal)
+                for worker in self.threadList:          # Wait for the threads to shutdown.
+                    worker.join()
+                self.threadList.clear()
+        elif self.end:
+            self.end()
+
+    def setThreadCount(self, threadCount):
+        """
+        setThreadCount: Changes the number of worker threads. While the stage is running threads are started right away
+                        and threads are retired once they finish the frame they are on.
+
+        Parameters:
+        :param threadCount: The number of worker threads, at least one.
+        """
+        threadCount = max(int(threadCount), 1)
+        with self.threadLock:
+            self.threadCount = threadCount
+            if self.task is None or not self.continueRunning.is_set():
+                return
+            self.threadList = [worker for worker in self.threadList if worker.is_alive()]
+            with self.statsLock:
+                self.retired &= set(self.threadList)
+                working = len(self.threadList) - len(self.retired) - self.retiring
+            for worker in range(threadCount - working):     # Add threads.
+                self.threadList.append(threading.Thread(target=self.__workTask))
+                self.threadList[-1].start()
+            for worker in range(working - threadCount):     # Retire threads with a retire signal each.
+                with self.statsLock:
+                    self.retiring += 1
+                self.inputq.putControl(self.retireSignal)
+
+    def stats(self):
+        """ stats: Returns the frames per second the stage took in since it was last asked and its queue depth."""
+        now = time.time()
+        with self.statsLock:
+            rate = (self.count - self.lastCount) / max(now - self.lastTime, 1e-6)
+            self.lastCount = self.count
+            self.lastTime = now
+        depth = self.inputq.qsize() if self.inputq is not None else 0
+        return {self.name + ' Rate': rate, self.name + ' Depth': depth}
+
+    def __workTask(self):
+        """ __workTask: A thread task that runs the task on each frame in the input queue and sends it on."""
+        while self.continueRunning.is_set():
+            record = self.inputq.get()
+            if record is self.retireSignal:             # Only this thread ends.
+                with self.statsLock:
+                    self.retiring -= 1
+                    self.retired.add(threading.current_thread())
+                self.inputq.task_done()
+                return
+            if record is not self.inputq.stopSignal:    # The stop signal only wakes the thread to see the stage end.
+                record = self.task(record)
+                if record is not None:
+                    self.route(record)
+            self.inputq.task_done()                     # Tell the queue we are done with the given information.
+
+
+class StageGraph:
+    def __init__(self):
+        """
+        StageGraph: A set of stages joined by edges that frames flow through. The graph starts the stages from the last
+                    to the first so every stage is ready before frames are sent to it, and ends them from the first to
+                    the last so every frame sent to a stage is handled before it ends.
+
+        Required Modules: None
+        Required Classes: Stage
+        Methods: addStage, removeStage, connect, disconnect, addDependency, send, order, startGraph, endGraph, queues,
+                 stats
+
+        Class Attributes
+        none
+
+        Object Parameters & Attributes
+        Parameters:
+        none
+
+        Attributes:
+        stages: A dictionary of the stages by name, in the order they were added.
+        dependencies: A list of pairs of stages where the second is started before and ended after the first without
+                      frames being sent between them, such as a stage a task sends frames to with graph.send.
+        running: Whether the graph has been started and not ended, so stages added to it are started right away.
+        """
+        # Attributes
+        self.stages = {}
+        self.dependencies = []
+        self.running = False
+
+    # Methods #
+    def addStage(self, name, task=None, threadCount=1, inputq=None, start=None, end=None, restart=None):
+        """
+        addStage: Adds a stage to the graph, replacing any stage with the same name. While the graph is running the
+                  stage is started right away, so connect it after it is added.
+
+        Parameters:
+        :param name: The name of the stage.
+        :param task: A function that takes a FrameRecord and returns the FrameRecord to send on, or None to stop it.
+        :param threadCount: The number of worker threads running the task.
+        :param inputq: The queue frames wait in before the stage.
+        :param start: A function that starts the object emptying the input queue.
+        :param end: A function that ends the object emptying the input queue once the queue is empty.
+        :param restart: A function that starts the object again after it has ended.
+        :return: The new Stage.
+        """
+        if name in self.stages:
+            self.removeStage(name)
+        self.stages[name] = Stage(name, task, threadCount, inputq, start, end, restart)
+        if self.running:
+            self.stages[name].startStage()
+        return self.stages[name]
+
+    def removeStage(self, name):
+        """
+        removeStage: Takes a stage and every edge to it out of the graph.
+
+        Parameters:
+        :param name: The name of the stage.
+        """
+        stage = self.stages.pop(name)
+        for other in self.stages.values():
+            other.edges = [(target, condition) for target, condition in other.edges if target is not stage]
+        self.dependencies = [(first, second) for first, second in self.dependencies if stage not in (first, second)]
+
+    def connect(self, source, target, condition=None):
+        """
+        connect: Adds an edge so the frames leaving one stage are sent to another.
+
+        Parameters:
+        :param source: The name of the stage the frames leave.
+        :param target: The name of the stage the frames are sent to.
+        :param condition: An optional function of a FrameRecord that returns whether to send it down the edge.
+        """
+        self.stages[source].edges.append((self.stages[target], condition))
+
+    def disconnect(self, source, target):
+        """
+        disconnect: Removes the edges between two stages.
+
+        Parameters:
+        :param source: The name of the stage the frames leave.
+        :param target: The name of the stage the frames are sent to.
+        """
+        stage = self.stages[target]
+        self.stages[source].edges = [(other, condition) for other, condition in self.stages[source].edges
+                                     if other is not stage]
+
+    def addDependency(self, source, target):
+        """
+        addDependency: Orders two stages as if they were joined by an edge, for a stage whose task sends frames to
+                       another with send instead of down an edge.
+
+        Parameters:
+        :param source: The name of the stage that ends first.
+        :param target: The name of the stage that ends after the source.
+        """
+        self.dependencies.append((self.stages[source], self.stages[target]))
+
+    def send(self, name, record):
+        """
+        send: Gives a frame to a stage from outside the graph or from within a task. A task should only send frames to
+              stages after its own, so they are not ended while it can still send to them. Add a dependency when
+              there is no edge between them.
+
+        Parameters:
+        :param name: The name of the stage.
+        :param record: The FrameRecord of the frame.
+        """
+        self.stages[name].send(record)
+
+    def order(self):
+        """
+        order: Sorts the stages so every stage comes after all the stages that send frames to it or it depends on.
+
+        :return: A list of the stages.
+        """
+        following = {stage: [target for target, condition in stage.edges] for stage in self.stages.values()}
+        for source, target in self.dependencies:
+            following[source].append(target)
+        incoming = {stage: 0 for stage in self.stages.values()}
+        for targets in following.values():
+            for target in targets:
+                incoming[target] += 1
+        ready = [stage for stage in self.stages.values() if not incoming[stage]]
+        ordered = []
+        while ready:
+            stage = ready.pop(0)
+            ordered.append(stage)
+            for target in following[stage]:
+                incoming[target] -= 1
+                if not incoming[target]:
+                    ready.append(target)
+        if len(ordered) != len(self.stages):
+            raise RuntimeError('The stage graph cannot have a loop.')
+        return ordered
+
+    def startGraph(self):
+        """ startGraph: Starts every stage, the last stages first."""
+        for stage in reversed(self.order()):
+            stage.startStage()
+        self.running = True
+
+    def endGraph(self):
+        """ endGraph: Ends every stage once the stages before it have ended and its queue is empty."""
+        self.running = False
+        for stage in self.order():
+            stage.endStage()
+
+    def queues(self):
+        """ queues: Returns a dictionary of the input queues of the stages by name."""
+        return {name: stage.inputq for name, stage in self.stages.items() if stage.inputq is not None}
+
+    def stats(self):
+        """ stats: Returns the rate and queue depth of every stage to be put in the returned data."""
+        stats = {}
+        for stage in self.stages.values():
+            stats.update(stage.stats())
+        return stats
+
+
+class StageScaler:
+    def __init__(self, graph, bounds, interval=1, highDepth=8, idleChecks=5, slopeLimit=0.1):
+        """
+        StageScaler: A threaded object that adds worker threads to a stage when frames are waiting in its queue or the
+                     frame delay is growing, and retires them again once the queue has stayed empty, keeping each stage
+                     between the bounds it was given. A heavier processing function then gets more threads without
+                     changing the thread counts in the code.
+
+        Required Modules: threading
+        Required Classes: StageGraph
+        Methods: startScaling, endScaling, setSlope, check, stats, __scaleTask
+
+        Class Attributes
+        none
+
+        Object Parameters & Attributes
+        Parameters:
+        :param graph: The StageGraph whose stages are scaled.
+        :param bounds: A dictionary of stage names with a tuple of the fewest and most worker threads the stage may
+                       have. For example: {'Raw Frame': (1, 4), 'Processing': (1, 4)}
+        :param interval: How many seconds between checks of the stages.
+        :param highDepth: How many frames waiting in a stage's queue causes a thread to be added.
+        :param idleChecks: How many checks in a row a stage's queue must be empty before a thread is retired.
+        :param slopeLimit: How fast the frame delay may grow in ms/s before a thread is added.
+
+        Attributes:
+        slopes: A dictionary of stage names with how fast their frame delay was last found to grow in ms/s.
+        idle: A dictionary of stage names with how many checks in a row their queue was empty.
+        lock: A lock to safely change the slopes.
+        continueRunning: An event that keeps the thread alive.
+        scaleThread: The thread that checks the stages.
+        """
+        # Parameters
+        self.graph = graph
+        self.bounds = bounds
+        self.interval = interval
+        self.highDepth = highDepth
+        self.idleChecks = idleChecks
+        self.slopeLimit = slopeLimit
+
+        # Attributes
+        self.slopes = {}
+        self.idle = {name: 0 for name in bounds}
+        self.lock = threading.Lock()
+        self.continueRunning = threading.Event()
+        self.scaleThread = None
+
+    # Methods #
+    def startScaling(self):
+        """ startScaling: Starts checking the stages."""
+        if not self.continueRunning.is_set():
+            self.continueRunning.set()
+            self.scaleThread = threading.Thread(target=self.__scaleTask)
+            self.scaleThread.start()
+
+    def endScaling(self):
+        """ endScaling: Stops checking the stages so they keep the threads they have."""
+        self.continueRunning.clear()
+        if self.scaleThread:
+            self.scaleThread.join()
+
+    def setSlope(self, name, slope):
+        """
+        setSlope: Tells the scaler how fast the frame delay through a stage is growing. It is used once at the next
+                  check.
+
+        Parameters:
+        :param name: The name of the stage.
+        :param slope: How fast the frame delay is growing in ms/s.
+        """
+        with self.lock:
+            self.slopes[name] = slope
+
+    def check(self):
+        """ check: Adds a thread to each stage that is falling behind and retires one from each that has been idle."""
+        for name, (fewest, most) in self.bounds.items():
+            stage = self.graph.stages.get(name)
+            if stage is None or stage.task is None:
+                continue
+            with self.lock:
+                slope = self.slopes.pop(name, 0)
+            depth = stage.inputq.qsize()
+            count = stage.threadCount
+            if count < fewest or count > most:              # Bring the stage within its bounds.
+                stage.setThreadCount(min(max(count, fewest), most))
+            elif (depth >= self.highDepth or slope > self.slopeLimit) and count < most:
+                stage.setThreadCount(count + 1)
+                self.idle[name] = 0
+            elif depth == 0 and count > fewest:
+                self.idle[name] = self.idle.get(name, 0) + 1
+                if self.idle[name] >= self.idleChecks:
+                    stage.setThreadCount(count - 1)
+                    self.idle[name] = 0
+            else:
+                self.idle[name] = 0
+
+    def stats(self):
+        """ stats: Returns the number of worker threads of each scaled stage to be put in the returned data."""
+        return {name + ' Threads': self.graph.stages[name].threadCount for name in self.bounds
+                if name in self.graph.stages}
+
+    def __scaleTask(self):
+        """ __scaleTask: A thread task that checks the stages every interval."""
+        while self.continueRunning.is_set():
+            self.check()
+            time.sleep(self.interval)
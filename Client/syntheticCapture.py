@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+syntheticCapture.py
+
+Last Edited: 10/17/2026
+
+Lead Author[s]: agent
+Contributor[s]:
+
+
+Description:
+
+A class that produces frames without a camera, either from a generated pattern or by replaying a recording. It is used
+to load test the frame management on a computer and to find the highest frame rate that can be sustained before using
+a real camera.
+
+Machine I/O
+input: An optional AVI, HDF5, or TIFF recording to replay.
+output: none
+
+User I/O
+input: none
+output: none
+
+"""
+###############################################################################
+
+
+########## Librarys, Imports, & Setup ##########
+
+# Default Libraries
+import time
+import threading
+import os
+
+# Downloaded Libraries
+import numpy
+import cv2
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+# Custom Libraries
+import baseCapture
+
+########## Definitions ##########
+
+# Classes #
+
+class SyntheticCameraCapture(baseCapture.CameraCapture):
+    def __init__(self, source=None, pattern='gradient', dataset=None, loop=True, mono=False, bufferDepth=30):
+        """
+        SyntheticCameraCapture: An object that produces frames at a precise rate without a camera.
+
+        Required Modules: time, queue, threading, os, numpy, cv2, h5py (only when replaying HDF5)
+        Required Classes: None
+        Methods: startCapture, endCapture, resetCapture, newFile, setDimFPS, waitUntil, mergeLocks, mergeCamParams,
+                 mergeReturnedData, __captureTask, __frameSource, __patternFrames, __videoFrames, __hdf5Frames,
+                 __tiffFrames, __fitFrame
+
+        Class Attributes
+        none
+
+        Object Parameters & Attributes
+        Parameters:
+        :param source: An optional AVI, HDF5, or TIFF file to replay. When none is given a pattern is generated.
+        :param pattern: The generated pattern, either gradient, checkerboard, or noise.
+        :param dataset: The name of the dataset to replay from a HDF5 file. The first 3D or 4D dataset by default.
+        :param loop: Whether to start the replay over once the end of the recording is reached.
+        :param mono: Whether the frames are converted to single channel grayscale for processing and saving.
+        :param bufferDepth: The number of frame arrays whose memory is kept and made into frames again.
+
+        Attributes:
+        File Naming:
+        fileList: List of all the video file names used.
+        previousFile: The previous video file name.
+        extraFileCount: An extra number added to video file names when their name has been used multiple times.
+
+        Frame Handling:
+        frameList: An array of temporary buffers that store the raw frames after they come from the encoder.
+        framePool: A pool of the memory frames are made in, which is reused once every holder drops a frame.
+        fps: The capture speed of the camera.
+        width: Frame width in pixels.
+        height: Frame height in pixels.
+        frameStreamq: A queue to hold the raw frames to be processed.
+
+        Threading and Timing:
+        locks: The threading locks used by this object.
+        camParams: The parameters for the camera.
+        resetParams: A list of the parameters that require the camera to reset.
+        hotParams: A list of the parameters that are changed between frames without resetting.
+        returnedData: Information produced about the camera such as recoding state and frame rate.
+        dimensionLock: A lock to prevent changing the resolution of the frame while the camera is capturing.
+        sync: A synchronization event that causes the camera to start when the event is triggered.
+        syncRecord: A synchronization event that causes the camera to start and record when the event is triggered.
+        record: An event that starts recording.
+        continueRunning: An event that tells all the threads to stay alive and shutdown.
+        captureThread: The thread that sets up capture and creates the frames.
+        recorderThread: A thread that controls whether the frames are being recorded/saved.
+        """
+        # Setup Parent Class Attributes
+        super().__init__()
+
+        # Parameters
+        self.source = source
+        self.dataset = dataset
+        self.loop = loop
+        if mono:
+            self.outputType = 'GRAY'
+
+        # Attributes
+        self.framePool = baseCapture.FrameArrayPool(depth=bufferDepth)
+        self.camParams.update({'X Resolution': 640, 'Y Resolution': 480, 'FPS': 30, 'Pattern': pattern})
+        self.resetParams = ['X Resolution', 'Y Resolution', 'FPS']
+        self.hotParams = ['Pattern']
+        self.returnedData.update({'Late Frames': 0})
+        self.captureTask = self.__captureTask
+        self.captureThread = threading.Thread(target=self.captureTask)
+
+    # Methods #
+    def __captureTask(self):
+        """
+        __captureTask: A private method that continuously creates frames at the set frame rate and puts them into a
+                       queue for processing. The method stays in an infinite loop until a different thread clears the
+                       continueRunning event.
+        """
+        lateFrames = 0                                      # The number of frames that could not be made in time.
+        while self.continueRunning.is_set():
+            self.locks['stopFrameCap'].clear()              # Clear the stop capture event.
+            self._markReset()                               # Measure how long the restart takes.
+            self.frameNumber = 0                            # Clear the frame numbering system.
+
+            with self.locks['paramLock']:
+                self.setDimFPS(self.camParams['X Resolution'], self.camParams['Y Resolution'],
+                               self.camParams['FPS'])
+                pattern = self.camParams['Pattern']
+                # Set a synchronization time to start the capture time at.
+                synctime = self.camParams['Sync Time']
+            frames = self.__frameSource(pattern)            # Create the generator that supplies the frames.
+
+            # Setup the Capture Timing
+            if self.syncRecord.is_set():                    # If recording at sync time then:
+                self.syncRecord.clear()                     # Reset sync recording for next time.
+                self.record.set()                           # Set to record immediately when capturing.
+                print('Recording ' + self.fileList[-1])     # Notify recording the new file.
+                self.startTime = synctime                   # Measure how close to the time the recording starts.
+                self.waitUntil(synctime)                    # Wait until sync time.
+            elif self.sync.is_set():                        # When synchronizing capture times then:
+                self.sync.clear()                           # Clear sync for next time.
+                self.waitUntil(synctime)                    # Wait until sync time.
+
+            # Frames are released on a fixed schedule rather than sleeping a frame period after each frame so the time
+            # taken to make and queue a frame does not slow down the frame rate.
+            period = 1 / self.fps
+            nextFrame = time.perf_counter()
+            # Set up the infinite capture loop.
+            while (not self.locks['stopFrameCap'].is_set()) and self.continueRunning.is_set():
+                if self.locks['applyParams'].is_set():      # Change the pattern between frames without a restart.
+                    self.locks['applyParams'].clear()
+                    with self.locks['paramLock']:
+                        pattern = self.camParams['Pattern']
+                    frames = self.__frameSource(pattern)
+                img = next(frames, None)
+                if img is None:                             # When the replay is over wait for new orders.
+                    self.locks['stopFrameCap'].wait(timeout=0.1)
+                    continue
+                delay = nextFrame - time.perf_counter()
+                if delay > 0:                               # Wait for the time the frame would have been captured.
+                    time.sleep(delay)
+                elif delay < -period:                       # When more than a frame behind restart the schedule.
+                    lateFrames += 1
+                    nextFrame = time.perf_counter()
+                nextFrame += period
+                self.frameNumber += 1                       # When done increase the number of frames captured
+                timestamp = time.time()
+                startError = self._markFrame(timestamp)
+                # Put the frame on the queue with its information. The are some unsafe interactions for speed, be careful!
+                # (Frame, width, height, FPS, frame number, current time, filename to save as, whether to save or not)
+                self.frameStreamq.put(baseCapture.FrameRecord(img, self.width, self.height, self.fps,
+                                                              self.frameNumber, timestamp, self.fileList[-1],
+                                                              self.record.is_set(), startError))
+                if not self.frameNumber % max(int(self.fps), 1):  # About once a second update the statistics.
+                    with self.locks['statsLock']:
+                        self.returnedData['Late Frames'] = lateFrames
+                        self.returnedData.update(self.framePool.stats())
+
+    def __frameSource(self, pattern):
+        """
+        __frameSource: A private method that chooses where the frames come from based on the source file's extension.
+
+        Parameters:
+        :param pattern: The pattern to generate when there is no source file.
+        :return: A generator of BGR frames at the set resolution.
+        """
+        if not self.source:
+            return self.__patternFrames(pattern)
+        extension = os.path.splitext(self.source)[1].lower()
+        if extension in ('.h5', '.hdf5'):
+            return self.__hdf5Frames()
+        elif extension in ('.tif', '.tiff'):
+            return self.__tiffFrames()
+        else:
+            return self.__videoFrames()
+
+    def __patternFrames(self, pattern):
+        """
+        __patternFrames: A private generator that creates a moving pattern. Every frame is made in pooled memory since
+                         frames are held by other threads after they are queued.
+
+        Parameters:
+        :param pattern: The pattern to generate, either gradient, checkerboard, or noise.
+        """
+        width, height = self.width, self.height
+        if pattern == 'noise':
+            randomizer = numpy.random.default_rng()
+            while True:
+                yield randomizer.integers(0, 256, (height, width, 3), dtype=numpy.uint8)
+        elif pattern == 'checkerboard':
+            rows, columns = numpy.indices((height, width))
+            base = ((rows // 32 + columns // 32) % 2 * 255).astype(numpy.uint8)
+        else:
+            base = numpy.tile(numpy.linspace(0, 255, width, dtype=numpy.uint8), (height, 1))
+        base = cv2.cvtColor(base, cv2.COLOR_GRAY2BGR)
+        shift = 0
+        while True:
+            img = self.framePool.acquire(base.shape)
+            img[:, shift:] = base[:, :width - shift]       # Move the pattern a little every frame.
+            img[:, :shift] = base[:, width - shift:]
+            yield img
+            shift = (shift + 4) % width
+
+    def __videoFrames(self):
+        """ __videoFrames: A private generator that replays a video file that OpenCV can read."""
+        video = cv2.VideoCapture(self.source)
+        if not video.isOpened():
+            raise RuntimeError('Cannot replay ' + self.source)
+        try:
+            while True:
+                ret, img = video.read(image=self.framePool.acquire((self.height, self.width, 3)))
+                if not ret:
+                    if not self.loop:
+                        return
+                    video.set(cv2.CAP_PROP_POS_FRAMES, 0)    # Go back to the start of the video.
+                    continue
+                yield self.__fitFrame(img)
+        finally:
+            video.release()
+
+    def __hdf5Frames(self):
+        """ __hdf5Frames: A private generator that replays the frames of a HDF5 dataset."""
+        if h5py is None:
+            raise RuntimeError('Cannot replay ' + self.source + ' without h5py.')
+        with h5py.File(self.source, 'r') as file:
+            if self.dataset:
+                data = file[self.dataset]
+            else:                                           # Find the first dataset that looks like a movie.
+                data = None
+                for name in file:
+                    if isinstance(file[name], h5py.Dataset) and file[name].ndim in (3, 4):
+                        data = file[name]
+                        break
+                if data is None:
+                    raise RuntimeError('There are no movies in ' + self.source)
+            while True:
+                for index in range(data.shape[0]):
+                    yield self.__fitFrame(data[index])
+                if not self.loop:
+                    return
+
+    def __tiffFrames(self):
+        """ __tiffFrames: A private generator that replays the pages of a multi-page TIFF."""
+        ret, pages = cv2.imreadmulti(self.source, flags=cv2.IMREAD_UNCHANGED)
+        if not ret:
+            raise RuntimeError('Cannot replay ' + self.source)
+        pages = [self.__fitFrame(page) for page in pages]   # Prepare the pages once since they are reused.
+        while True:
+            for page in pages:
+                img = self.framePool.acquire(page.shape)
+                numpy.copyto(img, page)
+                yield img
+            if not self.loop:
+                return
+
+    def __fitFrame(self, img):
+        """
+        __fitFrame: A private method that changes a replayed frame to an 8 bit BGR frame at the set resolution.
+
+        Parameters:
+        :param img: The frame from the recording.
+        :return: The frame ready to be queued.
+        """
+        if img.dtype != numpy.uint8:                        # Scale deeper recordings down to 8 bits.
+            if numpy.issubdtype(img.dtype, numpy.integer):
+                img = cv2.convertScaleAbs(img, alpha=255 / numpy.iinfo(img.dtype).max)
+            else:
+                img = cv2.convertScaleAbs(img, alpha=255)
+        if img.ndim == 2:
+            img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+        if img.shape[1] != self.width or img.shape[0] != self.height:
+            img = cv2.resize(img, (self.width, self.height), interpolation=cv2.INTER_AREA)
+        return img
@@ -0,0 +1,73 @@
+import numpy
+
+import baseCapture
+
+
+def makeRecord(frameNumber, timestamp=None, file='Trial', frame=None):
+    record = baseCapture.FrameRecord(frame, 4, 2, 30, frameNumber,
+                                     float(frameNumber) if timestamp is None else timestamp, file, True)
+    record.saveFrame = frame
+    return record
+
+
+def numbers(records):
+    return [record.frameNumber for record in records]
+
+
+# PreTriggerBuffer #
+
+def test_pretrigger_numbers_kept_frames_up_to_zero():
+    preTrigger = baseCapture.PreTriggerBuffer(frames=3)
+    frame = numpy.zeros((2, 4), numpy.uint8)
+    for frameNumber in (5, 6, 8, 9):                        # Frame 7 was dropped before it was kept.
+        preTrigger.add(makeRecord(frameNumber, frame=frame))
+    sent = []
+    first = makeRecord(2, timestamp=10.0, file='Recording', frame=frame)
+    preTrigger.flush(first, sent.append)
+    assert numbers(sent) == [-2, -1, 0, 2]
+    assert [record.timestamp for record in sent[:3]] == [6.0, 8.0, 9.0]
+    assert all(record.file == 'Recording' and record.save for record in sent)
+    assert preTrigger.lastFlushed == 3
+    assert preTrigger.firstNumber('Recording') == -2
+    assert preTrigger.firstNumber('Other') == 1
+
+
+def test_pretrigger_flushes_once_per_recording():
+    preTrigger = baseCapture.PreTriggerBuffer(frames=2)
+    frame = numpy.zeros((2, 4), numpy.uint8)
+    preTrigger.add(makeRecord(1, frame=frame))
+    sent = []
+    preTrigger.flush(makeRecord(1, timestamp=5.0, file='Recording'), sent.append)
+    preTrigger.flush(makeRecord(2, timestamp=6.0, file='Recording'), sent.append)
+    assert numbers(sent) == [0, 1, 2]
+    preTrigger.add(makeRecord(3, timestamp=4.0, frame=frame))   # From before the flush so it is not kept.
+    assert len(preTrigger.ring) == 0
+
+
+# FrameQueue #
+
+def makePreview(frameNumber):
+    record = makeRecord(frameNumber)
+    record.save = False
+    return record
+
+
+def test_frame_queue_never_drops_or_inspects_control_signals():
+    stop = baseCapture.FrameQueue.stopSignal
+    oldest = baseCapture.FrameQueue(2, 'drop oldest')
+    oldest.putControl(stop)
+    oldest.put(makeRecord(1))
+    oldest.put(makeRecord(2))
+    assert oldest.queue[0] is stop and oldest.queue[1].frameNumber == 2
+    unsaved = baseCapture.FrameQueue(2, 'drop unsaved')
+    unsaved.putControl(stop)
+    unsaved.put(makePreview(1))
+    unsaved.put(makePreview(2))                              # Would ask whether the signal is recorded.
+    assert unsaved.queue[0] is stop and unsaved.dropped == 1
+
+
+def test_frame_queue_puts_control_signals_when_full():
+    blocking = baseCapture.FrameQueue(1, 'block')
+    blocking.put(makeRecord(1))
+    blocking.putControl(baseCapture.FrameQueue.stopSignal)
+    assert blocking.qsize() == 2
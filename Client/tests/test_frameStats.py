@@ -0,0 +1,49 @@
+import random
+import statistics
+
+import pytest
+
+import frameStats
+
+
+def test_running_stats_match_the_batch_results():
+    samples = [(x * 0.5, 3.0 + 2.0 * x + random.Random(x).uniform(-0.1, 0.1)) for x in range(50)]
+    stats = frameStats.RunningStats()
+    for x, y in samples:
+        stats.add(x, y)
+    ys = [y for x, y in samples]
+    assert stats.count == 50
+    assert stats.meanY == pytest.approx(statistics.mean(ys))
+    assert stats.variance() == pytest.approx(statistics.variance(ys))
+    assert stats.std() == pytest.approx(statistics.stdev(ys))
+    assert stats.slope() == pytest.approx(4.0, rel=1e-2)
+    assert stats.maximum == max(ys)
+
+
+def test_running_stats_without_enough_samples():
+    stats = frameStats.RunningStats()
+    assert (stats.variance(), stats.slope()) == (0.0, 0.0)
+    stats.add(1.0, 5.0)
+    assert (stats.variance(), stats.slope(), stats.maximum) == (0.0, 0.0, 5.0)
+    stats.reset()
+    assert stats.count == 0
+
+
+def test_latency_histogram_percentiles_within_a_bucket():
+    histogram = frameStats.LatencyHistogram(minimum=0.05, growth=1.08)
+    for delay in range(1, 101):
+        histogram.add(float(delay))
+    assert histogram.count == 100
+    for percent, delay in ((50, 50.0), (90, 90.0), (99, 99.0)):
+        assert delay <= histogram.percentile(percent) <= delay * 1.08
+
+
+def test_latency_histogram_edges():
+    histogram = frameStats.LatencyHistogram(minimum=0.05, growth=1.08, bucketCount=10)
+    assert histogram.percentile(50) == 0.0
+    histogram.add(0.01)
+    assert histogram.percentile(100) == 0.05
+    histogram.add(1e6)                                      # Larger delays are counted in the last bucket.
+    assert histogram.buckets[-1] == 1
+    histogram.reset()
+    assert histogram.count == 0 and sum(histogram.buckets) == 0
@@ -0,0 +1,86 @@
+import json
+
+import numpy
+
+import baseCapture
+import savingBuffers
+
+
+def makeRecord(frameNumber, file='Trial'):
+    return baseCapture.FrameRecord(None, 4, 2, 30, frameNumber, float(frameNumber), file, True)
+
+
+def numbers(records):
+    return [record.frameNumber for record in records]
+
+
+# ReorderBuffer #
+
+def test_reorder_gives_out_frames_in_order():
+    reorder = savingBuffers.ReorderBuffer()
+    reorder.reset(1, 'Trial')
+    assert numbers(reorder.push(makeRecord(2))) == []
+    assert numbers(reorder.push(makeRecord(3))) == []
+    assert numbers(reorder.push(makeRecord(1))) == [1, 2, 3]
+    assert not reorder.isWaiting()
+
+
+def test_reorder_expires_an_old_gap():
+    reorder = savingBuffers.ReorderBuffer(timeout=2.0)
+    reorder.reset(1, 'Trial')
+    reorder.push(makeRecord(1))
+    reorder.push(makeRecord(4))
+    waitingSince = reorder.waitingSince
+    assert reorder.expire(waitingSince + 1.0) == []
+    assert numbers(reorder.expire(waitingSince + 2.0)) == [4]
+    assert reorder.missing == [('Trial', 2, 3)]
+    assert reorder.missingCount == 2
+    assert reorder.waitingSince is None
+
+
+def test_reorder_skips_a_gap_that_is_too_large():
+    reorder = savingBuffers.ReorderBuffer(maxGap=5)
+    reorder.reset(1, 'Trial')
+    assert numbers(reorder.push(makeRecord(10))) == [10]
+    assert reorder.missing == [('Trial', 1, 9)]
+
+
+def test_reorder_counts_late_frames():
+    reorder = savingBuffers.ReorderBuffer()
+    reorder.reset(1, 'Trial')
+    reorder.push(makeRecord(3))
+    reorder.flush()
+    assert reorder.push(makeRecord(2)) == []
+    assert reorder.lateCount == 1
+
+
+# MappedRecording #
+
+def test_mapped_recording_trims_and_reports_missing(tmp_path):
+    path = str(tmp_path / 'TrialRaw.dat')
+    recording = savingBuffers.MappedRecording(path, (2, 3), numpy.uint8, fps=30, firstNumber=1)
+    for frameNumber in (3, 2, 6):
+        assert recording.write(frameNumber, numpy.full((2, 3), frameNumber, numpy.uint8))
+    assert not recording.write(7, numpy.zeros((3, 3), numpy.uint8))     # A frame of another size.
+    assert recording.close() == [(4, 5)]
+    with open(str(tmp_path / 'TrialRaw.json')) as headerFile:
+        header = json.load(headerFile)
+    assert header['firstFrame'] == 2
+    assert header['shape'] == [5, 2, 3]
+    assert header['missingFrames'] == [[4, 5]]
+    frames = numpy.memmap(path, dtype=header['dtype'], mode='r', offset=header['offset'],
+                          shape=tuple(header['shape']))
+    assert [int(frame[0, 0]) for frame in frames] == [2, 3, 0, 0, 6]
+
+
+def test_mapped_recording_keeps_frames_before_the_first_arrival(tmp_path):
+    path = str(tmp_path / 'TrialRaw.dat')
+    recording = savingBuffers.MappedRecording(path, (1,), numpy.uint8, firstNumber=-4)
+    assert recording.write(1, numpy.ones(1, numpy.uint8))
+    assert recording.write(-4, numpy.ones(1, numpy.uint8))
+    assert not recording.write(-5, numpy.ones(1, numpy.uint8))
+    recording.close()
+    with open(str(tmp_path / 'TrialRaw.json')) as headerFile:
+        header = json.load(headerFile)
+    assert header['firstFrame'] == -4
+    assert header['shape'] == [6, 1]
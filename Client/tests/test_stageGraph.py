@@ -0,0 +1,79 @@
+import threading
+import time
+
+import baseCapture
+import stageGraph
+
+
+def makeRecord(frameNumber, save=False):
+    return baseCapture.FrameRecord(None, 4, 2, 30, frameNumber, float(frameNumber), 'Trial', save)
+
+
+def waitFor(condition, timeout=2.0):
+    end = time.time() + timeout
+    while not condition() and time.time() < end:
+        time.sleep(0.01)
+    return condition()
+
+
+# Retiring worker threads #
+
+def test_retired_threads_leave_no_signals_behind():
+    done = []
+    stage = stageGraph.Stage('Work', task=lambda record: done.append(record.frameNumber),
+                             threadCount=3, inputq=baseCapture.FrameQueue(4, 'drop unsaved'))
+    stage.startStage()
+    stage.setThreadCount(1)
+    assert waitFor(lambda: len([worker for worker in stage.threadList if worker.is_alive()]) == 1)
+    for frameNumber in range(1, 4):
+        stage.send(makeRecord(frameNumber, save=True))
+    stage.endStage()
+    assert sorted(done) == [1, 2, 3]
+    assert stage.inputq.qsize() == 0 and stage.inputq.unfinished_tasks == 0
+    assert not stage.threadList
+
+
+def test_threads_retire_while_frames_are_dropped():
+    release = threading.Event()
+    stage = stageGraph.Stage('Work', task=lambda record: release.wait(), threadCount=2,
+                             inputq=baseCapture.FrameQueue(2, 'drop oldest'))
+    stage.startStage()
+    stage.setThreadCount(1)                                 # The retire signal waits behind the busy threads.
+    for frameNumber in range(1, 20):
+        stage.send(makeRecord(frameNumber))
+    release.set()
+    assert waitFor(lambda: len([worker for worker in stage.threadList if worker.is_alive()]) == 1)
+    stage.endStage()
+    assert stage.inputq.qsize() == 0
+
+
+# Ordering stages #
+
+def test_dependency_orders_stages_without_an_edge():
+    graph = stageGraph.StageGraph()
+    graph.addStage('Save', task=lambda record: None)
+    graph.addStage('Junction')
+    graph.addStage('Convert', task=lambda record: graph.send('Junction', record))
+    graph.connect('Junction', 'Save')
+    graph.addDependency('Convert', 'Junction')
+    assert [stage.name for stage in graph.order()] == ['Convert', 'Junction', 'Save']
+    graph.removeStage('Junction')
+    assert not graph.dependencies
+
+
+def test_stage_added_while_running_is_started():
+    graph = stageGraph.StageGraph()
+    graph.addStage('Process', task=lambda record: record)
+    graph.startGraph()
+    streamed = baseCapture.FrameQueue()
+    events = []
+    graph.addStage('Stream', inputq=streamed, start=lambda: events.append('start'),
+                   end=lambda: events.append('end'))
+    graph.connect('Process', 'Stream')
+    assert events == ['start']
+    graph.send('Process', makeRecord(1))
+    assert waitFor(lambda: streamed.qsize() == 1)
+    graph.endGraph()
+    assert events == ['start', 'end']
+    graph.addStage('Late', inputq=baseCapture.FrameQueue(), start=lambda: events.append('late'))
+    assert 'late' not in events                             # An ended graph starts it with the rest.
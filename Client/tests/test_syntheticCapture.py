@@ -0,0 +1,84 @@
+import time
+
+import numpy
+import cv2
+import pytest
+
+import syntheticCapture
+
+
+class FrameCollector:
+    """ Takes the place of the frame queue and keeps every frame put on it, optionally taking a while to do so."""
+    def __init__(self, delay=0, delayEvery=0):
+        self.records = []
+        self.delay = delay
+        self.delayEvery = delayEvery
+
+    def put(self, record, block=True, timeout=None):
+        self.records.append(record)
+        if self.delayEvery and not len(self.records) % self.delayEvery:
+            time.sleep(self.delay)
+
+
+def runCapture(seconds, collector=None, params=None, **captureArgs):
+    capture = syntheticCapture.SyntheticCameraCapture(**captureArgs)
+    capture.camParams.update({'X Resolution': 64, 'Y Resolution': 48, 'FPS': 50})
+    capture.camParams.update(params or {})
+    capture.frameStreamq = collector or FrameCollector()
+    capture.startCapture()
+    time.sleep(seconds)
+    capture.endCapture()
+    return capture, capture.frameStreamq.records
+
+
+def test_gradient_moves_across_the_frame():
+    capture, records = runCapture(0.3, pattern='gradient')
+    assert len(records) > 5
+    first, second = records[0].frame, records[1].frame
+    assert first.shape == (48, 64, 3) and first.dtype == numpy.uint8
+    assert numpy.array_equal(second[:, 4:], first[:, :-4])
+    assert numpy.array_equal(second[:, :4], first[:, -4:])
+
+
+def test_checkerboard_and_noise_patterns():
+    capture, records = runCapture(0.2, pattern='checkerboard')
+    assert set(numpy.unique(records[0].frame)) == {0, 255}
+    capture, records = runCapture(0.2, pattern='noise')
+    assert not numpy.array_equal(records[0].frame, records[1].frame)
+
+
+def test_frames_follow_a_fixed_schedule():
+    capture, records = runCapture(1.0, params={'FPS': 50})
+    assert [record.frameNumber for record in records] == list(range(1, len(records) + 1))
+    assert 40 <= len(records) <= 55
+    timestamps = numpy.array([record.timestamp for record in records])
+    # The schedule does not drift even though each frame takes time to make and queue.
+    assert (timestamps[-1] - timestamps[0]) / (len(records) - 1) == pytest.approx(1 / 50, rel=0.05)
+    assert capture.returnedData['Late Frames'] == 0
+
+
+def test_frames_more_than_a_period_behind_are_late():
+    collector = FrameCollector(delay=0.25, delayEvery=3)    # Every third frame holds up the schedule.
+    capture, records = runCapture(2.0, collector, params={'FPS': 10})
+    assert capture.returnedData['Late Frames'] >= 2
+
+
+def test_replays_a_tiff_once_at_the_set_resolution(tmp_path):
+    path = str(tmp_path / 'Replay.tiff')
+    pages = [numpy.full((24, 32), value, numpy.uint16) for value in (1000, 20000, 60000)]
+    assert cv2.imwritemulti(path, pages)
+    capture, records = runCapture(0.5, source=path, loop=False)
+    assert len(records) == 3
+    for record, page in zip(records, pages):
+        assert record.frame.shape == (48, 64, 3)
+        assert int(record.frame[0, 0, 0]) == round(int(page[0, 0]) * 255 / 65535)
+
+
+def test_replays_a_hdf5_dataset(tmp_path):
+    h5py = pytest.importorskip('h5py')
+    path = str(tmp_path / 'Replay.hdf5')
+    with h5py.File(path, 'w') as file:
+        levels = numpy.arange(4, dtype=numpy.uint8)[:, None, None, None]
+        file['frames'] = numpy.ones((4, 48, 64, 3), numpy.uint8) * levels
+    capture, records = runCapture(0.5, source=path, loop=False)
+    assert [int(record.frame[0, 0, 0]) for record in records] == [0, 1, 2, 3]
@@ -0,0 +1,47 @@
+import math
+
+import numpy
+
+import baseCapture
+import timestampLog
+
+
+def test_records_round_trip(tmp_path):
+    record = baseCapture.FrameRecord(None, 4, 2, 30, 7, 100.5, 'Trial', True, startError=0.002)
+    record.stamp('dequeued', 100.6)
+    record.stamp('converted', 100.7)
+    path = str(tmp_path / 'TrialTimestamps.bin')
+    with open(path, 'wb') as dataSheet:
+        dataSheet.write(timestampLog.packRecord(record, 101.0))
+        dataSheet.write(timestampLog.packDropped(8))
+    assert timestampLog.recordStruct.size == timestampLog.recordType.itemsize
+    records = timestampLog.loadTimestamps(path)
+    assert list(records['frameNumber']) == [7, 8]
+    assert list(records['dropped']) == [0, 1]
+    first = records[0]
+    assert (first['timestamp'], first['dequeued'], first['converted'], first['written']) == (100.5, 100.6, 100.7, 101.0)
+    assert first['startError'] == 0.002
+    assert all(math.isnan(records[1][name]) for name in ('timestamp', 'written', 'startError'))
+
+
+def test_records_hold_the_same_stages_whenever_they_are_saved():
+    saved = baseCapture.FrameRecord(None, 4, 2, 30, 3, 100.0, 'Trial', True)
+    saved.stamp('dequeued', 100.1)
+    saved.stamp('converted', 100.2)
+    early = timestampLog.packRecord(saved, 100.5)
+    saved.stamp('processing', 100.3)                        # Processing may finish before or after the frame is saved.
+    saved.stamp('processed', 100.4)
+    assert timestampLog.packRecord(saved, 100.5) == early
+    assert not any(math.isnan(value) for value in timestampLog.recordStruct.unpack(early)[:-2])
+
+
+def test_convert_to_text_leaves_out_dropped_frames(tmp_path):
+    record = baseCapture.FrameRecord(None, 4, 2, 30, 1, 100.0, 'Trial', True)
+    path = str(tmp_path / 'TrialTimestamps.bin')
+    with open(path, 'wb') as dataSheet:
+        dataSheet.write(timestampLog.packRecord(record, 100.1))
+        dataSheet.write(timestampLog.packDropped(2))
+    with open(timestampLog.convertToText(path)) as textFile:
+        lines = textFile.readlines()
+    assert lines[0] == timestampLog.legacyHeader
+    assert len(lines) == 2 and lines[1].startswith('Frame Number: 1 ')
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+timestampLog.py
+
+Last Edited: 10/17/2026
+
+Lead Author[s]: agent
+Contributor[s]:
+
+
+Description:
+
+The layout of the binary timestamp files saved by SavingThread and functions to read them. Each frame is one fixed
+width record of its frame number, capture time, the times it finished the stages before it was saved, when it was
+saved, how late the recording started for the first frame, and whether the frame was dropped. Frames that never
+arrived are written with the dropped flag set so every frame number of a recording has a record. A whole file loads
+with a single numpy.fromfile, and the files can be converted to the older text layout.
+
+Machine I/O
+input: [Recording]Timestamps.bin files
+output: [Recording]Timestamps.txt files in the older text layout
+
+User I/O
+input: The binary timestamp files to convert. (python3 timestampLog.py Trial_Timestamps.bin)
+output: none
+
+"""
+###############################################################################
+
+
+########## Librarys, Imports, & Setup ##########
+
+# Default Libraries
+import sys
+import os
+import struct
+import datetime
+
+# Downloaded Libraries
+import numpy
+
+########## Definitions ##########
+
+# Constants #
+# The stages whose times are kept, not a number if not reached. Only stages every frame finishes before the timestamp
+# saver is sent it are kept, processing runs alongside saving so its time would only be there now and then.
+stages = ('dequeued', 'converted')
+recordType = numpy.dtype([('frameNumber', '<i8'), ('timestamp', '<f8')] +
+                         [(stage, '<f8') for stage in stages] +
+                         [('written', '<f8'), ('startError', '<f8'), ('dropped', 'u1')])
+recordStruct = struct.Struct('<q' + 'd' * (len(stages) + 3) + 'B')
+nan = float('nan')
+
+legacyHeader = 'I do not know what to put in the header yet... Use your imagination!\n'
+legacyLine = 'Frame Number: {:}      Timestamp: {:}\n'
+legacyStart = 'Start Error: {:.3f} ms\n'
+
+
+# Functions #
+
+def packRecord(record, written):
+    """
+    packRecord: Packs the timestamps of a frame into a binary record.
+
+    Parameters:
+    :param record: The FrameRecord of the frame.
+    :param written: The time the frame was saved.
+    :return: The bytes of the record.
+    """
+    times = record.times
+    return recordStruct.pack(record.frameNumber, record.timestamp, *[times.get(stage, nan) for stage in stages],
+                             written, nan if record.startError is None else record.startError, 0)
+
+
+def packDropped(frameNumber):
+    """
+    packDropped: Packs a binary record for a frame that was dropped before it was saved.
+
+    Parameters:
+    :param frameNumber: The number of the dropped frame.
+    :return: The bytes of the record.
+    """
+    return recordStruct.pack(frameNumber, *[nan] * (len(stages) + 3), 1)
+
+
+def loadTimestamps(path):
+    """
+    loadTimestamps: Loads a binary timestamp file.
+
+    Parameters:
+    :param path: The path of the file.
+    :return: A numpy structured array with a row for each frame.
+    """
+    return numpy.fromfile(path, dtype=recordType)
+
+
+def convertToText(path, textPath=None, header=legacyHeader):
+    """
+    convertToText: Converts a binary timestamp file to the older text layout. Dropped frames are left out.
+
+    Parameters:
+    :param path: The path of the binary file.
+    :param textPath: The path of the text file, the binary path ending in .txt by default.
+    :param header: The header written at the top of the text file.
+    :return: The path of the text file.
+    """
+    textPath = textPath or os.path.splitext(path)[0] + '.txt'
+    records = loadTimestamps(path)
+    with open(textPath, 'w') as dataSheet:
+        dataSheet.write(header)
+        for row in records[records['dropped'] == 0]:
+            if not numpy.isnan(row['startError']):
+                dataSheet.write(legacyStart.format(row['startError'] * 1000))
+            dataSheet.write(legacyLine.format(row['frameNumber'], datetime.datetime.fromtimestamp(row['timestamp'])))
+    return textPath
+
+
+########## Main ##########
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print('Usage: python3 timestampLog.py [Binary Timestamp Files]')
+    for binaryPath in sys.argv[1:]:
+        print('Converted {:} to {:}'.format(binaryPath, convertToText(binaryPath)))
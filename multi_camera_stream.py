@@ -0,0 +1,133 @@
+'''
+multi_camera_stream.py
+    - from multi_camera_stream import MultiCameraStream
+    - cams = MultiCameraStream([0, 1], width=600).start()
+    - (gray1, gray2), (t1, t2) = cams.read()
+    - read returns None once the stream has stopped, so check it before unpacking
+
+Captures from several USB cameras at once.  Reading one camera after another means the second
+    camera captures later than the first and every camera waits on the others' conversions.
+    Instead all cameras are grabbed back to back so their capture instants are close together,
+    then each camera's frame is retrieved, resized and converted to gray on its own thread.
+Every frame comes with the time it was grabbed (default_timer) so the skew between cameras
+    can be checked after recording.
+'''
+# Import the necessary packages
+import threading
+from timeit import default_timer as timer
+import imutils
+import cv2
+
+
+class MultiCameraStream:
+    def __init__(self, srcs=(0, 1), width=None, gray=True):
+        #open every camera
+        self.cams = [cv2.VideoCapture(src) for src in srcs]
+        self.width = width
+        self.gray = gray
+
+        #latest converted frame set and when each frame was grabbed
+        self.frames = [None] * len(self.cams)
+        self.times = [0.0] * len(self.cams)
+        self.count = 0
+        self.newSet = threading.Condition()
+
+        #events passing each camera between the grabber and its worker
+        self.grabbed = [threading.Event() for cam in self.cams]
+        self.retrieved = [threading.Event() for cam in self.cams]
+        self.done = threading.Barrier(len(self.cams), action=self.publish)
+        self.pending = [None] * len(self.cams)
+        self.pendingTimes = [0.0] * len(self.cams)
+        self.stopped = False
+        self.threads = []
+
+    def start(self):
+        #start the grabber and one worker per camera then wait for the first frames
+        for i in range(len(self.cams)):
+            self.retrieved[i].set()
+            self.threads.append(threading.Thread(target=self.convert, args=(i,), daemon=True))
+        self.threads.append(threading.Thread(target=self.grab, daemon=True))
+        for thread in self.threads:
+            thread.start()
+        with self.newSet:
+            self.newSet.wait_for(lambda: self.count > 0 or self.stopped)
+        #a camera that cannot capture would leave the frames empty
+        if self.count == 0:
+            self.release()
+            raise RuntimeError('Could not read a frame from every camera')
+        return self
+
+    def grab(self):
+        while not self.stopped:
+            #a camera can only grab again once its last frame has been retrieved
+            for event in self.retrieved:
+                event.wait()
+            #grab every camera back to back so the capture instants are close together
+            for i, cam in enumerate(self.cams):
+                self.retrieved[i].clear()
+                if not cam.grab():
+                    self.stop()
+                self.pendingTimes[i] = timer()
+            for event in self.grabbed:
+                event.set()
+
+    def convert(self, i):
+        while not self.stopped:
+            self.grabbed[i].wait()
+            self.grabbed[i].clear()
+            if self.stopped:
+                break
+            #decoding the frame releases the camera for the next grab
+            ret, frame = self.cams[i].retrieve()
+            grabTime = self.pendingTimes[i]
+            self.retrieved[i].set()
+            if ret:
+                if self.width:
+                    frame = imutils.resize(frame, self.width)
+                if self.gray:
+                    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            self.pending[i] = (frame if ret else None, grabTime)
+            try:
+                self.done.wait()
+            except threading.BrokenBarrierError:
+                break
+
+    def publish(self):
+        #runs once every camera has converted its frame of the same grab
+        with self.newSet:
+            if all(frame is not None for frame, grabTime in self.pending):
+                self.frames = [frame for frame, grabTime in self.pending]
+                self.times = [grabTime for frame, grabTime in self.pending]
+                self.count += 1
+            else:
+                #a camera that fails to retrieve stops the stream so readers waiting on a new set return
+                self.stopped = True
+            self.newSet.notify_all()
+
+    def read(self, wait=False):
+        #return the latest frames and their grab times, optionally waiting for a set not read before
+        with self.newSet:
+            last = self.count
+            if wait:
+                self.newSet.wait_for(lambda: self.count > last or self.stopped)
+            #once stopped the frames are stale, so None is returned unless a new set arrived while waiting
+            if self.stopped and self.count == last:
+                return None
+            return list(self.frames), list(self.times)
+
+    def stop(self):
+        self.stopped = True
+        self.done.abort()
+        for event in self.grabbed + self.retrieved:
+            event.set()
+        with self.newSet:
+            self.newSet.notify_all()
+
+    def release(self):
+        #stop and free the cameras once no thread is using them
+        self.stop()
+        for thread in self.threads:
+            if thread is not threading.current_thread():
+                thread.join()
+        for cam in self.cams:
+            cam.release()
@@ -15,7 +15,7 @@ Written by: Brian Mullen
 '''
 # Import the necessary packages
 from imutils.video import VideoStream
-from imutils.video import WebcamVideoStream
+from multi_camera_stream import MultiCameraStream
 import numpy as np
 import argparse
 import imutils
@@ -85,19 +85,16 @@ def fpsManager(t0, fps, verbose = False):
 
 
 def singleFrame():
-    frame1 = vs1.read()
-    frame1 = imutils.resize(frame1, args["width"])
-    gray1 = cv2.cvtColor(frame1, cv2.COLOR_BGR2GRAY)
+    #both cameras are grabbed together and resized/converted to gray on their own threads, None once they stop
+    frames = cams.read(wait=True)
+    if frames is None:
+        return None
+    (gray1, gray2), (t1, t2) = frames
     if record == False:
         cv2.imshow('WebCam1: press r to record, q to quit', gray1)
-
-    frame2 = vs2.read()
-    frame2 = imutils.resize(frame2, args["width"])
-    gray2 = cv2.cvtColor(frame2, cv2.COLOR_BGR2GRAY)
-    if record == False:
         cv2.imshow('WebCam2: press r to record, q to quit', gray2)
 
-    return gray1, gray2
+    return gray1, gray2, t1, t2
 
 host = args["IPaddress"]
 port = args["PORT"]
@@ -113,16 +110,13 @@ print("Warming up camera")
 if args["setting"]:
     os.system('qv4l2')
 
-vs1 = WebcamVideoStream(src=0).start()
-vs2 = WebcamVideoStream(src=1).start()
+cams = MultiCameraStream([0, 1], width=args["width"]).start()
 
 time.sleep(2.0)
 
 #initialize the FourCC, video writer, dimensions of the frame, and zeros array
 fps = args["fps"]
-frame1 = vs1.read()
-frame1 = imutils.resize(frame1, args["width"])
-(h, w) = frame1.shape[:2]
+(h, w) = cams.read()[0][0].shape[:2]
 numframe = int(fps * args['length'] * 60)
 ts = None
 toverflow = 0
@@ -135,6 +129,9 @@ f = hdf5manager(fnm_save)
 f.save({'data_f': np.zeros((numframe, h, w), dtype=np.uint8)})
 f.save({'data_b': np.zeros((numframe, h, w), dtype=np.uint8)})
 f.save({'fps':np.zeros((numframe), dtype=np.float32)})
+#when each camera grabbed its frame, float64 keeps the timer's precision
+f.save({'grab_time_f':np.zeros((numframe), dtype=np.float64)})
+f.save({'grab_time_b':np.zeros((numframe), dtype=np.float64)})
 f.open()
 
 print("Initialize streaming")
@@ -143,7 +140,11 @@ n = 0
 
 while True:
     t0 = timer()
-    gray1, gray2 = singleFrame()
+    frames = singleFrame()
+    if frames is None:
+        print("Camera stopped capturing")
+        break
+    gray1, gray2, t1, t2 = frames
     if record == True:
         data, addr = s.recvfrom(1024)
         n = int(float(data.decode('utf-8')))
@@ -155,6 +156,8 @@ while True:
         f.f['data_f'][n] = gray1
         f.f['data_b'][n] = gray2
         f.f['fps'][n] = timer()
+        f.f['grab_time_f'][n] = t1
+        f.f['grab_time_b'][n] = t2
 
         if (n % 10) == 0:
             print("Average frames per sec: {0} frames/sec".format(10/(timer() - rec_time)))
@@ -176,8 +179,7 @@ while True:
 
 print("Shutting down")
 f.close()
-vs1.stop()
-vs2.stop()
+cams.release()
 s.close()
 cv2.destroyAllWindows()
 for i in range(5):
@@ -15,7 +15,7 @@ Written by: Brian Mullen
 '''
 # Import the necessary packages
 from imutils.video import VideoStream
-from imutils.video import WebcamVideoStream
+from multi_camera_stream import MultiCameraStream
 import numpy as np
 import argparse
 import imutils
@@ -88,19 +88,16 @@ def fpsManager(t0, fps, verbose = False):
 
 
 def singleFrame():
-    frame1 = vs1.read()
-    frame1 = imutils.resize(frame1, args["width"])
-    gray1 = cv2.cvtColor(frame1, cv2.COLOR_BGR2GRAY)
+    #both cameras are grabbed together and resized/converted to gray on their own threads, None once they stop
+    frames = cams.read(wait=True)
+    if frames is None:
+        return None
+    (gray1, gray2), (t1, t2) = frames
     if record == False:
         cv2.imshow('WebCam1: press r to record, q to quit', gray1)
-
-    frame2 = vs2.read()
-    frame2 = imutils.resize(frame2, args["width"])
-    gray2 = cv2.cvtColor(frame2, cv2.COLOR_BGR2GRAY)
-    if record == False:
         cv2.imshow('WebCam2: press r to record, q to quit', gray2)
 
-    return gray1, gray2
+    return gray1, gray2, t1, t2
 
 host = args["IPaddress"]
 port = args["PORT"]
@@ -116,16 +113,13 @@ print("Warming up camera")
 if args["setting"]:
     os.system('qv4l2')
 
-vs1 = WebcamVideoStream(src=1).start()
-vs2 = WebcamVideoStream(src=2).start()
+cams = MultiCameraStream([1, 2], width=args["width"]).start()
 
 time.sleep(2.0)
 
 #initialize the FourCC, video writer, dimensions of the frame, and zeros array
 fps = args["fps"]
-frame1 = vs1.read()
-frame1 = imutils.resize(frame1, args["width"])
-(h, w) = frame1.shape[:2]
+(h, w) = cams.read()[0][0].shape[:2]
 print(h, w)
 numframe = int(fps * args['length'] * 60)
 print(numframe)
@@ -148,7 +142,11 @@ n = 0
 
 while True:
     t0 = timer()
-    gray1, gray2 = singleFrame()
+    frames = singleFrame()
+    if frames is None:
+        print("Camera stopped capturing")
+        break
+    gray1, gray2, t1, t2 = frames
     if record == True:
         data, addr = s.recvfrom(1024)
         n = int(float(data.decode('utf-8')))
@@ -159,7 +157,8 @@ while True:
         
         c1[n] = gray1
         c2[n] = gray2
-        tlog.write("%f\n" % timer())
+        #loop time followed by when each camera grabbed its frame
+        tlog.write("%f\t%f\t%f\n" % (timer(), t1, t2))
 
         if (n % 10) == 0:
             print("Average frames per sec: {0} frames/sec".format(10/(timer() - rec_time)))
@@ -191,8 +190,7 @@ if record == True:
 
 print("Shutting down")
 tlog.close()
-vs1.stop()
-vs2.stop()
+cams.release()
 s.close()
 cv2.destroyAllWindows()
 for i in range(5):
@@ -21,7 +21,7 @@ Written by: Brian Mullen
 
 # Import the necessary packages
 from imutils.video import VideoStream
-from imutils.video import WebcamVideoStream
+from multi_camera_stream import MultiCameraStream
 import numpy as np
 import argparse
 import imutils
@@ -69,19 +69,16 @@ args = vars(ap.parse_args())
 
 #Capture one frame each from two seperate USB cameras
 def singleFrame():
-    frame1 = vs1.read()
-    frame1 = imutils.resize(frame1, args["width"])
-    gray1 = cv2.cvtColor(frame1, cv2.COLOR_BGR2GRAY)
+    #both cameras are grabbed together and resized/converted to gray on their own threads, None once they stop
+    frames = cams.read(wait=True)
+    if frames is None:
+        return None
+    (gray1, gray2), (t1, t2) = frames
     if record == False:
         cv2.imshow('WebCam1: press r to record, q to quit', gray1)
-
-    frame2 = vs2.read()
-    frame2 = imutils.resize(frame2, args["width"])
-    gray2 = cv2.cvtColor(frame2, cv2.COLOR_BGR2GRAY)
-    if record == False:
         cv2.imshow('WebCam2: press r to record, q to quit', gray2)
 
-    return gray1, gray2
+    return gray1, gray2, t1, t2
 
 #Set up UDP connection
 host = args["IPaddress"]
@@ -94,16 +91,13 @@ print ("UDP socket bound to %s" %(port))
 #initialize the video stream and allow the camera sensor to warmup
 print("Warming up camera")
 
-vs1 = WebcamVideoStream(src=1).start()
-vs2 = WebcamVideoStream(src=2).start()
+cams = MultiCameraStream([1, 2], width=args["width"]).start()
 
 time.sleep(2.0)
 
 #determine parameters needed for saving
 fps = args["fps"]
-frame1 = vs1.read()
-frame1 = imutils.resize(frame1, args["width"])
-(h, w) = frame1.shape[:2]
+(h, w) = cams.read()[0][0].shape[:2]
 numframe = int(fps * args['length'] * 60)
 record = False
 
@@ -112,7 +106,11 @@ n = 0
 
 while True:
     t0 = timer()
-    gray1, gray2 = singleFrame()
+    frames = singleFrame()
+    if frames is None:
+        print("Camera stopped capturing")
+        break
+    gray1, gray2, t1, t2 = frames
     if record == True:
         if n == 0:
             print("Starting Recording")
@@ -141,8 +139,7 @@ while True:
         break
 
 print("Shutting down")
-vs1.stop()
-vs2.stop()
+cams.release()
 s.close()
 cv2.destroyAllWindows()
 for i in range(5):